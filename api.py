@@ -0,0 +1,334 @@
+# ===================================================================================
+# PUROBET - API JSON LOCAL
+# Serviço HTTP sem interface gráfica ('python main.py servir'). O main.py só carrega este
+# arquivo nesse modo: os demais comandos não pagam a importação do http.server.
+# ===================================================================================
+
+import json
+import logging
+import math
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from main import (
+    CORES_ROLETA, ESTRATEGIAS_BLACKJACK, MOTIVOS_PARADA, SORTEIO, TABELAS_LOG, VALORES_APOSTA_ROLETA,
+    MotorSaqueAutomatico, acoes_crash, ativar_pool_conexoes, autenticar_admin, autenticar_usuario,
+    calcular_ganhos_roleta, codificar_apostas_roleta, criar_baralho, debitar_aposta, jogar_automatico, jogar_dealer,
+    liquidar_apostas_lote, medir, movimentar_saldo, obter_arvore_indicacoes, obter_cadeia, obter_configuracao_jogo,
+    obter_dados_usuario, obter_logs, obter_resumo_indicacoes, obter_todos_usuarios, registrar_usuario,
+    resultado_blackjack, sortear_rodada, valor_mao,
+)
+
+# --- SEÇÃO 6: SERVIÇO HEADLESS (API JSON LOCAL) ---
+
+# Erros inesperados das rotas vão para este logger, com o traceback.
+REGISTRO_API = logging.getLogger("purobet.api")
+
+class ErroAPI(Exception):
+    """Erro de uma requisição da API, com o status HTTP a ser devolvido."""
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+class ServicoAPI:
+    """
+    Expõe contas, jogos e logs como uma API HTTP/JSON, sem interface gráfica.
+    As sessões ficam em memória: o login devolve um token que deve ser enviado nas
+    requisições seguintes no cabeçalho 'Authorization: Bearer <token>'.
+    """
+    DURACAO_SESSAO = 3600
+
+    def __init__(self):
+        self.sessoes = {}
+        self._trava_sessoes = threading.Lock()
+        self.rotas = {
+            ('POST', '/login'): self.login,
+            ('POST', '/logout'): self.logout,
+            ('POST', '/registrar'): self.registrar,
+            ('GET', '/usuario'): self.usuario,
+            ('POST', '/deposito'): self.deposito,
+            ('POST', '/blackjack/apostar'): self.blackjack_apostar,
+            ('POST', '/blackjack/pedir'): self.blackjack_pedir,
+            ('POST', '/blackjack/parar'): self.blackjack_parar,
+            ('POST', '/roleta/girar'): self.roleta_girar,
+            ('POST', '/crash/apostar'): self.crash_apostar,
+            ('POST', '/automatico'): self.automatico,
+            ('GET', '/admin/usuarios'): self.admin_usuarios,
+            ('GET', '/admin/logs'): self.admin_logs,
+            ('GET', '/admin/indicacoes'): self.admin_indicacoes,
+        }
+
+    # --- Sessões ---
+
+    def criar_sessao(self, usuario, admin=False):
+        token = secrets.token_urlsafe(24)
+        with self._trava_sessoes:
+            self.sessoes[token] = {'usuario': usuario, 'admin': admin, 'expira': time.time() + self.DURACAO_SESSAO,
+                                   'trava': threading.Lock(), 'blackjack': None}
+        return token
+
+    def obter_sessao(self, token, admin=False):
+        with self._trava_sessoes:
+            sessao = self.sessoes.get(token)
+            if not sessao or sessao['expira'] < time.time():
+                self.sessoes.pop(token, None)
+                raise ErroAPI(401, "Sessão inválida ou expirada.")
+            sessao['expira'] = time.time() + self.DURACAO_SESSAO
+        if admin and not sessao['admin']:
+            raise ErroAPI(403, "Acesso restrito ao admin.")
+        if not admin and sessao['admin']:
+            raise ErroAPI(403, "O admin não joga.")
+        return sessao
+
+    @staticmethod
+    def ler_quantia(corpo, campo):
+        try:
+            quantia = float(corpo[campo])
+        except (KeyError, TypeError, ValueError):
+            raise ErroAPI(400, f"Campo '{campo}' inválido.")
+        if not math.isfinite(quantia):
+            raise ErroAPI(400, f"Campo '{campo}' inválido.")
+        if quantia <= 0:
+            raise ErroAPI(400, f"Campo '{campo}' deve ser positivo.")
+        return quantia
+
+    @staticmethod
+    def ler_credenciais(corpo):
+        usuario, senha = corpo.get('usuario'), corpo.get('senha')
+        if not isinstance(usuario, str) or not isinstance(senha, str) or not usuario or not senha:
+            raise ErroAPI(400, "Preencha usuário e senha.")
+        return usuario, senha
+
+    # --- Contas ---
+
+    def login(self, token, corpo):
+        usuario, senha = self.ler_credenciais(corpo)
+        if autenticar_admin(usuario, senha):
+            return 200, {'token': self.criar_sessao(usuario, admin=True), 'admin': True}
+        if autenticar_usuario(usuario, senha):
+            return 200, {'token': self.criar_sessao(usuario), 'admin': False}
+        raise ErroAPI(401, "Usuário ou senha inválidos.")
+
+    def logout(self, token, corpo):
+        with self._trava_sessoes:
+            self.sessoes.pop(token, None)
+        return 200, {}
+
+    def registrar(self, token, corpo):
+        usuario, senha = self.ler_credenciais(corpo)
+        codigo_ref = corpo.get('codigo_convite')
+        if codigo_ref is not None and not isinstance(codigo_ref, str):
+            raise ErroAPI(400, "Campo 'codigo_convite' inválido.")
+        registrado, indicador = registrar_usuario(usuario, senha, codigo_ref)
+        if not registrado:
+            raise ErroAPI(409, "Este nome de usuário já existe.")
+        return 201, {'usuario': usuario, 'indicador': indicador}
+
+    def usuario(self, token, corpo):
+        sessao = self.obter_sessao(token)
+        return 200, dict(obter_dados_usuario(sessao['usuario']) or {}, usuario=sessao['usuario'])
+
+    def deposito(self, token, corpo):
+        sessao = self.obter_sessao(token)
+        quantia = self.ler_quantia(corpo, 'quantia')
+        movimentar_saldo(sessao['usuario'], quantia, 'deposito')
+        return 200, obter_dados_usuario(sessao['usuario'])
+
+    # --- Jogos ---
+
+    def debitar(self, sessao, aposta, jogo):
+        if not debitar_aposta(sessao['usuario'], aposta, jogo):
+            raise ErroAPI(409, "Saldo insuficiente.")
+
+    def estado_blackjack(self, mao, finalizado=False, mensagem=None, ganhos=None):
+        estado = {'mao_jogador': mao['jogador'], 'pontos_jogador': valor_mao(mao['jogador']),
+                  'mao_dealer': mao['dealer'] if finalizado else mao['dealer'][:1], 'finalizado': finalizado}
+        if finalizado:
+            estado.update(pontos_dealer=valor_mao(mao['dealer']), mensagem=mensagem, ganhos=ganhos)
+        return estado
+
+    def finalizar_blackjack(self, sessao):
+        mao = sessao['blackjack']
+        sessao['blackjack'] = None
+        if valor_mao(mao['jogador']) <= 21:
+            jogar_dealer(mao['dealer'], mao['baralho'])
+        mensagem, ganhos = resultado_blackjack(mao['jogador'], mao['dealer'], mao['aposta'])
+        liquidar_apostas_lote("Blackjack", [(sessao['usuario'], mao['aposta'], ganhos, mao['acoes'])], mao['semente'])
+        return 200, self.estado_blackjack(mao, True, mensagem, ganhos)
+
+    def blackjack_apostar(self, token, corpo):
+        sessao = self.obter_sessao(token)
+        aposta = self.ler_quantia(corpo, 'aposta')
+        with sessao['trava']:
+            if sessao['blackjack']:
+                raise ErroAPI(409, "Já existe uma mão em andamento.")
+            self.debitar(sessao, aposta, "Blackjack")
+            semente, gerador = SORTEIO.nova_rodada()
+            baralho = criar_baralho(gerador)
+            mao = {'baralho': baralho, 'aposta': aposta, 'semente': semente, 'acoes': "",
+                   'jogador': [baralho.pop(), baralho.pop()], 'dealer': [baralho.pop(), baralho.pop()]}
+            sessao['blackjack'] = mao
+            if valor_mao(mao['jogador']) == 21:
+                return self.finalizar_blackjack(sessao)
+            return 200, self.estado_blackjack(mao)
+
+    def blackjack_pedir(self, token, corpo):
+        sessao = self.obter_sessao(token)
+        with sessao['trava']:
+            mao = sessao['blackjack']
+            if not mao:
+                raise ErroAPI(409, "Nenhuma mão em andamento.")
+            mao['jogador'].append(mao['baralho'].pop())
+            mao['acoes'] += "P"
+            if valor_mao(mao['jogador']) > 21:
+                return self.finalizar_blackjack(sessao)
+            return 200, self.estado_blackjack(mao)
+
+    def blackjack_parar(self, token, corpo):
+        sessao = self.obter_sessao(token)
+        with sessao['trava']:
+            if not sessao['blackjack']:
+                raise ErroAPI(409, "Nenhuma mão em andamento.")
+            return self.finalizar_blackjack(sessao)
+
+    def prova(self, posicao, cadeia):
+        """Elo revelado de uma rodada da cadeia de resultados, para o jogador conferir contra o hash final publicado."""
+        if not cadeia:
+            return {}
+        return {'prova': {'cadeia': cadeia, 'posicao': posicao, 'elo': obter_cadeia(cadeia).elo(posicao).hex()}}
+
+    def ler_apostas_roleta(self, corpo):
+        apostas = corpo.get('apostas')
+        if not apostas or not isinstance(apostas, list):
+            raise ErroAPI(400, "Informe ao menos uma aposta.")
+        for aposta in apostas:
+            if not isinstance(aposta, dict) or aposta.get('valor') not in VALORES_APOSTA_ROLETA.get(aposta.get('tipo'), ()):
+                raise ErroAPI(400, "Aposta da roleta inválida.")
+            aposta['quantia'] = self.ler_quantia(aposta, 'quantia')
+        return apostas
+
+    def roleta_girar(self, token, corpo):
+        """Recebe {'apostas': [{'tipo', 'valor', 'quantia'}, ...]}, no mesmo formato da tela da roleta."""
+        sessao = self.obter_sessao(token)
+        apostas = self.ler_apostas_roleta(corpo)
+        aposta_total = sum(a['quantia'] for a in apostas)
+        self.debitar(sessao, aposta_total, "Roleta")
+        numero, semente, cadeia = sortear_rodada("Roleta")
+        pagamento_numero = obter_configuracao_jogo('pagamento_roleta_numero')
+        ganhos = calcular_ganhos_roleta(apostas, numero, pagamento_numero)
+        liquidar_apostas_lote("Roleta", [(sessao['usuario'], aposta_total, ganhos, codificar_apostas_roleta(apostas, pagamento_numero))],
+                              semente, cadeia)
+        return 200, dict(self.prova(semente, cadeia), numero=numero, cor=CORES_ROLETA[numero], aposta_total=aposta_total, ganhos=ganhos)
+
+    def crash_apostar(self, token, corpo):
+        """
+        Aposta no Crash com saque automático em 'alvo'. Sem um cliente acompanhando o gráfico,
+        a rodada é resolvida na hora: ganha quem tiver o alvo abaixo do ponto de crash.
+        """
+        sessao = self.obter_sessao(token)
+        aposta, alvo = self.ler_quantia(corpo, 'aposta'), self.ler_quantia(corpo, 'alvo')
+        if alvo <= 1.0:
+            raise ErroAPI(400, "O alvo deve ser maior que 1.00x.")
+        self.debitar(sessao, aposta, "Crash")
+        motor = MotorSaqueAutomatico()
+        motor.adicionar_aposta(sessao['usuario'], aposta, alvo)
+        ponto_crash, semente, cadeia = sortear_rodada("Crash")
+        liquidacoes = motor.retirar_alvos_atingidos(ponto_crash, estrito=True) + motor.encerrar_rodada()
+        liquidar_apostas_lote("Crash", acoes_crash(liquidacoes), semente, cadeia)
+        return 200, dict(self.prova(semente, cadeia), ponto_crash=ponto_crash, ganhos=liquidacoes[0][2])
+
+    def automatico(self, token, corpo):
+        """
+        Sessão automática: {'jogo': 'Blackjack', 'aposta', 'estrategia'} ou {'jogo': 'Roleta', 'apostas'},
+        com 'rodadas' e, opcionais, 'limite_perda', 'meta_ganho' e 'saldo_minimo'. Responde o resumo.
+        """
+        sessao = self.obter_sessao(token)
+        jogo = corpo.get('jogo')
+        if jogo not in ('Blackjack', 'Roleta'):
+            raise ErroAPI(400, "O jogo automático é 'Blackjack' ou 'Roleta'.")
+        if corpo.get('estrategia', 'basica') not in ESTRATEGIAS_BLACKJACK:
+            raise ErroAPI(400, f"Estratégia deve ser uma de {', '.join(ESTRATEGIAS_BLACKJACK)}.")
+        rodadas = int(self.ler_quantia(corpo, 'rodadas'))
+        limites = {campo: self.ler_quantia(corpo, campo) if corpo.get(campo) else None
+                   for campo in ('limite_perda', 'meta_ganho', 'saldo_minimo')}
+        with sessao['trava']:
+            if sessao['blackjack']:
+                raise ErroAPI(409, "Já existe uma mão em andamento.")
+            if jogo == 'Blackjack':
+                resumo = jogar_automatico(sessao['usuario'], jogo, rodadas, self.ler_quantia(corpo, 'aposta'),
+                                          estrategia=corpo.get('estrategia', 'basica'), **limites)
+            else:
+                resumo = jogar_automatico(sessao['usuario'], jogo, rodadas, apostas=self.ler_apostas_roleta(corpo), **limites)
+        return 200, dict(resumo, parada=MOTIVOS_PARADA[resumo['parada']])
+
+    # --- Admin ---
+
+    def admin_usuarios(self, token, corpo):
+        self.obter_sessao(token, admin=True)
+        return 200, {'usuarios': [{'usuario': u, 'saldo': s} for u, s in obter_todos_usuarios()]}
+
+    def admin_logs(self, token, corpo):
+        self.obter_sessao(token, admin=True)
+        tipo_log = corpo.get('tipo', 'logs_apostas')
+        if tipo_log not in TABELAS_LOG:
+            raise ErroAPI(400, f"Tipo de log deve ser um de {', '.join(TABELAS_LOG)}.")
+        return 200, {'logs': obter_logs(tipo_log, corpo.get('usuario') or None, corpo.get('de') or None, corpo.get('ate') or None)}
+
+    def admin_indicacoes(self, token, corpo):
+        self.obter_sessao(token, admin=True)
+        if corpo.get('usuario'):
+            colunas = ('usuario', 'nivel', 'indicados_diretos', 'bonus')
+            return 200, {'arvore': [dict(zip(colunas, linha)) for linha in obter_arvore_indicacoes(corpo['usuario'])]}
+        colunas = ('usuario', 'indicados_diretos', 'total_na_arvore', 'bonus')
+        return 200, {'indicadores': [dict(zip(colunas, linha)) for linha in obter_resumo_indicacoes()]}
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    """Traduz requisições HTTP para as rotas do ServicoAPI."""
+    def do_GET(self): self.despachar('GET')
+    def do_POST(self): self.despachar('POST')
+
+    def despachar(self, metodo):
+        url = urlparse(self.path)
+        rota = self.server.servico.rotas.get((metodo, url.path))
+        try:
+            if not rota:
+                raise ErroAPI(404, "Rota não encontrada.")
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            try:
+                corpo = json.loads(self.rfile.read(tamanho)) if tamanho else {}
+            except ValueError:
+                raise ErroAPI(400, "Corpo JSON inválido.")
+            if not isinstance(corpo, dict):
+                raise ErroAPI(400, "O corpo deve ser um objeto JSON.")
+            corpo.update({k: v[-1] for k, v in parse_qs(url.query).items()})
+            token = self.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+            with medir(f"API {metodo} {url.path}"):
+                status, resposta = rota(token, corpo)
+        except ErroAPI as erro:
+            status, resposta = erro.status, {'erro': erro.mensagem}
+        except ValueError as erro:
+            status, resposta = 400, {'erro': str(erro)}
+        except Exception:
+            REGISTRO_API.exception("Erro na rota %s %s", metodo, url.path)
+            status, resposta = 500, {'erro': "Erro interno."}
+        dados = json.dumps(resposta, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        pass
+
+def iniciar_servidor_api(porta=8765, tamanho_pool=8):
+    """Sobe a API em localhost, atendendo cada requisição numa thread própria."""
+    ativar_pool_conexoes(tamanho_pool)
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), ManipuladorAPI)
+    servidor.daemon_threads = True
+    servidor.servico = ServicoAPI()
+    return servidor
@@ -0,0 +1,252 @@
+# ===================================================================================
+# PUROBET - MICRO-BENCHMARKS DOS CAMINHOS QUENTES
+# Mede as funções mais chamadas durante o jogo num banco temporário com dados sintéticos
+# gerados com semente fixa, salva os resultados em JSON e compara com uma baseline.
+#
+# Uso:
+#    python benchmark.py                      # roda e compara com benchmark_baseline.json
+#    python benchmark.py --salvar-baseline    # roda e grava o resultado como nova baseline
+#
+# A baseline é local (fica fora do git) e só é comparada quando foi gravada na mesma plataforma
+# e versão do Python. A partida a frio da linha de comando do admin ('python -m purobet admin')
+# é medida num processo novo e precisa ficar abaixo de --limite-partida-ms, com ou sem baseline.
+# As partes de Tk rodam sem display: o Canvas do Crash é trocado por um substituto que só
+# registra as chamadas, e o PhotoImage só é medido quando existe um display disponível.
+# O processo termina com código 1 se algum benchmark regredir além da tolerância.
+# ===================================================================================
+
+import argparse
+import compileall
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter
+from types import SimpleNamespace
+
+import interface
+import main
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_BASELINE = os.path.join(PASTA_PROJETO, "benchmark_baseline.json")
+ARQUIVO_RESULTADOS = os.path.join(PASTA_PROJETO, "benchmark_resultados.json")
+LIMITE_PARTIDA_CLI_MS = 100
+
+class CanvasFalso:
+    """Substituto do tkinter.Canvas para medir o desenho do gráfico sem display."""
+    def __init__(self, largura=800, altura=500):
+        self.largura, self.altura = largura, altura
+        self.itens = 0
+    def winfo_width(self): return self.largura
+    def winfo_height(self): return self.altura
+    def delete(self, *args): self.itens = 0
+    def create_line(self, *args, **kwargs): self.itens += 1
+    def create_text(self, *args, **kwargs): self.itens += 1
+    def create_image(self, *args, **kwargs): self.itens += 1
+
+def medir(funcao, repeticoes=7, minimo_s=0.05, preparar=None):
+    """
+    Mede o tempo por chamada de 'funcao'. Cada repetição roda chamadas suficientes para
+    durar pelo menos 'minimo_s'; 'preparar' roda antes de cada chamada, fora da medição.
+    """
+    amostras = []
+    numero = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(numero):
+            if preparar: preparar()
+            funcao()
+        if time.perf_counter() - inicio >= minimo_s or numero >= 1_000_000:
+            break
+        numero *= 2
+    for _ in range(repeticoes):
+        if preparar:
+            total = 0.0
+            for _ in range(numero):
+                preparar()
+                inicio = time.perf_counter()
+                funcao()
+                total += time.perf_counter() - inicio
+        else:
+            inicio = time.perf_counter()
+            for _ in range(numero):
+                funcao()
+            total = time.perf_counter() - inicio
+        amostras.append(total / numero * 1e6)
+    return {'mediana_us': statistics.median(amostras), 'min_us': min(amostras), 'chamadas': numero * repeticoes}
+
+def popular_banco(usuarios, apostas):
+    """Cria usuários e logs sintéticos, sempre com a mesma semente."""
+    gerador = random.Random(42)
+    hash_senha = main.gerar_hash_senha("senha")
+    with main.conexao_bd() as conexao:
+        conexao.executemany("INSERT INTO usuarios (nome_usuario, hash_senha, saldo, codigo_referencia) VALUES (?, ?, ?, ?)",
+                            ((f"jogador{i}", hash_senha, 1000, f"REF{i:06d}") for i in range(usuarios)))
+        conexao.executemany("INSERT INTO logs_apostas (nome_usuario, jogo, valor_aposta, resultado, timestamp) VALUES (?, ?, ?, ?, ?)",
+                            ((f"jogador{gerador.randrange(usuarios)}", gerador.choice(["Blackjack", "Roleta", "Crash"]),
+                              10, gerador.choice([-10, 10]), f"2025-01-{gerador.randint(1, 28):02d} 12:00:00") for _ in range(apostas)))
+        conexao.executemany("INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) VALUES (?, ?, ?, ?)",
+                            ((f"jogador{i}", 'deposito_inicial', 1000, "2025-01-01 00:00:00") for i in range(usuarios)))
+        conexao.commit()
+
+def benchmarks_dados():
+    gerador = random.Random(7)
+    observador = main.ObservadorAlteracoes()
+    observador.verificar()
+    return {
+        'ObservadorAlteracoes.verificar[ocioso]': medir(observador.verificar),
+        'registrar_aposta': medir(lambda: main.registrar_aposta("jogador1", "Roleta", 10, 20)),
+        'atualizar_saldo': medir(lambda: main.atualizar_saldo("jogador1", 1)),
+        'obter_logs': medir(lambda: main.obter_logs('logs_apostas')),
+        'obter_logs_filtro': medir(lambda: main.obter_logs('logs_apostas', "jogador12")),
+        'autenticar_usuario': medir(lambda: main.autenticar_usuario(f"jogador{gerador.randrange(1000)}", "senha")),
+        'gerar_hash_senha': medir(lambda: main.gerar_hash_senha("senha"), repeticoes=3),
+        'jogar_automatico[Blackjack, 1000 mãos]': medir(lambda: main.jogar_automatico("jogador2", 'Blackjack', 1000, 0.01), repeticoes=3),
+    }
+
+def benchmarks_cadeia():
+    """Próximo resultado de uma cadeia mapeada em memória e a verificação completa do arquivo."""
+    main.gerar_cadeia('Crash', 1_000_000)
+    main.carregar_cadeias()
+    caminho = main.CADEIAS_ATIVAS['Crash'].caminho
+    return {
+        'sortear_rodada[Crash, cadeia]': medir(lambda: main.sortear_rodada('Crash')),
+        'verificar_cadeia[1M elos]': medir(lambda: main.verificar_cadeia(caminho), repeticoes=3),
+    }
+
+def benchmarks_jogos():
+    gerador = random.Random(3)
+    baralho = main.criar_baralho()
+    maos = [gerador.sample(baralho, gerador.randint(2, 6)) for _ in range(1000)]
+    indice = iter(range(10**9))
+    resultados = {
+        'JogoBlackjack.obter_valor_mao': medir(lambda: interface.JogoBlackjack.obter_valor_mao(None, maos[next(indice) % 1000])),
+        'reproduzir_rodada[Blackjack]': medir(lambda: main.reproduzir_rodada('Blackjack', next(indice), 'P', 10)),
+        'reproduzir_rodada[Roleta]': medir(lambda: main.reproduzir_rodada('Roleta', next(indice), '35|n7:10,cred:20', 30)),
+    }
+    for tamanho in (10, 1000, 10000):
+        tela = SimpleNamespace(apostas=[{'tipo': gerador.choice(['number', 'color']), 'valor': gerador.choice([7, 'red']), 'quantia': 10}
+                                        for _ in range(tamanho)])
+        resultados[f'JogoRoleta.calcular_ganhos[{tamanho}]'] = medir(lambda: interface.JogoRoleta.calcular_ganhos(tela, 7))
+    return resultados
+
+def benchmarks_interface():
+    carregador = interface.CarregadorImagens()
+    resultados = {}
+    for duracao in (5, 30, 120):
+        tela = SimpleNamespace(canvas=CanvasFalso(), estado_jogo="correndo", tempo_inicio=time.time() - duracao,
+                               multiplicador=1.05 ** duracao, ponto_crash=1.05 ** duracao + 1, pontos_grafico=[],
+                               imagem_aviao_photo=None,
+                               controlador=SimpleNamespace(carregador_imagens=SimpleNamespace(obter_imagem_photo=lambda *a, **k: None)))
+        resultados[f'JogoCrash.desenhar_grafico[{duracao}s]'] = medir(lambda: interface.JogoCrash.desenhar_grafico(tela))
+
+    cartas = [f"{n}_{r}" for n in ('hearts', 'spades') for r in ('A', 'K', '7')]
+    proxima = iter(range(10**9))
+    resultados['CarregadorImagens.obter_imagem_ctk[frio]'] = medir(
+        lambda: carregador.obter_imagem_ctk(cartas[next(proxima) % len(cartas)]), preparar=carregador.cache_ctk.clear, repeticoes=3)
+    carregador.obter_imagem_ctk("hearts_A")
+    resultados['CarregadorImagens.obter_imagem_ctk[quente]'] = medir(lambda: carregador.obter_imagem_ctk("hearts_A"))
+
+    try:
+        raiz = tkinter.Tk()
+        raiz.withdraw()
+    except tkinter.TclError:
+        print("Sem display: pulando CarregadorImagens.obter_imagem_photo.")
+        return resultados
+    resultados['CarregadorImagens.obter_imagem_photo[frio]'] = medir(
+        lambda: carregador.obter_imagem_photo("plane"), preparar=carregador.cache_photo.clear, repeticoes=3)
+    resultados['CarregadorImagens.obter_imagem_photo[quente]'] = medir(lambda: carregador.obter_imagem_photo("plane"))
+    raiz.destroy()
+    return resultados
+
+def benchmarks_cli(pasta):
+    """
+    Partida a frio de 'python -m purobet admin odds', num banco próprio dentro de 'pasta', e do
+    interpretador vazio para referência. O cache de bytecode é atualizado antes, já que com
+    PYTHONDONTWRITEBYTECODE um main.py alterado seria recompilado em toda execução.
+    """
+    compileall.compile_dir(PASTA_PROJETO, maxlevels=0, quiet=1)
+    ambiente = dict(os.environ, PYTHONPATH=PASTA_PROJETO)
+    def partida(*argumentos):
+        executar = lambda: subprocess.run([sys.executable, *argumentos], cwd=pasta, env=ambiente, check=True,
+                                          stdout=subprocess.DEVNULL)
+        executar()
+        return medir(executar, repeticoes=5)
+    return {'purobet admin odds (partida a frio)': partida("-m", "purobet", "admin", "odds"),
+            'python -c pass (partida a frio)': partida("-c", "pass")}
+
+def comparar(resultados, baseline, tolerancia):
+    """
+    Retorna as linhas de comparação e a lista de benchmarks que regrediram. A comparação usa o
+    menor tempo das repetições, que é o menos afetado por ruído da máquina.
+    """
+    linhas, regressoes = [], []
+    for nome, atual in resultados.items():
+        anterior = baseline.get(nome)
+        if not anterior:
+            linhas.append(f"{nome:<48}{atual['min_us']:>12.2f} us   (novo)")
+            continue
+        variacao = atual['min_us'] / anterior['min_us'] - 1
+        marca = ""
+        if variacao > tolerancia:
+            marca = "  <-- REGRESSÃO"
+            regressoes.append(nome)
+        linhas.append(f"{nome:<48}{atual['min_us']:>12.2f} us {variacao:>+8.1%}{marca}")
+    return linhas, regressoes
+
+def principal():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do PUROBET.")
+    parser.add_argument('--usuarios', type=int, default=10000)
+    parser.add_argument('--apostas', type=int, default=100000)
+    parser.add_argument('--tolerancia', type=float, default=0.20, help="Piora relativa aceita antes de acusar regressão.")
+    parser.add_argument('--baseline', default=ARQUIVO_BASELINE)
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS)
+    parser.add_argument('--salvar-baseline', action='store_true')
+    parser.add_argument('--limite-partida-ms', type=float, default=LIMITE_PARTIDA_CLI_MS,
+                        help="Tempo máximo da partida a frio da linha de comando.")
+    args = parser.parse_args()
+
+    os.chdir(PASTA_PROJETO)
+    with tempfile.TemporaryDirectory() as pasta:
+        main.ARQUIVO_BD = os.path.join(pasta, "benchmark.db")
+        main.inicializar_banco_de_dados()
+        popular_banco(args.usuarios, args.apostas)
+        resultados = {**benchmarks_dados(), **benchmarks_cadeia(), **benchmarks_jogos(), **benchmarks_interface(), **benchmarks_cli(pasta)}
+
+    dados = {'python': sys.version.split()[0], 'plataforma': platform.platform(),
+             'parametros': {'usuarios': args.usuarios, 'apostas': args.apostas}, 'resultados': resultados}
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as arquivo:
+            gravada = json.load(arquivo)
+        if (gravada.get('python'), gravada.get('plataforma')) == (dados['python'], dados['plataforma']):
+            baseline = gravada['resultados']
+        else:
+            print(f"Baseline gravada em outra máquina ({gravada.get('plataforma')}, Python {gravada.get('python')}); "
+                  f"comparação ignorada.\n")
+    linhas, regressoes = comparar(resultados, baseline, args.tolerancia)
+    print("\n".join(linhas))
+    partida_ms = resultados['purobet admin odds (partida a frio)']['mediana_us'] / 1000
+    interpretador_ms = resultados['python -c pass (partida a frio)']['mediana_us'] / 1000
+    print(f"\nPartida a frio da linha de comando: {partida_ms:.0f} ms, dos quais {interpretador_ms:.0f} ms são do "
+          f"interpretador (limite: {args.limite_partida_ms:.0f} ms).")
+
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nBaseline salva em {args.baseline}.")
+    elif regressoes or partida_ms > args.limite_partida_ms:
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    principal()
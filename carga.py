@@ -0,0 +1,281 @@
+# ===================================================================================
+# PUROBET - GERADOR DE CARGA
+# Simula jogadores virtuais apostando direto na camada de dados do main.py, espalhados
+# por várias threads e processos, para medir quantas apostas por segundo o SQLite aguenta.
+#
+# Exemplo:
+#    python carga.py --jogadores 100 --processos 4 --threads 8 --taxa 500 --duracao 30
+#    python carga.py --jogadores 100 --processos 4 --threads 8 --shards 4
+#
+# Ao final mostra a vazão, a latência p50/p95/p99 de cada operação, quantas vezes cada uma
+# precisou ser repetida por causa de "database is locked" e confere se os saldos batem.
+# ===================================================================================
+
+import argparse
+import json
+import multiprocessing
+import random
+import secrets
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+import main
+
+SALDO_INICIAL = 1000
+MAXIMO_TENTATIVAS = 50
+
+class Medidor:
+    """Acumula latências, repetições por lock e erros de cada operação de uma thread."""
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.repeticoes = defaultdict(int)
+        self.erros = defaultdict(int)
+
+    def executar(self, nome, funcao, *args):
+        """Chama a função medindo a latência e repetindo enquanto o banco estiver travado."""
+        for tentativa in range(MAXIMO_TENTATIVAS):
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(*args)
+            except sqlite3.OperationalError as erro:
+                if 'locked' not in str(erro) and 'busy' not in str(erro):
+                    raise
+                self.repeticoes[nome] += 1
+                time.sleep(random.uniform(0, 0.002 * (tentativa + 1)))
+                continue
+            self.latencias[nome].append(time.perf_counter() - inicio)
+            return resultado
+        self.erros[nome] += 1
+        raise RuntimeError(f"{nome}: banco travado após {MAXIMO_TENTATIVAS} tentativas")
+
+    def juntar(self, outro):
+        for nome, valores in outro['latencias'].items(): self.latencias[nome].extend(valores)
+        for nome, valor in outro['repeticoes'].items(): self.repeticoes[nome] += valor
+        for nome, valor in outro['erros'].items(): self.erros[nome] += valor
+
+    def exportar(self):
+        return {'latencias': dict(self.latencias), 'repeticoes': dict(self.repeticoes), 'erros': dict(self.erros)}
+
+# --- Rodadas de cada jogo, feitas só com a camada de dados ---
+
+def rodada_blackjack(medidor, usuario, aposta):
+    if not medidor.executar('debitar_aposta', main.debitar_aposta, usuario, aposta):
+        return None
+    baralho = main.criar_baralho()
+    mao_jogador, mao_dealer = [baralho.pop(), baralho.pop()], [baralho.pop(), baralho.pop()]
+    while main.valor_mao(mao_jogador) < 17:
+        mao_jogador.append(baralho.pop())
+    if main.valor_mao(mao_jogador) <= 21:
+        main.jogar_dealer(mao_dealer, baralho)
+    _, ganhos = main.resultado_blackjack(mao_jogador, mao_dealer, aposta)
+    medidor.executar('liquidar_apostas_lote', main.liquidar_apostas_lote, "Blackjack", [(usuario, aposta, ganhos)])
+    return ganhos
+
+def rodada_roleta(medidor, usuario, aposta):
+    if not medidor.executar('debitar_aposta', main.debitar_aposta, usuario, aposta):
+        return None
+    apostas = [{'tipo': 'color', 'valor': random.choice(['red', 'black']), 'quantia': aposta}]
+    pagamento = medidor.executar('obter_configuracao_jogo', main.obter_configuracao_jogo, 'pagamento_roleta_numero')
+    ganhos = main.calcular_ganhos_roleta(apostas, main.sortear_numero_roleta(), pagamento)
+    medidor.executar('liquidar_apostas_lote', main.liquidar_apostas_lote, "Roleta", [(usuario, aposta, ganhos)])
+    return ganhos
+
+def rodada_crash(medidor, usuario, aposta):
+    if not medidor.executar('debitar_aposta', main.debitar_aposta, usuario, aposta):
+        return None
+    alvo = random.choice([1.5, 2.0, 3.0])
+    ganhos = aposta * alvo if alvo < main.sortear_ponto_crash() else 0
+    medidor.executar('liquidar_apostas_lote', main.liquidar_apostas_lote, "Crash", [(usuario, aposta, ganhos)])
+    return ganhos
+
+RODADAS = {'blackjack': rodada_blackjack, 'roleta': rodada_roleta, 'crash': rodada_crash}
+
+def ler_mix(texto):
+    """Converte 'blackjack=2,roleta=1' em ({jogo: peso}), validando os nomes dos jogos."""
+    mix = {}
+    for parte in texto.split(','):
+        jogo, _, peso = parte.partition('=')
+        if jogo.strip() not in RODADAS:
+            raise argparse.ArgumentTypeError(f"Jogo desconhecido: {jogo}")
+        mix[jogo.strip()] = float(peso or 1)
+    return mix
+
+# --- Trabalhadores ---
+
+def thread_jogadores(jogadores, args, intervalo, prazo, medidor, saldos, contadores):
+    """Joga rodadas para os jogadores desta thread, em rodízio, no ritmo pedido."""
+    jogos, pesos = list(args.mix), list(args.mix.values())
+    proxima = time.perf_counter()
+    indice = 0
+    while time.perf_counter() < prazo:
+        if intervalo:
+            espera = proxima - time.perf_counter()
+            if espera > 0: time.sleep(espera)
+            proxima += intervalo
+        usuario = jogadores[indice % len(jogadores)]
+        indice += 1
+        aposta = random.randint(1, args.aposta_maxima)
+        try:
+            if random.random() < args.consultas:
+                medidor.executar('obter_dados_usuario', main.obter_dados_usuario, usuario)
+            ganhos = RODADAS[random.choices(jogos, pesos)[0]](medidor, usuario, aposta)
+        except RuntimeError:
+            contadores['falhas'] += 1
+            continue
+        if ganhos is None:
+            contadores['sem_saldo'] += 1
+            continue
+        saldos[usuario] += ganhos - aposta
+        contadores['rodadas'] += 1
+
+def executar_processo(indice_processo, args):
+    """Registra os jogadores deste processo e roda as threads até o fim da duração."""
+    main.ARQUIVO_BD = args.bd
+    main.TIMEOUT_BD = args.timeout_bd
+    main.ativar_shards(args.shards)
+    medidor = Medidor()
+    jogadores_por_thread = [[] for _ in range(args.threads)]
+    for j in range(indice_processo, args.jogadores, args.processos):
+        usuario = f"carga_{args.execucao}_{j}"
+        medidor.executar('adicionar_usuario', main.adicionar_usuario, usuario, "senha", SALDO_INICIAL, f"{args.execucao}{j}")
+        jogadores_por_thread[j // args.processos % args.threads].append(usuario)
+    jogadores_por_thread = [j for j in jogadores_por_thread if j]
+
+    args.barreira.wait()
+    prazo = time.perf_counter() + args.duracao
+    total_threads = args.processos * args.threads
+    intervalo = total_threads / args.taxa if args.taxa else 0
+    saldos = defaultdict(float)
+    resultados = []
+    threads = []
+    for jogadores in jogadores_por_thread:
+        medidor_thread, contadores = Medidor(), defaultdict(int)
+        resultados.append((medidor_thread, contadores))
+        thread = threading.Thread(target=thread_jogadores, args=(jogadores, args, intervalo, prazo, medidor_thread, saldos, contadores))
+        thread.start()
+        threads.append(thread)
+    for thread in threads: thread.join()
+
+    contadores_processo = defaultdict(int)
+    for medidor_thread, contadores in resultados:
+        medidor.juntar(medidor_thread.exportar())
+        for nome, valor in contadores.items(): contadores_processo[nome] += valor
+    saldos_esperados = {u: SALDO_INICIAL + saldos[u] for j in jogadores_por_thread for u in j}
+    return medidor.exportar(), dict(contadores_processo), saldos_esperados
+
+# --- Relatório ---
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados: return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+def verificar_consistencia(saldos_esperados):
+    """
+    Confere, para cada jogador, o saldo no banco contra o saldo acompanhado pelo gerador e
+    contra a soma dos logs (transações + resultados das apostas), no shard de cada jogador.
+    """
+    conexoes = {}
+    divergencias = []
+    for usuario, esperado in saldos_esperados.items():
+        arquivo = main.arquivo_bd_atual(usuario)
+        conexao = conexoes.get(arquivo) or conexoes.setdefault(arquivo, sqlite3.connect(arquivo))
+        saldo = conexao.execute("SELECT saldo FROM usuarios WHERE nome_usuario = ?", (usuario,)).fetchone()[0]
+        pelos_logs = conexao.execute(
+            "SELECT (SELECT COALESCE(SUM(quantia), 0) FROM logs_transacoes WHERE nome_usuario = ?)"
+            " + (SELECT COALESCE(SUM(resultado), 0) FROM logs_apostas WHERE nome_usuario = ?)", (usuario, usuario)).fetchone()[0]
+        if abs(saldo - esperado) > 1e-6 or abs(saldo - pelos_logs) > 1e-6:
+            divergencias.append({'usuario': usuario, 'saldo': saldo, 'esperado': esperado, 'pelos_logs': pelos_logs})
+    for conexao in conexoes.values():
+        conexao.close()
+    return divergencias
+
+def montar_relatorio(medidor, contadores, duracao, divergencias, total_jogadores):
+    operacoes = {}
+    for nome, valores in sorted(medidor.latencias.items()):
+        valores.sort()
+        operacoes[nome] = {
+            'chamadas': len(valores),
+            'p50_ms': percentil(valores, 50) * 1000,
+            'p95_ms': percentil(valores, 95) * 1000,
+            'p99_ms': percentil(valores, 99) * 1000,
+            'repeticoes_lock': medidor.repeticoes.get(nome, 0),
+            'erros': medidor.erros.get(nome, 0),
+        }
+    chamadas_jogo = sum(o['chamadas'] for n, o in operacoes.items() if n != 'adicionar_usuario')
+    return {
+        'duracao_s': duracao,
+        'rodadas': contadores.get('rodadas', 0),
+        'rodadas_por_s': contadores.get('rodadas', 0) / duracao,
+        'operacoes_por_s': chamadas_jogo / duracao,
+        'rodadas_sem_saldo': contadores.get('sem_saldo', 0),
+        'rodadas_com_falha': contadores.get('falhas', 0),
+        'operacoes': operacoes,
+        'jogadores_verificados': total_jogadores,
+        'divergencias': divergencias,
+    }
+
+def imprimir_relatorio(relatorio):
+    print(f"\nRodadas: {relatorio['rodadas']} em {relatorio['duracao_s']:.1f}s "
+          f"({relatorio['rodadas_por_s']:.1f} rodadas/s, {relatorio['operacoes_por_s']:.1f} operações/s)")
+    print(f"Sem saldo: {relatorio['rodadas_sem_saldo']} | Falhas por lock: {relatorio['rodadas_com_falha']}\n")
+    print(f"{'Operação':<26}{'Chamadas':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'Repetições':>12}")
+    for nome, op in relatorio['operacoes'].items():
+        print(f"{nome:<26}{op['chamadas']:>10}{op['p50_ms']:>11.2f}{op['p95_ms']:>11.2f}{op['p99_ms']:>11.2f}{op['repeticoes_lock']:>12}")
+    divergencias = relatorio['divergencias']
+    print(f"\nConsistência: {relatorio['jogadores_verificados'] - len(divergencias)}/{relatorio['jogadores_verificados']} saldos conferem.")
+    for d in divergencias[:10]:
+        print(f"  {d['usuario']}: banco ${d['saldo']:.2f}, esperado ${d['esperado']:.2f}, pelos logs ${d['pelos_logs']:.2f}")
+
+def principal():
+    parser = argparse.ArgumentParser(description="Gerador de carga do PUROBET.")
+    parser.add_argument('--bd', default="carga.db", help="Arquivo do banco usado no teste (padrão: carga.db).")
+    parser.add_argument('--jogadores', type=int, default=50)
+    parser.add_argument('--processos', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help="Threads por processo.")
+    parser.add_argument('--taxa', type=float, default=0, help="Rodadas por segundo no total (0 = sem limite).")
+    parser.add_argument('--duracao', type=float, default=10, help="Duração do teste em segundos.")
+    parser.add_argument('--mix', type=ler_mix, default=ler_mix("blackjack=1,roleta=1,crash=1"), help="Pesos dos jogos, ex.: blackjack=2,roleta=1,crash=1")
+    parser.add_argument('--consultas', type=float, default=0.2, help="Fração das rodadas precedidas de uma consulta de saldo.")
+    parser.add_argument('--aposta-maxima', type=int, default=20)
+    parser.add_argument('--timeout-bd', type=float, default=0.05, help="Espera por lock antes de contar uma repetição.")
+    parser.add_argument('--wal', action='store_true', help="Ativa o journal_mode=WAL no banco do teste.")
+    parser.add_argument('--shards', type=int, default=0, help="Separa os jogadores em N arquivos de banco, cada um com o seu lock de escrita.")
+    parser.add_argument('--json', help="Salva o relatório neste arquivo.")
+    args = parser.parse_args()
+
+    main.ARQUIVO_BD = args.bd
+    main.inicializar_banco_de_dados()
+    main.ativar_shards(args.shards)
+    if args.wal:
+        for arquivo in [args.bd] + [main.caminho_shard(i) for i in range(args.shards)]:
+            with sqlite3.connect(arquivo) as conexao: conexao.execute("PRAGMA journal_mode=WAL")
+    args.execucao = secrets.token_hex(3)
+
+    gerenciador = multiprocessing.Manager()
+    args.barreira = gerenciador.Barrier(args.processos + 1)
+    print(f"Registrando {args.jogadores} jogadores em {args.processos} processo(s) x {args.threads} thread(s)"
+          f"{f' e {args.shards} shard(s)' if args.shards else ''}...")
+    with multiprocessing.Pool(args.processos) as pool:
+        pendentes = [pool.apply_async(executar_processo, (i, args)) for i in range(args.processos)]
+        args.barreira.wait()
+        inicio = time.perf_counter()
+        resultados = [p.get() for p in pendentes]
+        duracao = time.perf_counter() - inicio
+
+    medidor, contadores, saldos_esperados = Medidor(), defaultdict(int), {}
+    for exportado, contadores_processo, saldos in resultados:
+        medidor.juntar(exportado)
+        for nome, valor in contadores_processo.items(): contadores[nome] += valor
+        saldos_esperados.update(saldos)
+
+    relatorio = montar_relatorio(medidor, contadores, duracao, verificar_consistencia(saldos_esperados), len(saldos_esperados))
+    imprimir_relatorio(relatorio)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    principal()
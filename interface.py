@@ -0,0 +1,1360 @@
+# ===================================================================================
+# PUROBET - INTERFACE GRÁFICA
+# Telas do cassino em customtkinter. O main.py só carrega este arquivo quando a janela é
+# aberta: a linha de comando e a API não importam o Tk nem precisam de um display.
+# ===================================================================================
+
+import customtkinter as ctk
+import random
+import math
+import time
+import os
+import queue
+import threading
+from datetime import datetime, timedelta
+from tkinter import Canvas
+from PIL import Image, ImageTk
+
+from main import (
+    BONUS_INDICACAO, CORES_ROLETA, ESTRATEGIAS_BLACKJACK, METRICAS, METRICAS_AGREGADAS, SERVICO_AUTENTICACAO, SORTEIO,
+    TABELAS_LOG, USUARIO_ADMIN, ExportadorPrometheus, MotorSaqueAutomatico, ObservadorAlteracoes, acoes_crash,
+    ajustar_saldos_lote, atualizar_agregados, atualizar_saldo, autenticar_admin, calcular_ganhos_roleta,
+    codificar_apostas_roleta, criar_baralho, debitar_aposta, definir_configuracao_jogo, deletar_usuario_bd,
+    descrever_estado_backup, descrever_resumo_automatico, jogar_automatico, jogar_dealer, ler_registros,
+    liquidar_apostas_lote, medir, movimentar_saldo, obter_arvore_indicacoes, obter_configuracao_jogo,
+    obter_dados_usuario, obter_logs, obter_resumo_indicacoes, obter_resumo_usuarios, obter_serie_agregada,
+    obter_todos_usuarios, resultado_blackjack, sortear_rodada, valor_carta, valor_mao,
+)
+
+# --- SEÇÃO 2: CARREGADOR DE IMAGENS E WIDGETS CUSTOMIZADOS ---
+
+class CarregadorImagens:
+    """
+    Classe Singleton para carregar e armazenar em cache as imagens, otimizando a performance.
+    """
+    _instancia = None
+    def __new__(cls, *args, **kwargs):
+        if not cls._instancia:
+            cls._instancia = super(CarregadorImagens, cls).__new__(cls)
+            cls._instancia.cache_ctk = {}
+            cls._instancia.cache_photo = {}
+        return cls._instancia
+
+    def obter_imagem_ctk(self, nome_carta="back"):
+        """Retorna uma imagem no formato CTkImage."""
+        if nome_carta in self.cache_ctk:
+            return self.cache_ctk[nome_carta]
+
+        mapa_ranks = {'A': 'ace', 'K': 'king', 'Q': 'queen', 'J': 'jack', 'T': '10'}
+
+        if nome_carta == "back":
+            caminho_arquivo = os.path.join("cards", "back.png")
+        else:
+            naipe, rank = nome_carta.split('_')
+            rank_str = mapa_ranks.get(rank, rank)
+            nome_arquivo = f"{rank_str}_of_{naipe}.png"
+            caminho_arquivo = os.path.join("cards", nome_arquivo)
+
+        try:
+            imagem = Image.open(caminho_arquivo)
+            imagem = imagem.resize((70, 100), Image.LANCZOS)
+            imagem_ctk = ctk.CTkImage(light_image=imagem, dark_image=imagem, size=(70, 100))
+            self.cache_ctk[nome_carta] = imagem_ctk
+            return imagem_ctk
+        except FileNotFoundError:
+            print(f"ERRO: Imagem não encontrada em {caminho_arquivo}.")
+            return None
+
+    def obter_imagem_photo(self, nome, tamanho=(80, 50)):
+        """Retorna uma imagem no formato PhotoImage, para uso no Canvas."""
+        if nome in self.cache_photo:
+            return self.cache_photo[nome]
+
+        caminho_arquivo = os.path.join("cards", f"{nome}.png")
+        try:
+            imagem = Image.open(caminho_arquivo).resize(tamanho, Image.LANCZOS)
+            imagem_photo = ImageTk.PhotoImage(imagem)
+            self.cache_photo[nome] = imagem_photo
+            return imagem_photo
+        except FileNotFoundError:
+            print(f"ERRO: Imagem '{nome}.png' não encontrada.")
+            return None
+
+class CaixaMensagem(ctk.CTkToplevel):
+    """Janela de mensagem customizada."""
+    def __init__(self, parent, titulo="Mensagem", mensagem="", altura=150):
+        super().__init__(parent)
+        self.title(titulo)
+        self.geometry(f"350x{altura}")
+        self.transient(parent)
+        self.grab_set()
+        self.resizable(False, False)
+        ctk.CTkLabel(self, text=mensagem, wraplength=320, font=ctk.CTkFont(size=14)).pack(pady=20, padx=15, expand=True, fill="both")
+        ctk.CTkButton(self, text="OK", command=self.destroy, width=100).pack(pady=10)
+        self.after(100, self.lift)
+
+class CaixaDialogo(ctk.CTkToplevel):
+    """Janela de entrada de dados customizada."""
+    def __init__(self, parent, titulo="Entrada", texto="Insira um valor:"):
+        super().__init__(parent)
+        self.title(titulo)
+        self.geometry("300x150")
+        self.transient(parent)
+        self.grab_set()
+        self._resultado = None
+        ctk.CTkLabel(self, text=texto).pack(pady=10, padx=10)
+        self.entrada = ctk.CTkEntry(self, width=250)
+        self.entrada.pack(pady=5, padx=10)
+        self.entrada.focus()
+        frame_botoes = ctk.CTkFrame(self, fg_color="transparent")
+        frame_botoes.pack(pady=10)
+        ctk.CTkButton(frame_botoes, text="OK", command=self._evento_ok).pack(side="left", padx=10)
+        ctk.CTkButton(frame_botoes, text="Cancelar", command=self._evento_cancelar, fg_color="#D32F2F", hover_color="#B71C1C").pack(side="left", padx=10)
+        self.protocol("WM_DELETE_WINDOW", self._evento_cancelar)
+        self.entrada.bind("<Return>", self._evento_ok)
+        self.after(100, self.lift)
+
+    def _evento_ok(self, event=None):
+        self._resultado = self.entrada.get()
+        self.destroy()
+
+    def _evento_cancelar(self):
+        self._resultado = None
+        self.destroy()
+
+    def obter_entrada(self):
+        self.wait_window()
+        try:
+            return int(self._resultado) if self._resultado else None
+        except (ValueError, TypeError):
+            return self._resultado
+
+class CaixaJogoAutomatico(ctk.CTkToplevel):
+    """Janela com os parâmetros de uma sessão automática: rodadas, paradas e, no Blackjack, a estratégia."""
+    CAMPOS = (('rodadas', "Rodadas", "100"), ('limite_perda', "Limite de perda ($)", ""),
+              ('meta_ganho', "Meta de ganho ($)", ""), ('saldo_minimo', "Saldo mínimo ($)", "0"))
+
+    def __init__(self, parent, estrategias=None):
+        super().__init__(parent)
+        self.title("Jogo Automático")
+        self.geometry("320x300")
+        self.transient(parent)
+        self.grab_set()
+        self._resultado = None
+        self.entradas = {}
+        for linha, (campo, rotulo, padrao) in enumerate(self.CAMPOS):
+            ctk.CTkLabel(self, text=rotulo).grid(row=linha, column=0, sticky="w", padx=10, pady=5)
+            self.entradas[campo] = ctk.CTkEntry(self, width=120)
+            self.entradas[campo].insert(0, padrao)
+            self.entradas[campo].grid(row=linha, column=1, padx=10, pady=5)
+        self.menu_estrategia = None
+        if estrategias:
+            ctk.CTkLabel(self, text="Estratégia").grid(row=len(self.CAMPOS), column=0, sticky="w", padx=10, pady=5)
+            self.menu_estrategia = ctk.CTkOptionMenu(self, values=list(estrategias), width=120)
+            self.menu_estrategia.grid(row=len(self.CAMPOS), column=1, padx=10, pady=5)
+        self.label_erro = ctk.CTkLabel(self, text="", text_color="#D32F2F")
+        self.label_erro.grid(row=len(self.CAMPOS) + 1, column=0, columnspan=2)
+        frame_botoes = ctk.CTkFrame(self, fg_color="transparent")
+        frame_botoes.grid(row=len(self.CAMPOS) + 2, column=0, columnspan=2, pady=10)
+        ctk.CTkButton(frame_botoes, text="Jogar", command=self._evento_ok).pack(side="left", padx=10)
+        ctk.CTkButton(frame_botoes, text="Cancelar", command=self.destroy, fg_color="#D32F2F", hover_color="#B71C1C").pack(side="left", padx=10)
+        self.after(100, self.lift)
+
+    def _evento_ok(self, event=None):
+        try:
+            valores = {campo: float(entrada.get().replace(',', '.')) if entrada.get().strip() else None
+                       for campo, entrada in self.entradas.items()}
+        except ValueError:
+            self.label_erro.configure(text="Use apenas números.")
+            return
+        if not valores['rodadas'] or valores['rodadas'] < 1:
+            self.label_erro.configure(text="Informe quantas rodadas jogar.")
+            return
+        valores['rodadas'] = int(valores['rodadas'])
+        if self.menu_estrategia:
+            valores['estrategia'] = self.menu_estrategia.get()
+        self._resultado = valores
+        self.destroy()
+
+    def obter_parametros(self):
+        self.wait_window()
+        return self._resultado
+
+# --- SEÇÃO 3: CONTROLADOR PRINCIPAL DA APLICAÇÃO ---
+
+class AppPurobet(ctk.CTk):
+    """
+    Classe principal da aplicação, que gerencia a janela e a transição entre telas.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("PUROBET Cassino")
+        self.geometry("450x800")
+        self.minsize(420, 750)
+        self.usuario_atual = None
+        self.tela_atual = None
+        self.carregador_imagens = CarregadorImagens()
+
+        container = ctk.CTkFrame(self)
+        container.pack(side="top", fill="both", expand=True)
+        container.grid_rowconfigure(0, weight=1)
+        container.grid_columnconfigure(0, weight=1)
+
+        self.telas = {}
+        for Tela in (TelaInicial, TelaLogin, TelaRegistro, TelaPrincipal, TelaAdmin, JogoBlackjack, JogoRoleta, JogoCrash):
+            tela = Tela(container, self)
+            self.telas[Tela] = tela
+            tela.grid(row=0, column=0, sticky="nsew")
+
+        self.mostrar_tela(TelaInicial)
+
+        # O observador consulta o banco na thread dele; a fila leva o que mudou para a thread do Tk.
+        self.fila_alteracoes = queue.Queue()
+        self.observador = ObservadorAlteracoes()
+        self.observador.inscrever(self.fila_alteracoes.put)
+        self.observador.start()
+        self.despachar_alteracoes()
+
+    def destroy(self):
+        self.observador.encerrar()
+        super().destroy()
+
+    def despachar_alteracoes(self):
+        """Repassa à tela visível o que mudou no banco, nesta ou em outra janela ou processo."""
+        alteracoes = set()
+        while not self.fila_alteracoes.empty():
+            alteracoes |= self.fila_alteracoes.get_nowait()
+        if alteracoes and hasattr(self.tela_atual, 'ao_alterar'):
+            self.tela_atual.ao_alterar(alteracoes)
+        self.after(100, self.despachar_alteracoes)
+
+    def mostrar_tela(self, classe_tela, dados=None):
+        """Traz uma tela para a frente, tornando-a visível."""
+        for tela in self.telas.values():
+            if tela.winfo_ismapped() and hasattr(tela, 'ao_esconder'):
+                tela.ao_esconder()
+
+        tela = self.telas[classe_tela]
+        if hasattr(tela, 'ao_mostrar'):
+            tela.ao_mostrar(dados)
+        tela.tkraise()
+        self.tela_atual = tela
+
+    def logout(self):
+        """Faz o logout do usuário e volta para a tela inicial."""
+        self.usuario_atual = None
+        self.mostrar_tela(TelaInicial)
+
+    def obter_saldo_usuario(self):
+        """Busca o saldo do usuário atual no banco de dados."""
+        if not self.usuario_atual: return 0
+        dados = obter_dados_usuario(self.usuario_atual)
+        return dados['saldo'] if dados else 0
+
+    def atualizar_saldo_usuario_bd(self, mudanca_quantia, nome_jogo=None, valor_aposta=None, rodada=None):
+        """
+        Atualiza o saldo no banco de dados. Com 'nome_jogo' e 'valor_aposta', a mudança é o pagamento
+        de uma aposta já debitada, e o log da aposta é gravado na mesma transação, assim como a
+        'rodada' (semente, cadeia, ações), quando informada.
+        """
+        if self.usuario_atual:
+            if nome_jogo and valor_aposta is not None:
+                semente, cadeia, acoes = rodada or (None, None, "")
+                liquidar_apostas_lote(nome_jogo, [(self.usuario_atual, valor_aposta, mudanca_quantia, acoes)], semente, cadeia)
+            else:
+                atualizar_saldo(self.usuario_atual, mudanca_quantia)
+
+    def debitar_aposta_usuario(self, valor_aposta, nome_jogo):
+        """Debita uma aposta do usuário atual. Retorna False (e avisa) se o saldo não cobrir."""
+        if self.usuario_atual and debitar_aposta(self.usuario_atual, valor_aposta, nome_jogo):
+            return True
+        self.exibir_mensagem("Erro", "Saldo insuficiente.")
+        return False
+
+    def exibir_mensagem(self, titulo, mensagem):
+        """Mostra uma janela de mensagem customizada."""
+        CaixaMensagem(self, titulo=titulo, mensagem=mensagem)
+
+# --- SEÇÃO 4: TELAS PRINCIPAIS (HUB, LOGIN, ADMIN, ETC) ---
+
+class TelaInicial(ctk.CTkFrame):
+    """Tela de boas-vindas com opções de Login e Registro."""
+    def __init__(self, parent, controlador):
+        super().__init__(parent)
+        frame_central = ctk.CTkFrame(self, fg_color="transparent")
+        frame_central.place(relx=0.5, rely=0.5, anchor="center")
+        ctk.CTkLabel(frame_central, text="PUROBET", font=ctk.CTkFont(size=50, weight="bold")).pack(pady=(0, 10))
+        ctk.CTkLabel(frame_central, text="O Cassino Fictício Mais Confiável", font=ctk.CTkFont(size=14)).pack(pady=(0, 40))
+        ctk.CTkButton(frame_central, text="Login", font=ctk.CTkFont(size=16, weight="bold"), height=40, command=lambda: controlador.mostrar_tela(TelaLogin)).pack(pady=10, fill="x")
+        ctk.CTkButton(frame_central, text="Registrar", font=ctk.CTkFont(size=16, weight="bold"), height=40, fg_color="#10a37f", hover_color="#0e8e6f", command=lambda: controlador.mostrar_tela(TelaRegistro)).pack(pady=10, fill="x")
+
+class TelaLogin(ctk.CTkFrame):
+    """Tela de Login para usuários e administrador."""
+    def __init__(self, parent, controlador):
+        super().__init__(parent)
+        self.controlador = controlador
+        frame_central = ctk.CTkFrame(self, width=300)
+        frame_central.place(relx=0.5, rely=0.5, anchor="center")
+        ctk.CTkLabel(frame_central, text="Login", font=ctk.CTkFont(size=28, weight="bold")).pack(pady=20)
+        self.entrada_usuario = ctk.CTkEntry(frame_central, placeholder_text="Usuário", width=250, height=35)
+        self.entrada_usuario.pack(pady=10, padx=20)
+        self.entrada_senha = ctk.CTkEntry(frame_central, placeholder_text="Senha", show="*", width=250, height=35)
+        self.entrada_senha.pack(pady=10, padx=20)
+        self.botao_entrar = ctk.CTkButton(frame_central, text="Entrar", height=40, command=self.login)
+        self.botao_entrar.pack(pady=20, padx=20, fill="x")
+        ctk.CTkButton(frame_central, text="Voltar", height=30, fg_color="transparent", border_width=1, command=lambda: controlador.mostrar_tela(TelaInicial)).pack(pady=(0,20), padx=20, fill="x")
+
+    @medir
+    def login(self):
+        """Verifica as credenciais e direciona o usuário."""
+        usuario, senha = self.entrada_usuario.get(), self.entrada_senha.get()
+        if autenticar_admin(usuario, senha):
+            self.controlador.usuario_atual = USUARIO_ADMIN
+            self.controlador.mostrar_tela(TelaAdmin)
+        else:
+            # O scrypt roda no pool do serviço de autenticação; a tela só consulta o resultado.
+            self.botao_entrar.configure(state="disabled", text="Verificando...")
+            self.aguardar_autenticacao(usuario, SERVICO_AUTENTICACAO.autenticar(usuario, senha))
+
+    def aguardar_autenticacao(self, usuario, futuro):
+        if not futuro.done():
+            self.after(20, self.aguardar_autenticacao, usuario, futuro); return
+        self.botao_entrar.configure(state="normal", text="Entrar")
+        if futuro.result():
+            self.controlador.usuario_atual = usuario
+            self.controlador.mostrar_tela(TelaPrincipal)
+        else:
+            self.controlador.exibir_mensagem("Erro", "Usuário ou senha inválidos.")
+
+class TelaRegistro(ctk.CTkFrame):
+    """Tela de Registro de novos usuários."""
+    def __init__(self, parent, controlador):
+        super().__init__(parent)
+        self.controlador = controlador
+        frame_central = ctk.CTkFrame(self, width=300)
+        frame_central.place(relx=0.5, rely=0.5, anchor="center")
+        ctk.CTkLabel(frame_central, text="Criar Conta", font=ctk.CTkFont(size=28, weight="bold")).pack(pady=20)
+        self.entrada_usuario = ctk.CTkEntry(frame_central, placeholder_text="Usuário", width=250, height=35)
+        self.entrada_usuario.pack(pady=10, padx=20)
+        self.entrada_senha = ctk.CTkEntry(frame_central, placeholder_text="Senha", show="*", width=250, height=35)
+        self.entrada_senha.pack(pady=10, padx=20)
+        self.entrada_ref = ctk.CTkEntry(frame_central, placeholder_text="Código de Convite (Opcional)", width=250, height=35)
+        self.entrada_ref.pack(pady=10, padx=20)
+        self.botao_registrar = ctk.CTkButton(frame_central, text="Registrar", height=40, fg_color="#10a37f", hover_color="#0e8e6f", command=self.registrar)
+        self.botao_registrar.pack(pady=20, padx=20, fill="x")
+        ctk.CTkButton(frame_central, text="Voltar", height=30, fg_color="transparent", border_width=1, command=lambda: controlador.mostrar_tela(TelaInicial)).pack(pady=(0, 20), padx=20, fill="x")
+
+    @medir
+    def registrar(self):
+        """Processa o registro de um novo usuário."""
+        usuario, senha, codigo_ref = self.entrada_usuario.get(), self.entrada_senha.get(), self.entrada_ref.get()
+        if not usuario or not senha:
+            self.controlador.exibir_mensagem("Erro", "Preencha usuário e senha."); return
+        # O hash da senha (scrypt) roda no pool do serviço de autenticação, como no login.
+        self.botao_registrar.configure(state="disabled", text="Registrando...")
+        self.aguardar_registro(usuario, codigo_ref, SERVICO_AUTENTICACAO.registrar(usuario, senha, codigo_ref))
+
+    def aguardar_registro(self, usuario, codigo_ref, futuro):
+        if not futuro.done():
+            self.after(20, self.aguardar_registro, usuario, codigo_ref, futuro); return
+        self.botao_registrar.configure(state="normal", text="Registrar")
+        registrado, indicador = futuro.result()
+        if not registrado:
+            self.controlador.exibir_mensagem("Erro", "Este nome de usuário já existe."); return
+
+        if indicador:
+            self.controlador.exibir_mensagem("Bônus!", f"O usuário {indicador} recebeu ${BONUS_INDICACAO} por sua indicação!")
+        elif codigo_ref:
+            self.controlador.exibir_mensagem("Aviso", "Código de convite inválido.")
+
+        self.controlador.exibir_mensagem("Sucesso", f"Usuário {usuario} registrado!"); self.controlador.mostrar_tela(TelaLogin)
+
+class TelaPrincipal(ctk.CTkFrame):
+    """O menu principal do usuário, onde ele escolhe o jogo."""
+    def __init__(self, parent, controlador):
+        super().__init__(parent, fg_color="#242424")
+        self.controlador = controlador
+        frame_superior = ctk.CTkFrame(self, corner_radius=0)
+        frame_superior.pack(fill="x")
+        self.label_boas_vindas = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=20, weight="bold"))
+        self.label_boas_vindas.pack(pady=(20, 5), padx=20, anchor="w")
+        self.label_saldo = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=16))
+        self.label_saldo.pack(pady=(0, 10), padx=20, anchor="w")
+        self.label_codigo_ref = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=12, slant="italic"), text_color="gray")
+        self.label_codigo_ref.pack(pady=(0, 20), padx=20, anchor="w")
+        frame_jogos = ctk.CTkScrollableFrame(self, fg_color="transparent")
+        frame_jogos.pack(pady=10, padx=15, fill="both", expand=True)
+        ctk.CTkLabel(frame_jogos, text="Escolha um Jogo", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=10)
+        botoes_jogo = [("🃏 Blackjack", JogoBlackjack, "#c0392b"), ("🌀 Roleta", JogoRoleta, "#8e44ad"), ("✈️ Aviãozinho (Crash)", JogoCrash, "#f39c12")]
+        for nome, tela, cor in botoes_jogo:
+            ctk.CTkButton(frame_jogos, text=nome, font=ctk.CTkFont(size=16), height=60, fg_color=cor, hover_color=self.escurecer_cor(cor), command=lambda t=tela: controlador.mostrar_tela(t)).pack(pady=10, fill="x")
+        frame_acoes = ctk.CTkFrame(self, fg_color="transparent")
+        frame_acoes.pack(pady=10, padx=20, fill="x")
+        ctk.CTkButton(frame_acoes, text="💰 Adicionar Saldo", fg_color="#1abc9c", hover_color="#16a085", command=self.adicionar_saldo).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(frame_acoes, text="Sair", fg_color="#e67e22", hover_color="#d35400", command=controlador.logout).pack(side="right", expand=True, padx=5)
+
+    def ao_mostrar(self, dados=None): self.atualizar_info()
+    def ao_alterar(self, alteracoes):
+        if ('saldo', self.controlador.usuario_atual) in alteracoes:
+            self.atualizar_info()
+    def escurecer_cor(self, cor_hex):
+        r,g,b = int(cor_hex[1:3],16), int(cor_hex[3:5],16), int(cor_hex[5:7],16)
+        return f"#{max(0,r-20):02x}{max(0,g-20):02x}{max(0,b-20):02x}"
+    @medir
+    def atualizar_info(self):
+        """Busca os dados do usuário e atualiza os textos na tela."""
+        dados_usuario = obter_dados_usuario(self.controlador.usuario_atual)
+        if dados_usuario:
+            self.label_boas_vindas.configure(text=f"Olá, {self.controlador.usuario_atual}!")
+            self.label_saldo.configure(text=f"Saldo: ${dados_usuario['saldo']:,.2f}", text_color="#4CAF50")
+            self.label_codigo_ref.configure(text=f"Seu código: {dados_usuario['codigo_referencia']}")
+
+    def adicionar_saldo(self):
+        """Adiciona saldo fictício à conta do usuário."""
+        quantia = CaixaDialogo(self, titulo="Adicionar Saldo", texto="Quanto saldo fictício deseja adicionar?").obter_entrada()
+        if quantia and quantia > 0:
+            movimentar_saldo(self.controlador.usuario_atual, quantia, 'deposito')
+            self.controlador.exibir_mensagem("Sucesso", f"${quantia} adicionados!")
+            self.atualizar_info()
+
+class TelaAdmin(ctk.CTkFrame):
+    """Painel de controle do administrador."""
+    # Período do gráfico de tendências: (duração, granularidade dos agregados usada).
+    PERIODOS_GRAFICO = {
+        "Última hora": (timedelta(hours=1), 'minuto'),
+        "Últimas 24h": (timedelta(days=1), 'hora'),
+        "Últimos 7 dias": (timedelta(days=7), 'hora'),
+        "Últimos 30 dias": (timedelta(days=30), 'dia'),
+        "Tudo": (None, 'dia'),
+    }
+
+    def __init__(self, parent, controlador):
+        super().__init__(parent)
+        self.controlador = controlador
+        ctk.CTkLabel(self, text="PUROBET ADMIN", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        self.abas = ctk.CTkTabview(self)
+        self.abas.pack(fill="both", expand=True, padx=10, pady=10)
+        self.aba_usuarios = self.abas.add("Usuários")
+        self.aba_odds = self.abas.add("Odds")
+        self.aba_estatisticas = self.abas.add("Estatísticas")
+        self.aba_logs = self.abas.add("📊 Logs")
+        self.aba_indicacoes = self.abas.add("Indicações")
+
+        frame_lote = ctk.CTkFrame(self.aba_usuarios)
+        frame_lote.pack(fill="x", padx=5, pady=5)
+        self.entradas_lote = {}
+        for campo, texto, largura in (('saldo_minimo', "Saldo mín.", 80), ('saldo_maximo', "Saldo máx.", 80),
+                                      ('padrao_nome', "Nome (ex.: bot%)", 120), ('codigo_referencia', "Indicados por código", 140),
+                                      ('quantia', "Quantia (+/-)", 90)):
+            self.entradas_lote[campo] = ctk.CTkEntry(frame_lote, placeholder_text=texto, width=largura)
+            self.entradas_lote[campo].pack(side="left", padx=2, pady=5)
+        ctk.CTkButton(frame_lote, text="Prévia", width=60, command=lambda: self.ajustar_em_lote(simular=True)).pack(side="left", padx=2)
+        ctk.CTkButton(frame_lote, text="Aplicar", width=60, fg_color="#27ae60", command=self.ajustar_em_lote).pack(side="left", padx=2)
+        ctk.CTkButton(frame_lote, text="CSV...", width=60, fg_color="grey", command=self.ajustar_por_csv).pack(side="left", padx=2)
+
+        self.frame_scroll_usuarios = ctk.CTkScrollableFrame(self.aba_usuarios, label_text="Lista de Usuários")
+        self.frame_scroll_usuarios.pack(fill="both", expand=True, padx=5, pady=5)
+        self.labels_usuarios = {}
+
+        ctk.CTkLabel(self.aba_odds, text="Pagamento Roleta (Número):").pack(pady=(10,0), padx=10)
+        self.slider_pagamento_roleta = ctk.CTkSlider(self.aba_odds, from_=10, to=50, number_of_steps=40)
+        self.slider_pagamento_roleta.pack(fill="x", padx=10)
+        self.label_pagamento_roleta = ctk.CTkLabel(self.aba_odds, text="")
+        self.slider_pagamento_roleta.bind("<ButtonRelease-1>", self.atualizar_label_slider)
+        self.label_pagamento_roleta.pack()
+        ctk.CTkButton(self.aba_odds, text="Salvar Odds", command=self.salvar_odds).pack(pady=20)
+
+        self.frame_estatisticas = ctk.CTkFrame(self.aba_estatisticas, fg_color="transparent")
+        self.frame_estatisticas.pack(pady=(5, 0))
+        self.label_total_usuarios = ctk.CTkLabel(self.frame_estatisticas, font=ctk.CTkFont(size=16))
+        self.label_total_usuarios.pack(anchor="w", padx=10, pady=5)
+        self.label_saldo_total = ctk.CTkLabel(self.frame_estatisticas, font=ctk.CTkFont(size=16))
+        self.label_saldo_total.pack(anchor="w", padx=10, pady=5)
+        self.label_estado_backup = ctk.CTkLabel(self.frame_estatisticas, font=ctk.CTkFont(size=12, slant="italic"), text_color="gray")
+        self.label_estado_backup.pack(anchor="w", padx=10)
+
+        frame_grafico = ctk.CTkFrame(self.aba_estatisticas, fg_color="transparent")
+        frame_grafico.pack(fill="x", padx=5)
+        self.opcao_metrica = ctk.CTkOptionMenu(frame_grafico, values=list(METRICAS_AGREGADAS), width=140, command=self.atualizar_grafico_tendencias)
+        self.opcao_periodo = ctk.CTkOptionMenu(frame_grafico, values=list(self.PERIODOS_GRAFICO), width=120, command=self.atualizar_grafico_tendencias)
+        self.opcao_periodo.set("Últimas 24h")
+        self.opcao_jogo = ctk.CTkOptionMenu(frame_grafico, values=["Todos", "Blackjack", "Roleta", "Crash"], width=110, command=self.atualizar_grafico_tendencias)
+        for opcao in (self.opcao_metrica, self.opcao_periodo, self.opcao_jogo):
+            opcao.pack(side="left", padx=3, pady=5)
+        self.canvas_tendencias = Canvas(self.aba_estatisticas, bg="#1c1c1c", highlightthickness=0)
+        self.canvas_tendencias.pack(fill="both", expand=True, padx=5, pady=5)
+        self.canvas_tendencias.bind("<Configure>", lambda e: self.desenhar_grafico_tendencias())
+        self.serie_tendencias = []
+
+        frame_filtro_log = ctk.CTkFrame(self.aba_logs)
+        frame_filtro_log.pack(fill="x", padx=5, pady=5)
+        self.entrada_busca_log = ctk.CTkEntry(frame_filtro_log, placeholder_text="Filtrar por usuário...")
+        self.entrada_busca_log.pack(side="left", fill="x", expand=True, padx=(0,5))
+        self.entrada_busca_log.bind("<Return>", self.atualizar_logs)
+        self.entrada_log_de = ctk.CTkEntry(frame_filtro_log, placeholder_text="De (AAAA-MM-DD)", width=120)
+        self.entrada_log_ate = ctk.CTkEntry(frame_filtro_log, placeholder_text="Até (AAAA-MM-DD)", width=120)
+        for entrada in (self.entrada_log_de, self.entrada_log_ate):
+            entrada.pack(side="left", padx=(0,5))
+            entrada.bind("<Return>", self.atualizar_logs)
+        ctk.CTkButton(frame_filtro_log, text="Buscar", command=self.atualizar_logs).pack(side="left")
+        self.abas_logs = ctk.CTkTabview(self.aba_logs)
+        self.abas_logs.pack(fill="both", expand=True, padx=5, pady=5)
+        self.aba_logs_apostas = self.abas_logs.add("Apostas")
+        self.aba_logs_transacoes = self.abas_logs.add("Transações")
+        self.scroll_logs_apostas = ctk.CTkScrollableFrame(self.aba_logs_apostas)
+        self.scroll_logs_apostas.pack(fill="both", expand=True)
+        self.scroll_logs_transacoes = ctk.CTkScrollableFrame(self.aba_logs_transacoes)
+        self.scroll_logs_transacoes.pack(fill="both", expand=True)
+        # Linhas exibidas de cada log, da mais nova para a mais velha: ((id, usuario), label).
+        self.logs_exibidos = {tabela: [] for tabela in TABELAS_LOG}
+
+        frame_filtro_indicacoes = ctk.CTkFrame(self.aba_indicacoes)
+        frame_filtro_indicacoes.pack(fill="x", padx=5, pady=5)
+        self.entrada_indicacoes = ctk.CTkEntry(frame_filtro_indicacoes, placeholder_text="Árvore de um usuário (vazio: maiores indicadores)...")
+        self.entrada_indicacoes.pack(side="left", fill="x", expand=True, padx=(0,5))
+        self.entrada_indicacoes.bind("<Return>", self.atualizar_indicacoes)
+        ctk.CTkButton(frame_filtro_indicacoes, text="Buscar", command=self.atualizar_indicacoes).pack(side="left")
+        self.scroll_indicacoes = ctk.CTkScrollableFrame(self.aba_indicacoes)
+        self.scroll_indicacoes.pack(fill="both", expand=True, padx=5, pady=5)
+
+        ctk.CTkButton(self, text="Logout", fg_color="#e67e22", hover_color="#d35400", command=controlador.logout).pack(pady=10)
+
+        # A aba de desempenho fica oculta e só é criada pelo atalho Ctrl+Shift+P.
+        self.aba_desempenho = None
+        controlador.bind("<Control-P>", self.mostrar_aba_desempenho, add="+")
+
+    def ao_mostrar(self, data=None): self.atualizar_todas_abas()
+    @medir
+    def ao_alterar(self, alteracoes):
+        """Atualiza só o que mudou: as linhas dos usuários com saldo novo, as odds ou os logs."""
+        tipos = {tipo for tipo, _ in alteracoes}
+        saldos = {chave for tipo, chave in alteracoes if tipo == 'saldo'}
+        if 'usuarios' in tipos or not saldos <= self.labels_usuarios.keys() or len(saldos) > 50:
+            self.atualizar_usuarios()
+        else:
+            for usuario in saldos:
+                dados = obter_dados_usuario(usuario)
+                if dados:
+                    self.labels_usuarios[usuario].configure(text=f"{usuario} - Saldo: ${dados['saldo']:.2f}")
+        if tipos & {'saldo', 'usuarios'}:
+            self.atualizar_totais()
+        if 'usuarios' in tipos:
+            self.atualizar_indicacoes()
+        if 'configuracao' in tipos:
+            self.atualizar_odds()
+        for tabela in tipos & set(TABELAS_LOG):
+            self.atualizar_log(tabela, so_novos=True)
+
+    @medir
+    def atualizar_todas_abas(self):
+        self.atualizar_usuarios()
+        self.atualizar_estatisticas()
+        self.atualizar_odds()
+        self.atualizar_logs()
+        self.atualizar_indicacoes()
+
+    def atualizar_usuarios(self):
+        for widget in self.frame_scroll_usuarios.winfo_children(): widget.destroy()
+        self.labels_usuarios = {}
+        for usuario, saldo in obter_todos_usuarios():
+            frame_usuario = ctk.CTkFrame(self.frame_scroll_usuarios)
+            frame_usuario.pack(fill="x", pady=5, padx=5)
+            self.labels_usuarios[usuario] = ctk.CTkLabel(frame_usuario, text=f"{usuario} - Saldo: ${saldo:.2f}")
+            self.labels_usuarios[usuario].pack(side="left", padx=10)
+            frame_botoes = ctk.CTkFrame(frame_usuario, fg_color="transparent")
+            frame_botoes.pack(side="right")
+            ctk.CTkButton(frame_botoes, text="+", width=30, fg_color="#27ae60", command=lambda u=usuario: self.adicionar_saldo_admin(u)).pack(side="left", padx=2)
+            ctk.CTkButton(frame_botoes, text="-", width=30, fg_color="#c0392b", command=lambda u=usuario: self.remover_saldo_admin(u)).pack(side="left", padx=2)
+            ctk.CTkButton(frame_botoes, text="🗑️", width=30, fg_color="#7f8c8d", command=lambda u=usuario: self.deletar_usuario(u)).pack(side="left", padx=2)
+
+    def atualizar_totais(self):
+        total_usuarios, saldo_total = obter_resumo_usuarios()
+        self.label_total_usuarios.configure(text=f"Total de usuários: {total_usuarios}")
+        self.label_saldo_total.configure(text=f"Saldo total em jogo: ${saldo_total:,.2f}")
+
+    def atualizar_estatisticas(self):
+        self.atualizar_totais()
+        self.label_estado_backup.configure(text=descrever_estado_backup())
+        atualizar_agregados()
+        self.atualizar_grafico_tendencias()
+
+    @medir
+    def atualizar_grafico_tendencias(self, event=None):
+        """Busca a série escolhida nas tabelas de agregados e redesenha o gráfico."""
+        duracao, granularidade = self.PERIODOS_GRAFICO[self.opcao_periodo.get()]
+        inicio = (datetime.now() - duracao).strftime("%Y-%m-%d %H:%M:%S") if duracao else None
+        jogo = None if self.opcao_jogo.get() == "Todos" else self.opcao_jogo.get()
+        self.serie_tendencias = obter_serie_agregada(self.opcao_metrica.get(), granularidade, inicio, jogo=jogo)
+        self.desenhar_grafico_tendencias()
+
+    @medir
+    def desenhar_grafico_tendencias(self):
+        self.canvas_tendencias.delete("all")
+        w, h = self.canvas_tendencias.winfo_width(), self.canvas_tendencias.winfo_height()
+        if w < 80 or h < 60: return
+        if not self.serie_tendencias:
+            self.canvas_tendencias.create_text(w/2, h/2, text="Sem dados no período.", fill="gray", font=("Roboto", 14))
+            return
+
+        margem_x, margem_y = 70, 25
+        tempos = [datetime.strptime(inicio, "%Y-%m-%d %H:%M:%S").timestamp() for inicio, _ in self.serie_tendencias]
+        valores = [valor for _, valor in self.serie_tendencias]
+        t0, t1 = tempos[0], max(tempos[-1], tempos[0] + 1)
+        v0, v1 = min(0, min(valores)), max(0, max(valores))
+        v1 = v1 if v1 > v0 else v0 + 1
+
+        def ponto(t, v):
+            return (margem_x + (t - t0) / (t1 - t0) * (w - margem_x - 10),
+                    h - margem_y - (v - v0) / (v1 - v0) * (h - 2 * margem_y))
+
+        _, y_zero = ponto(t0, 0)
+        self.canvas_tendencias.create_line(margem_x, y_zero, w - 10, y_zero, fill="#555555")
+        for valor in (v0, v1):
+            self.canvas_tendencias.create_text(margem_x - 5, ponto(t0, valor)[1], text=f"{valor:,.0f}", fill="gray", anchor="e")
+        for inicio, anchor in ((self.serie_tendencias[0][0], "w"), (self.serie_tendencias[-1][0], "e")):
+            x = margem_x if anchor == "w" else w - 10
+            self.canvas_tendencias.create_text(x, h - margem_y / 2, text=inicio[:16], fill="gray", anchor=anchor)
+
+        pontos = [ponto(t, v) for t, v in zip(tempos, valores)]
+        if len(pontos) > 1:
+            self.canvas_tendencias.create_line(pontos, fill="#10a37f", width=2)
+        else:
+            x, y = pontos[0]
+            self.canvas_tendencias.create_oval(x - 3, y - 3, x + 3, y + 3, fill="#10a37f", outline="")
+
+    def atualizar_odds(self):
+        self.slider_pagamento_roleta.set(obter_configuracao_jogo('pagamento_roleta_numero'))
+        self.atualizar_label_slider()
+
+    def atualizar_logs(self, event=None):
+        for tabela in TABELAS_LOG:
+            self.atualizar_log(tabela)
+
+    @medir
+    def atualizar_log(self, tabela, so_novos=False):
+        """
+        Recarrega uma aba de logs. Com 'so_novos', só cria os labels das linhas que ainda não estão
+        na tela, no topo, e tira do fim as que saíram do limite; se as linhas já exibidas não forem
+        mais a continuação da consulta (um log arquivado, por exemplo), refaz a aba inteira.
+        """
+        filtro_usuario = self.entrada_busca_log.get() or None
+        # Com período, a busca inclui os arquivos mensais de logs antigos.
+        inicio = f"{self.entrada_log_de.get()} 00:00:00" if self.entrada_log_de.get() else None
+        fim = f"{self.entrada_log_ate.get()} 23:59:59" if self.entrada_log_ate.get() else None
+        logs = obter_logs(tabela, filtro_usuario, inicio, fim)
+        exibidos = self.logs_exibidos[tabela]
+        chaves_exibidas = [chave for chave, _ in exibidos]
+        novos = 0
+        while novos < len(logs) and (logs[novos][0], logs[novos][1]) not in chaves_exibidas:
+            novos += 1
+        antigos = [(log[0], log[1]) for log in logs[novos:]]
+        if not so_novos or antigos != chaves_exibidas[:len(antigos)]:
+            for _, label in exibidos: label.destroy()
+            exibidos.clear()
+            novos = len(logs)
+        scroll = self.scroll_logs_apostas if tabela == 'logs_apostas' else self.scroll_logs_transacoes
+        for log in reversed(logs[:novos]):
+            label = ctk.CTkLabel(scroll, anchor="w", **self.formatar_log(tabela, log))
+            if exibidos:
+                label.pack(fill="x", before=exibidos[0][1])
+            else:
+                label.pack(fill="x")
+            exibidos.insert(0, ((log[0], log[1]), label))
+        for _, label in exibidos[len(logs):]: label.destroy()
+        del exibidos[len(logs):]
+
+    @staticmethod
+    def formatar_log(tabela, log):
+        if tabela == 'logs_apostas':
+            _, usuario, jogo, aposta, resultado, ts = log
+            return {'text': f"[{ts}] {usuario} | {jogo}: apostou ${aposta:.2f}, resultado ${resultado:+.2f}",
+                    'text_color': "#4CAF50" if resultado >= 0 else "#D32F2F"}
+        _, usuario, tipo, quantia, ts = log
+        return {'text': f"[{ts}] {usuario} | {tipo.replace('_', ' ').capitalize()}: ${quantia:,.2f}"}
+
+    @medir
+    def atualizar_indicacoes(self, event=None):
+        raiz = self.entrada_indicacoes.get()
+        for widget in self.scroll_indicacoes.winfo_children(): widget.destroy()
+        if raiz:
+            for usuario, nivel, diretos, bonus in obter_arvore_indicacoes(raiz):
+                texto = f"{'    ' * nivel}{usuario} | {diretos} indicado(s) direto(s), bônus ${bonus:,.2f}"
+                ctk.CTkLabel(self.scroll_indicacoes, text=texto, anchor="w").pack(fill="x")
+        else:
+            for usuario, diretos, total, bonus in obter_resumo_indicacoes():
+                texto = f"{usuario} | {diretos} direto(s), {total} na árvore, bônus ${bonus:,.2f}"
+                ctk.CTkLabel(self.scroll_indicacoes, text=texto, anchor="w").pack(fill="x")
+
+    def adicionar_saldo_admin(self, usuario):
+        quantia = CaixaDialogo(self, titulo="Adicionar Saldo", texto=f"Adicionar para {usuario}:").obter_entrada()
+        if quantia and quantia > 0:
+            movimentar_saldo(usuario, quantia, 'deposito_admin')
+            self.atualizar_usuarios()
+            self.atualizar_estatisticas()
+
+    def remover_saldo_admin(self, usuario):
+        quantia = CaixaDialogo(self, titulo="Remover Saldo", texto=f"Remover de {usuario}:").obter_entrada()
+        if quantia and quantia > 0:
+            movimentar_saldo(usuario, -quantia, 'saque_admin')
+            self.atualizar_usuarios()
+            self.atualizar_estatisticas()
+
+    def ajustar_em_lote(self, simular=False):
+        """Credita ou debita todos os usuários que passam nos filtros preenchidos, após confirmar a prévia."""
+        from tkinter import messagebox
+        valores = {campo: entrada.get().strip() or None for campo, entrada in self.entradas_lote.items()}
+        try:
+            quantia = float(valores.pop('quantia'))
+            for campo in ('saldo_minimo', 'saldo_maximo'):
+                valores[campo] = float(valores[campo]) if valores[campo] else None
+        except (TypeError, ValueError):
+            self.controlador.exibir_mensagem("Erro", "Informe valores numéricos para a quantia e o saldo."); return
+        quantidade, total = ajustar_saldos_lote(quantia, simular=True, **valores)
+        texto = f"{quantidade} usuário(s) afetado(s), total ${total:+,.2f}."
+        if simular or not quantidade:
+            self.controlador.exibir_mensagem("Prévia", texto); return
+        if messagebox.askyesno("Confirmar", f"{texto}\nAplicar o ajuste?"):
+            ajustar_saldos_lote(quantia, **valores)
+            self.atualizar_usuarios()
+            self.atualizar_estatisticas()
+
+    def ajustar_por_csv(self):
+        """Aplica um CSV (ou JSONL) com as colunas 'nome_usuario' e 'quantia', após confirmar a prévia."""
+        from tkinter import filedialog, messagebox
+        caminho = filedialog.askopenfilename(filetypes=[("CSV ou JSONL", "*.csv *.jsonl"), ("Todos", "*.*")])
+        if not caminho: return
+        try:
+            ajustes = [(registro['nome_usuario'], float(registro['quantia'])) for registro in ler_registros(caminho)]
+        except (KeyError, ValueError) as erro:
+            self.controlador.exibir_mensagem("Erro", f"Arquivo inválido: {erro}"); return
+        quantidade, total = ajustar_saldos_lote(ajustes=ajustes, simular=True)
+        if messagebox.askyesno("Confirmar", f"{len(ajustes)} linha(s): {quantidade} usuário(s) afetado(s), total ${total:+,.2f}.\nAplicar?"):
+            ajustar_saldos_lote(ajustes=ajustes)
+            self.atualizar_usuarios()
+            self.atualizar_estatisticas()
+
+    def deletar_usuario(self, usuario):
+        from tkinter import messagebox
+        if messagebox.askyesno("Confirmar", f"Excluir {usuario}?"):
+            deletar_usuario_bd(usuario)
+            self.atualizar_usuarios()
+            self.atualizar_estatisticas()
+
+    def mostrar_aba_desempenho(self, event=None):
+        if self.controlador.usuario_atual != USUARIO_ADMIN: return
+        if self.aba_desempenho is None:
+            self.aba_desempenho = self.abas.add("Performance")
+            self.texto_desempenho = ctk.CTkTextbox(self.aba_desempenho, font=ctk.CTkFont(family="Courier", size=11), wrap="none")
+            self.texto_desempenho.pack(fill="both", expand=True, padx=5, pady=5)
+            frame_botoes = ctk.CTkFrame(self.aba_desempenho, fg_color="transparent")
+            frame_botoes.pack(pady=5)
+            ctk.CTkButton(frame_botoes, text="Atualizar", width=90, command=self.atualizar_desempenho).pack(side="left", padx=5)
+            ctk.CTkButton(frame_botoes, text="Zerar", width=90, fg_color="grey", command=lambda: (METRICAS.limpar(), self.atualizar_desempenho())).pack(side="left", padx=5)
+            ctk.CTkButton(frame_botoes, text="Exportar", width=90, command=self.exportar_desempenho).pack(side="left", padx=5)
+        self.abas.set("Performance")
+        self.atualizar_desempenho()
+
+    def atualizar_desempenho(self):
+        histogramas, contadores, consultas_lentas = METRICAS.copiar()
+        linhas = [f"{'Operação':<38}{'Chamadas':>9}{'Média ms':>10}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for nome, contagem, media, p50, p95, p99 in METRICAS.resumo():
+            linhas.append(f"{nome[:37]:<38}{contagem:>9}{media:>10.2f}{p50:>7g}{p95:>7g}{p99:>7g}")
+        linhas += ["", "Contadores:"] + [f"  {nome}: {valor}" for nome, valor in sorted(contadores.items())]
+        linhas += ["", f"SQL acima de {METRICAS.limite_sql_lento_ms} ms (mais recentes primeiro):"]
+        linhas += [f"  [{ts}] {duracao:.1f} ms  {sql}" for ts, duracao, sql in reversed(consultas_lentas[-30:])]
+        self.texto_desempenho.configure(state="normal")
+        self.texto_desempenho.delete("1.0", "end")
+        self.texto_desempenho.insert("1.0", "\n".join(linhas))
+        self.texto_desempenho.configure(state="disabled")
+
+    def exportar_desempenho(self):
+        ExportadorPrometheus("metricas.prom").exportar()
+        self.controlador.exibir_mensagem("Sucesso", "Métricas exportadas para metricas.prom.")
+
+    def atualizar_label_slider(self, event=None):
+        self.label_pagamento_roleta.configure(text=f"{int(self.slider_pagamento_roleta.get())}x")
+
+    @medir
+    def salvar_odds(self):
+        definir_configuracao_jogo('pagamento_roleta_numero', int(self.slider_pagamento_roleta.get()))
+        self.controlador.exibir_mensagem("Sucesso", "Odds atualizadas!")
+
+# --- SEÇÃO 5: TELAS DOS JOGOS ---
+
+class TelaJogoBase(ctk.CTkFrame):
+    """Classe base para as telas de jogos."""
+    def __init__(self, parent, controlador, titulo_jogo):
+        super().__init__(parent)
+        self.controlador = controlador
+        self._id_after = None
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        frame_superior = ctk.CTkFrame(self, fg_color="transparent")
+        frame_superior.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+        frame_superior.grid_columnconfigure(1, weight=1)
+        ctk.CTkButton(frame_superior, text="← Voltar ao Hub", width=120, command=lambda: controlador.mostrar_tela(TelaPrincipal)).grid(row=0, column=0, sticky="w")
+        ctk.CTkLabel(frame_superior, text=titulo_jogo, font=ctk.CTkFont(size=22, weight="bold")).grid(row=0, column=1, sticky="ew")
+        self.label_saldo = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=14))
+        self.label_saldo.grid(row=0, column=2, sticky="e", padx=10)
+        self.frame_jogo = ctk.CTkFrame(self)
+        self.frame_jogo.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+
+    def ao_mostrar(self, dados=None):
+        self.atualizar_exibicao_saldo()
+
+    def ao_esconder(self):
+        if self._id_after:
+            self.after_cancel(self._id_after)
+            self._id_after = None
+
+    def ao_alterar(self, alteracoes):
+        """Mostra o saldo novo quando ele muda (por esta tela, outra janela ou o admin) e repassa as configurações alteradas."""
+        if ('saldo', self.controlador.usuario_atual) in alteracoes:
+            self.atualizar_exibicao_saldo()
+        for tipo, chave in alteracoes:
+            if tipo == 'configuracao':
+                self.ao_alterar_configuracao(chave)
+
+    def ao_alterar_configuracao(self, nome_configuracao):
+        pass
+
+    def iniciar_jogo_automatico(self, jogo, botoes, estrategias=None, **argumentos_jogo):
+        """
+        Pede os parâmetros e joga a sessão automática numa thread, sem animações nem telas
+        intermediárias. No fim, mostra um resumo único; o detalhe de cada rodada fica nos logs.
+        """
+        parametros = CaixaJogoAutomatico(self, estrategias).obter_parametros()
+        if not parametros:
+            return
+        for botao in botoes:
+            botao.configure(state="disabled")
+        self.label_saldo.configure(text="Jogando no automático...")
+        resultado = {}
+        def jogar():
+            try:
+                resultado['resumo'] = jogar_automatico(self.controlador.usuario_atual, jogo, **argumentos_jogo, **parametros)
+            except ValueError as erro:
+                resultado['erro'] = str(erro)
+        tarefa = threading.Thread(target=jogar, daemon=True)
+        tarefa.start()
+        self.aguardar_jogo_automatico(tarefa, resultado, botoes)
+
+    def aguardar_jogo_automatico(self, tarefa, resultado, botoes):
+        if tarefa.is_alive():
+            self.after(50, self.aguardar_jogo_automatico, tarefa, resultado, botoes); return
+        for botao in botoes:
+            botao.configure(state="normal")
+        if 'erro' in resultado:
+            self.atualizar_exibicao_saldo()
+            self.controlador.exibir_mensagem("Erro", resultado['erro'])
+            return
+        self.atualizar_exibicao_saldo(resultado['resumo']['resultado'])
+        CaixaMensagem(self.controlador, titulo="Jogo Automático", mensagem=descrever_resumo_automatico(resultado['resumo']), altura=200)
+
+    def atualizar_exibicao_saldo(self, mudanca=0):
+        saldo = self.controlador.obter_saldo_usuario()
+        self.label_saldo.configure(text=f"Saldo: ${saldo:,.2f}")
+        if mudanca != 0:
+            cor = "#4CAF50" if mudanca > 0 else "#D32F2F"
+            self.label_saldo.configure(text_color=cor)
+            self.after(1000, lambda: self.label_saldo.configure(text_color="white"))
+
+class JogoBlackjack(TelaJogoBase):
+    """Tela e lógica do jogo Blackjack (21)."""
+    def __init__(self, parent, controlador):
+        super().__init__(parent, controlador, "🃏 Blackjack")
+        self.baralho = []
+        self.mao_jogador, self.mao_dealer = [], []
+        self.valor_aposta = 0
+        self.frame_jogo.grid_rowconfigure([0, 1], weight=1)
+        self.frame_jogo.grid_columnconfigure(0, weight=1)
+        self.frame_dealer = ctk.CTkFrame(self.frame_jogo)
+        self.frame_dealer.grid(row=0, column=0, sticky="nsew", pady=5)
+        self.frame_jogador = ctk.CTkFrame(self.frame_jogo)
+        self.frame_jogador.grid(row=1, column=0, sticky="nsew", pady=5)
+        self.label_pontos_dealer = ctk.CTkLabel(self.frame_dealer, text="Dealer: 0", font=ctk.CTkFont(size=16))
+        self.label_pontos_dealer.place(relx=0.02, rely=0.05)
+        self.label_pontos_jogador = ctk.CTkLabel(self.frame_jogador, text="Você: 0", font=ctk.CTkFont(size=16))
+        self.label_pontos_jogador.place(relx=0.02, rely=0.05)
+        self.label_status = ctk.CTkLabel(self, text="Faça sua aposta para começar", font=ctk.CTkFont(size=14))
+        self.label_status.grid(row=2, column=0, pady=5)
+        container_controles = ctk.CTkFrame(self)
+        container_controles.grid(row=3, column=0, sticky="ew", padx=10, pady=10)
+        container_controles.grid_columnconfigure(0, weight=1)
+        frame_aposta = ctk.CTkFrame(container_controles, fg_color="transparent")
+        frame_aposta.grid(row=0, column=0, pady=5)
+        self.entrada_aposta = ctk.CTkEntry(frame_aposta, placeholder_text="Aposta", width=100)
+        self.entrada_aposta.pack(side="left", padx=5)
+        self.botao_apostar = ctk.CTkButton(frame_aposta, text="Apostar", command=self.distribuir_cartas)
+        self.botao_apostar.pack(side="left", padx=5)
+        self.botao_automatico = ctk.CTkButton(frame_aposta, text="Automático", fg_color="grey", command=self.jogar_automatico)
+        self.botao_automatico.pack(side="left", padx=5)
+        frame_acoes_jogo = ctk.CTkFrame(container_controles, fg_color="transparent")
+        frame_acoes_jogo.grid(row=1, column=0, pady=5)
+        self.botao_pedir = ctk.CTkButton(frame_acoes_jogo, text="Pedir", command=self.pedir_carta, state="disabled")
+        self.botao_pedir.pack(side="left", padx=10)
+        self.botao_parar = ctk.CTkButton(frame_acoes_jogo, text="Parar", command=self.parar, state="disabled", fg_color="#c0392b", hover_color="#a52a1a")
+        self.botao_parar.pack(side="left", padx=10)
+
+    def ao_mostrar(self, data=None):
+        super().ao_mostrar(data)
+        self.reiniciar_jogo()
+
+    def obter_valor_carta(self, carta):
+        return valor_carta(carta)
+
+    def obter_valor_mao(self, mao):
+        return valor_mao(mao)
+
+    def jogar_automatico(self):
+        try:
+            aposta = int(self.entrada_aposta.get())
+        except (ValueError, TypeError):
+            self.controlador.exibir_mensagem("Erro", "Aposta inválida.")
+            return
+        self.iniciar_jogo_automatico('Blackjack', (self.botao_apostar, self.botao_automatico),
+                                     estrategias=ESTRATEGIAS_BLACKJACK, valor_aposta=aposta)
+
+    def criar_baralho(self):
+        self.semente, gerador = SORTEIO.nova_rodada()
+        self.baralho = criar_baralho(gerador)
+        self.acoes = ""
+
+    @medir
+    def distribuir_cartas(self):
+        try:
+            aposta = int(self.entrada_aposta.get())
+        except (ValueError, TypeError):
+            self.controlador.exibir_mensagem("Erro", "Aposta inválida.")
+            return
+        if not (0 < aposta <= self.controlador.obter_saldo_usuario()):
+            self.controlador.exibir_mensagem("Erro", "Saldo insuficiente.")
+            return
+        if not self.controlador.debitar_aposta_usuario(aposta, "Blackjack"):
+            return
+        self.valor_aposta = aposta
+        self.atualizar_exibicao_saldo(-aposta)
+        self.criar_baralho()
+        self.mao_jogador = [self.baralho.pop(), self.baralho.pop()]
+        self.mao_dealer = [self.baralho.pop(), self.baralho.pop()]
+        self.atualizar_interface()
+        self.label_status.configure(text=f"Aposta: ${self.valor_aposta}. Sua vez.")
+        self.botao_apostar.configure(state="disabled")
+        self.botao_pedir.configure(state="normal")
+        self.botao_parar.configure(state="normal")
+        if self.obter_valor_mao(self.mao_jogador) == 21:
+            self.parar()
+
+    @medir
+    def pedir_carta(self):
+        self.mao_jogador.append(self.baralho.pop())
+        self.acoes += "P"
+        self.atualizar_interface()
+        if self.obter_valor_mao(self.mao_jogador) > 21:
+            self.finalizar_jogo("Você estourou! Perdeu.")
+
+    @medir
+    def parar(self):
+        self.botao_pedir.configure(state="disabled")
+        self.botao_parar.configure(state="disabled")
+        jogar_dealer(self.mao_dealer, self.baralho)
+        self.atualizar_interface(mostrar_dealer_completo=True)
+        self.finalizar_jogo(*resultado_blackjack(self.mao_jogador, self.mao_dealer, self.valor_aposta))
+
+    def finalizar_jogo(self, mensagem, ganhos=0):
+        self.label_status.configure(text=mensagem)
+        self.controlador.atualizar_saldo_usuario_bd(ganhos, nome_jogo="Blackjack", valor_aposta=self.valor_aposta,
+                                                    rodada=(self.semente, None, self.acoes))
+        if ganhos > 0:
+            self.atualizar_exibicao_saldo(ganhos - self.valor_aposta)
+        else:
+            self.atualizar_exibicao_saldo(0)
+        self.botao_apostar.configure(state="normal")
+        self.botao_pedir.configure(state="disabled")
+        self.botao_parar.configure(state="disabled")
+
+    def atualizar_interface(self, mostrar_dealer_completo=False):
+        for widget in self.frame_jogador.winfo_children():
+            if isinstance(widget, ctk.CTkLabel) and hasattr(widget, "eh_carta"): widget.destroy()
+        for widget in self.frame_dealer.winfo_children():
+            if isinstance(widget, ctk.CTkLabel) and hasattr(widget, "eh_carta"): widget.destroy()
+
+        for i, nome_carta in enumerate(self.mao_jogador):
+            imagem_carta = self.controlador.carregador_imagens.obter_imagem_ctk(nome_carta)
+            if imagem_carta:
+                label_carta = ctk.CTkLabel(self.frame_jogador, image=imagem_carta, text="")
+                label_carta.eh_carta = True
+                label_carta.place(relx=0.25 + i*0.1, rely=0.5, anchor="center")
+
+        if self.mao_dealer:
+            mao_dealer_para_mostrar = self.mao_dealer if mostrar_dealer_completo else [self.mao_dealer[0], 'back']
+            for i, nome_carta in enumerate(mao_dealer_para_mostrar):
+                imagem_carta = self.controlador.carregador_imagens.obter_imagem_ctk(nome_carta)
+                if imagem_carta:
+                    label_carta = ctk.CTkLabel(self.frame_dealer, image=imagem_carta, text="")
+                    label_carta.eh_carta = True
+                    label_carta.place(relx=0.25 + i*0.1, rely=0.5, anchor="center")
+
+        self.label_pontos_jogador.configure(text=f"Você: {self.obter_valor_mao(self.mao_jogador)}")
+        if self.mao_dealer:
+            pontos_dealer = self.obter_valor_mao(self.mao_dealer) if mostrar_dealer_completo else self.obter_valor_carta(self.mao_dealer[0])
+            self.label_pontos_dealer.configure(text=f"Dealer: {pontos_dealer}{'' if mostrar_dealer_completo else ' + ?'}")
+        else:
+            self.label_pontos_dealer.configure(text="Dealer: 0")
+
+    def reiniciar_jogo(self):
+        self.mao_jogador, self.mao_dealer = [], []
+        self.atualizar_interface()
+        self.label_status.configure(text="Faça sua aposta para começar")
+        self.botao_apostar.configure(state="normal")
+        self.botao_pedir.configure(state="disabled")
+        self.botao_parar.configure(state="disabled")
+        self.entrada_aposta.delete(0, 'end')
+        self.label_pontos_jogador.configure(text="Você: 0")
+        self.label_pontos_dealer.configure(text="Dealer: 0")
+
+class JogoRoleta(TelaJogoBase):
+    """Tela e lógica do jogo da Roleta."""
+    def __init__(self, parent, controlador):
+        super().__init__(parent, controlador, "🌀 Roleta")
+        self.numeros = CORES_ROLETA
+        self.mapa_cores = {"red": "#C0392B", "black": "#2C3E50", "green": "#27AE60"}
+        self.historico = []
+        self.apostas = []
+        self.mapa_traducao = {'red':'Vermelho','black':'Preto','even':'Par','odd':'Ímpar','low':'1-18 (Menores)','high':'19-36 (Maiores)'}
+        self.frame_jogo.grid_columnconfigure(0, weight=2)
+        self.frame_jogo.grid_columnconfigure(1, weight=1)
+        self.frame_jogo.grid_rowconfigure(0, weight=1)
+        painel_tabuleiro = ctk.CTkFrame(self.frame_jogo, fg_color="transparent")
+        painel_tabuleiro.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
+        painel_tabuleiro.grid_rowconfigure(1, weight=1)
+        painel_tabuleiro.grid_columnconfigure(0, weight=1)
+        frame_apostas_externas = ctk.CTkFrame(painel_tabuleiro)
+        frame_apostas_externas.grid(row=0, column=0, sticky="ew", pady=(0, 10))
+        frame_apostas_externas.grid_columnconfigure(tuple(range(6)), weight=1)
+        ctk.CTkButton(frame_apostas_externas, text="1-18", command=lambda: self.adicionar_aposta('range', 'low')).grid(row=0, column=0, sticky="ew", padx=2, pady=2)
+        ctk.CTkButton(frame_apostas_externas, text="Par", command=lambda: self.adicionar_aposta('parity', 'even')).grid(row=0, column=1, sticky="ew", padx=2, pady=2)
+        ctk.CTkButton(frame_apostas_externas, text="Vermelho", fg_color=self.mapa_cores['red'], command=lambda: self.adicionar_aposta('color', 'red')).grid(row=0, column=2, sticky="ew", padx=2, pady=2)
+        ctk.CTkButton(frame_apostas_externas, text="Preto", fg_color=self.mapa_cores['black'], text_color="white", command=lambda: self.adicionar_aposta('color', 'black')).grid(row=0, column=3, sticky="ew", padx=2, pady=2)
+        ctk.CTkButton(frame_apostas_externas, text="Ímpar", command=lambda: self.adicionar_aposta('parity', 'odd')).grid(row=0, column=4, sticky="ew", padx=2, pady=2)
+        ctk.CTkButton(frame_apostas_externas, text="19-36", command=lambda: self.adicionar_aposta('range', 'high')).grid(row=0, column=5, sticky="ew", padx=2, pady=2)
+        self.frame_grid_numeros = ctk.CTkScrollableFrame(painel_tabuleiro, label_text="Apostar em Números")
+        self.frame_grid_numeros.grid(row=1, column=0, sticky="nsew")
+        for i in range(37):
+            btn = ctk.CTkButton(self.frame_grid_numeros, text=str(i), fg_color=self.mapa_cores[self.numeros[i]], width=40, command=lambda n=i: self.adicionar_aposta('number', n))
+            btn.grid(row=(i//6), column=i%6, padx=2, pady=2)
+        painel_controle = ctk.CTkFrame(self.frame_jogo)
+        painel_controle.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
+        painel_controle.grid_columnconfigure(0, weight=1)
+        painel_controle.grid_rowconfigure(2, weight=1)
+        self.label_resultado = ctk.CTkLabel(painel_controle, text="?", font=ctk.CTkFont(size=60, weight="bold"), fg_color="grey", height=120, corner_radius=10)
+        self.label_resultado.grid(row=0, column=0, sticky="ew", pady=10, padx=10)
+        self.frame_historico = ctk.CTkFrame(painel_controle, fg_color="transparent")
+        self.frame_historico.grid(row=1, column=0, pady=5, padx=10)
+        self.frame_scroll_apostas = ctk.CTkScrollableFrame(painel_controle, label_text="Suas Apostas")
+        self.frame_scroll_apostas.grid(row=2, column=0, sticky="nsew", pady=5, padx=10)
+        self.label_aposta_total = ctk.CTkLabel(painel_controle, text="Aposta Total: $0")
+        self.label_aposta_total.grid(row=3, column=0, pady=5, padx=10)
+        self.botao_girar = ctk.CTkButton(painel_controle, text="Girar!", command=self.girar, state="disabled", height=40)
+        self.botao_girar.grid(row=4, column=0, sticky="ew", pady=(5,2), padx=10)
+        self.botao_limpar_apostas = ctk.CTkButton(painel_controle, text="Limpar Apostas", fg_color="grey", command=self.limpar_apostas)
+        self.botao_limpar_apostas.grid(row=5, column=0, sticky="ew", pady=(2,10), padx=10)
+        self.botao_automatico = ctk.CTkButton(painel_controle, text="Automático", fg_color="grey", command=self.jogar_automatico)
+        self.botao_automatico.grid(row=6, column=0, sticky="ew", pady=(0,10), padx=10)
+
+    def ao_mostrar(self, data=None):
+        super().ao_mostrar(data)
+        self.limpar_apostas()
+        self.ao_alterar_configuracao('pagamento_roleta_numero')
+
+    def ao_alterar_configuracao(self, nome_configuracao):
+        if nome_configuracao == 'pagamento_roleta_numero':
+            pagamento = int(obter_configuracao_jogo('pagamento_roleta_numero'))
+            self.frame_grid_numeros.configure(label_text=f"Apostar em Números (paga {pagamento}:1)")
+
+    def adicionar_aposta(self, tipo_aposta, valor):
+        valor_exibicao = self.mapa_traducao.get(valor, str(valor))
+        quantia = CaixaDialogo(self, titulo="Valor da Aposta", texto=f"Apostar em {valor_exibicao}:").obter_entrada()
+        if quantia and quantia > 0:
+            saldo_disponivel = self.controlador.obter_saldo_usuario() - sum(b['quantia'] for b in self.apostas)
+            if quantia > saldo_disponivel:
+                self.controlador.exibir_mensagem("Erro", "Saldo insuficiente.")
+                return
+            self.apostas.append({'tipo': tipo_aposta, 'valor': valor, 'quantia': quantia})
+            self.atualizar_exibicao_apostas()
+
+    def atualizar_exibicao_apostas(self):
+        for widget in self.frame_scroll_apostas.winfo_children(): widget.destroy()
+        total = sum(b['quantia'] for b in self.apostas)
+        for aposta in self.apostas:
+            valor_exibicao = self.mapa_traducao.get(aposta['valor'], str(aposta['valor']))
+            ctk.CTkLabel(self.frame_scroll_apostas, text=f"{valor_exibicao}: ${aposta['quantia']}").pack(anchor="w", padx=5)
+        self.label_aposta_total.configure(text=f"Aposta Total: ${total}")
+        self.botao_girar.configure(state="normal" if total > 0 else "disabled")
+
+    def limpar_apostas(self):
+        self.apostas.clear()
+        self.atualizar_exibicao_apostas()
+
+    def jogar_automatico(self):
+        if not self.apostas:
+            self.controlador.exibir_mensagem("Erro", "Monte a mesa antes de jogar no automático.")
+            return
+        self.iniciar_jogo_automatico('Roleta', (self.botao_girar, self.botao_limpar_apostas, self.botao_automatico),
+                                     apostas=[dict(aposta) for aposta in self.apostas])
+
+    @medir
+    def girar(self):
+        aposta_total = sum(b['quantia'] for b in self.apostas)
+        if aposta_total <= 0: return
+        if not self.controlador.debitar_aposta_usuario(aposta_total, "Roleta"): return
+        self.atualizar_exibicao_saldo(-aposta_total)
+        self.botao_girar.configure(state="disabled")
+        self.botao_limpar_apostas.configure(state="disabled")
+        numero_vencedor, self.semente, self.cadeia = sortear_rodada("Roleta")
+        self.animar_giro(numero_vencedor, 20, 50)
+
+    @medir
+    def animar_giro(self, numero_vencedor, passos, delay):
+        if passos > 0:
+            num = random.randint(0, 36)
+            self.label_resultado.configure(text=str(num), fg_color=self.mapa_cores[self.numeros[num]])
+            self._id_after = self.after(delay, lambda: self.animar_giro(numero_vencedor, passos - 1, int(delay * 1.15)))
+        else:
+            self.label_resultado.configure(text=str(numero_vencedor), fg_color=self.mapa_cores[self.numeros[numero_vencedor]])
+            pagamento_numero = obter_configuracao_jogo('pagamento_roleta_numero')
+            ganhos_totais = self.calcular_ganhos(numero_vencedor, pagamento_numero)
+            aposta_total = sum(b['quantia'] for b in self.apostas)
+            self.controlador.atualizar_saldo_usuario_bd(ganhos_totais, nome_jogo="Roleta", valor_aposta=aposta_total,
+                                                        rodada=(self.semente, self.cadeia, codificar_apostas_roleta(self.apostas, pagamento_numero)))
+            if ganhos_totais > 0:
+                self.atualizar_exibicao_saldo(ganhos_totais - aposta_total)
+                self.controlador.exibir_mensagem("Você Ganhou!", f"Parabéns! Você ganhou ${ganhos_totais:,.2f}!")
+            else:
+                self.controlador.exibir_mensagem("Não foi desta vez", "Mais sorte na próxima rodada!")
+            self.historico.append(numero_vencedor)
+            self.atualizar_historico()
+            self.limpar_apostas()
+            self.botao_limpar_apostas.configure(state="normal")
+
+    def calcular_ganhos(self, num_vencedor, pagamento_numero=None):
+        if pagamento_numero is None:
+            pagamento_numero = obter_configuracao_jogo('pagamento_roleta_numero')
+        return calcular_ganhos_roleta(self.apostas, num_vencedor, pagamento_numero)
+
+    def atualizar_historico(self):
+        for widget in self.frame_historico.winfo_children(): widget.destroy()
+        linha_historico = ctk.CTkFrame(self.frame_historico, fg_color="transparent")
+        linha_historico.pack()
+        for num in self.historico[-10:]:
+            ctk.CTkLabel(linha_historico, text=str(num), fg_color=self.mapa_cores[self.numeros[num]], corner_radius=5, width=28, height=28).pack(side="left", padx=2)
+
+class JogoCrash(TelaJogoBase):
+    """Tela e lógica do jogo Crash (Aviãozinho)."""
+    def __init__(self, parent, controlador):
+        super().__init__(parent, controlador, "✈️ Aviãozinho")
+        self.estado_jogo = "aguardando"
+        self.multiplicador = 1.0
+        self.ponto_crash = 1.0
+        self.semente, self.cadeia = None, None
+        self.motor = MotorSaqueAutomatico()
+        self.tempo_inicio = 0
+        self.pontos_grafico = []
+        self.historico = []
+        self.imagem_aviao_photo = None
+
+        self.frame_jogo.grid_columnconfigure(0, weight=3)
+        self.frame_jogo.grid_columnconfigure(1, weight=1)
+        self.frame_jogo.grid_rowconfigure(0, weight=1)
+
+        self.canvas = Canvas(self.frame_jogo, bg="#2B2B2B", bd=0, highlightthickness=0, relief='ridge')
+        self.canvas.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
+        self.canvas.bind("<Configure>", self.desenhar_grafico)
+
+        painel_controle = ctk.CTkFrame(self.frame_jogo)
+        painel_controle.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
+        painel_controle.grid_columnconfigure(0, weight=1)
+        painel_controle.grid_rowconfigure(3, weight=1)
+
+        frame_aposta = ctk.CTkFrame(painel_controle, fg_color="transparent")
+        frame_aposta.grid(row=0, column=0, pady=10, padx=10, sticky="ew")
+        self.entrada_aposta = ctk.CTkEntry(frame_aposta, placeholder_text="Aposta")
+        self.entrada_aposta.pack(side="left", fill="x", expand=True, padx=(0,5))
+        self.entrada_alvo = ctk.CTkEntry(frame_aposta, placeholder_text="Auto (x)", width=70)
+        self.entrada_alvo.pack(side="left", padx=(0,5))
+        self.botao_apostar = ctk.CTkButton(frame_aposta, text="Apostar", command=self.fazer_aposta, width=100)
+        self.botao_apostar.pack(side="left")
+
+        self.botao_saque = ctk.CTkButton(painel_controle, text="Sacar!", font=ctk.CTkFont(size=18, weight="bold"), height=50, state="disabled", fg_color="#10a37f", hover_color="#0e8e6f", command=self.fazer_saque)
+        self.botao_saque.grid(row=1, column=0, sticky="ew", pady=10, padx=10)
+
+        self.label_status = ctk.CTkLabel(painel_controle, text="", font=ctk.CTkFont(size=16))
+        self.label_status.grid(row=2, column=0, pady=10, padx=10)
+
+        self.frame_historico = ctk.CTkScrollableFrame(painel_controle, label_text="Histórico")
+        self.frame_historico.grid(row=3, column=0, sticky="nsew", pady=10, padx=10)
+
+    def ao_mostrar(self, data=None):
+        super().ao_mostrar(data)
+        self.reiniciar_rodada()
+
+    def ao_esconder(self):
+        super().ao_esconder()
+        # Sair da tela encerra a rodada: antes da largada as apostas são devolvidas, depois são perdidas.
+        if self.estado_jogo == "aguardando":
+            liquidar_apostas_lote("Crash", [(u, a, a) for u, a, _ in self.motor.encerrar_rodada()])
+        elif self.estado_jogo == "correndo":
+            liquidar_apostas_lote("Crash", acoes_crash(self.motor.encerrar_rodada()), self.semente, self.cadeia)
+
+    @medir
+    def fazer_aposta(self):
+        if self.estado_jogo != "aguardando":
+            self.controlador.exibir_mensagem("Aviso", "Aguarde a próxima rodada.")
+            return
+        try:
+            aposta = int(self.entrada_aposta.get())
+        except (ValueError, TypeError):
+            self.controlador.exibir_mensagem("Erro", "Aposta inválida.")
+            return
+        alvo = None
+        if self.entrada_alvo.get():
+            try:
+                alvo = float(self.entrada_alvo.get().replace(',', '.').rstrip('xX'))
+            except ValueError:
+                alvo = 0
+            if alvo <= 1.0:
+                self.controlador.exibir_mensagem("Erro", "O saque automático deve ser maior que 1.00x.")
+                return
+        if not (0 < aposta <= self.controlador.obter_saldo_usuario()):
+            self.controlador.exibir_mensagem("Erro", "Saldo insuficiente.")
+            return
+        if not self.controlador.debitar_aposta_usuario(aposta, "Crash"):
+            return
+        self.motor.adicionar_aposta(self.controlador.usuario_atual, aposta, alvo)
+        self.atualizar_exibicao_saldo(-aposta)
+        texto_alvo = f" (saque automático em {alvo:.2f}x)" if alvo else ""
+        self.label_status.configure(text=f"Aposta de ${aposta:,.2f}{texto_alvo} feita!")
+        self.entrada_aposta.delete(0, 'end')
+
+    @medir
+    def fazer_saque(self):
+        if self.estado_jogo == "correndo":
+            saques = self.motor.sacar_usuario(self.controlador.usuario_atual, self.multiplicador)
+            if saques:
+                self.liquidar_saques(saques)
+
+    def liquidar_saques(self, liquidacoes):
+        """Liquida um lote de saques no banco e mostra a parte que cabe ao usuário atual."""
+        liquidar_apostas_lote("Crash", acoes_crash(liquidacoes), self.semente, self.cadeia)
+        saques_usuario = [(a, g) for u, a, g in liquidacoes if u == self.controlador.usuario_atual]
+        if saques_usuario:
+            aposta, ganhos = sum(a for a, _ in saques_usuario), sum(g for _, g in saques_usuario)
+            self.atualizar_exibicao_saldo(ganhos - aposta) # A aposta já foi subtraída
+            self.label_status.configure(text=f"Você sacou R$ {ganhos:,.2f}!")
+        self.atualizar_botao_saque()
+
+    def atualizar_botao_saque(self):
+        pendente = self.motor.total_pendente(self.controlador.usuario_atual)
+        if pendente > 0:
+            self.botao_saque.configure(state="normal", text=f"Sacar R$ {pendente * self.multiplicador:,.2f}")
+        else:
+            self.botao_saque.configure(state="disabled", text="Sacar!")
+
+    @medir
+    def loop_jogo(self):
+        if self.estado_jogo == "correndo":
+            tempo_decorrido = time.time() - self.tempo_inicio
+            self.multiplicador = math.pow(1.05, tempo_decorrido)
+
+            if self.multiplicador >= self.ponto_crash:
+                self.estado_jogo = "crashou"
+                self.historico.append(self.ponto_crash)
+                self.atualizar_historico()
+                # Alvos abaixo do ponto de crash foram atingidos antes da queda, mesmo que neste tick.
+                saques = self.motor.retirar_alvos_atingidos(self.ponto_crash, estrito=True)
+                perdidas = self.motor.encerrar_rodada()
+                self.liquidar_saques(saques + perdidas)
+                if any(u == self.controlador.usuario_atual for u, _, _ in perdidas):
+                    self.label_status.configure(text=f"CRASH! Você perdeu.")
+                else:
+                    self.label_status.configure(text=f"CRASH em {self.ponto_crash:.2f}x")
+                self.botao_saque.configure(state="disabled")
+                self.desenhar_grafico(crashou=True)
+                self._id_after = self.after(3000, self.reiniciar_rodada)
+            else:
+                saques = self.motor.retirar_alvos_atingidos(self.multiplicador)
+                if saques:
+                    self.liquidar_saques(saques)
+                else:
+                    self.atualizar_botao_saque()
+                self.desenhar_grafico()
+                self._id_after = self.after(30, self.loop_jogo)
+
+    def iniciar_corrida(self):
+        self.estado_jogo = "correndo"
+        self.tempo_inicio = time.time()
+        self.ponto_crash, self.semente, self.cadeia = sortear_rodada("Crash")
+        self.botao_apostar.configure(state="disabled")
+        self.atualizar_botao_saque()
+        self.loop_jogo()
+
+    def reiniciar_rodada(self):
+        self.estado_jogo = "aguardando"
+        self.multiplicador = 1.0
+        self.motor = MotorSaqueAutomatico()
+        self.pontos_grafico = []
+        self.botao_apostar.configure(state="normal")
+        self.botao_saque.configure(state="disabled", text="Sacar!")
+        self.entrada_aposta.delete(0, 'end')
+        self.desenhar_grafico()
+        self.contagem_regressiva(5)
+
+    def contagem_regressiva(self, contador):
+        if self._id_after: self.after_cancel(self._id_after)
+        if contador > 0:
+            self.label_status.configure(text=f"Próxima rodada em {contador}...")
+            self.desenhar_grafico()
+            self._id_after = self.after(1000, lambda: self.contagem_regressiva(contador - 1))
+        else:
+            self.label_status.configure(text="")
+            self.iniciar_corrida()
+
+    def atualizar_historico(self):
+        for widget in self.frame_historico.winfo_children(): widget.destroy()
+        for m in reversed(self.historico[-10:]):
+            ctk.CTkLabel(self.frame_historico, text=f"{m:.2f}x", text_color="#4CAF50" if m >= 2.0 else "#D32F2F", anchor="w").pack(fill="x")
+
+    @medir
+    def desenhar_grafico(self, event=None, crashou=False):
+        self.canvas.delete("all")
+        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if w < 20 or h < 20: return
+
+        tempo_decorrido = (time.time() - self.tempo_inicio) if self.estado_jogo == "correndo" else 0
+        max_mult = max(2.0, self.multiplicador * 1.2, self.ponto_crash * 1.1)
+        max_tempo = max(5.0, tempo_decorrido * 1.2)
+
+        self.pontos_grafico = [(0, h)]
+        for t_ms in range(int(tempo_decorrido * 100) + 1):
+            t = t_ms / 100.0
+            mult_atual = math.pow(1.05, t)
+            x = (t / max_tempo) * w
+            y = h - ((mult_atual - 1) / (max_mult - 1)) * h
+            x = max(0, min(w, x))
+            y = max(0, min(h, y))
+            self.pontos_grafico.append((x, y))
+
+        cor_linha = "#D32F2F" if crashou else "#E74C3C"
+
+        if len(self.pontos_grafico) > 1:
+            self.canvas.create_line(self.pontos_grafico, fill=cor_linha, width=4, smooth=True)
+
+        texto_mult = f"{self.ponto_crash:.2f}x" if crashou else f"{self.multiplicador:.2f}x"
+        tamanho_fonte = min(max(int(h / 5), 30), 100)
+        self.canvas.create_text(w/2, h/2, text=texto_mult, font=("Roboto", tamanho_fonte, "bold"), fill="white", anchor="center")
+
+        if self.estado_jogo == "correndo" or crashou:
+            self.imagem_aviao_photo = self.controlador.carregador_imagens.obter_imagem_photo("plane", tamanho=(80, 50))
+            if self.imagem_aviao_photo and self.pontos_grafico:
+                aviao_x, aviao_y = self.pontos_grafico[-1]
+                self.canvas.create_image(aviao_x, aviao_y, image=self.imagem_aviao_photo, anchor="center")
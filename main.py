@@ -9,1118 +9,2801 @@
 #
 # Estrutura de Pastas:
 # - /pasta_do_projeto/
-#   |- main.py (este arquivo)
+#   |- main.py (este arquivo: dados, regras, API e linha de comando)
+#   |- purobet.py (ponto de entrada da linha de comando: python -m purobet)
+#   |- interface.py (telas; seções 2 a 5, carregadas só quando a janela é aberta)
+#   |- api.py (seção 6: API JSON do modo 'servir')
 #   |- purobet.db (será criado automaticamente)
 #   |- /cards/
 # ===================================================================================
 
-import customtkinter as ctk
 import random
 import string
-import math
 import time
 import sqlite3
 import hashlib
-from datetime import datetime
-from tkinter import Canvas
-from PIL import Image, ImageTk
+from datetime import datetime, timedelta
 import os
+import heapq
+import queue
+import bisect
+import functools
+import itertools
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import argparse
+import json
+import secrets
+import threading
+import sys
+import hmac
+import zlib
+import math
+import mmap
+import struct
+# csv, gzip, shutil e tempfile são importados dentro das funções de arquivamento e de
+# importação/exportação, para não pesar na partida da linha de comando.
 
 # Define o nome do arquivo do banco de dados. Ele será criado na mesma pasta do script.
 ARQUIVO_BD = "purobet.db"
 
+# Tempo (em segundos) que uma conexão espera por um lock do banco antes de falhar com "database is locked".
+TIMEOUT_BD = 5.0
+
+SALDO_INICIAL = 1000
+BONUS_INDICACAO = 200
+TENTATIVAS_CODIGO_REFERENCIA = 5
+PROFUNDIDADE_MAXIMA_INDICACOES = 50
+# Custo do scrypt para novos hashes de senha; 'n' é ajustado pela configuração 'custo_senha_log2n'.
+CUSTO_SENHA = {'n': 2 ** 14, 'r': 8, 'p': 1}
+DURACAO_CACHE_CREDENCIAIS = 300
+# Conta do admin: fixa, fora da tabela 'usuarios'; usada pela tela de login e pela API.
+USUARIO_ADMIN = "puroadmin"
+SENHA_ADMIN = "123456"
+
+# Tabelas de log que podem ser consultadas pelo admin.
+TABELAS_LOG = ('logs_apostas', 'logs_transacoes')
+TABELAS_EXPORTACAO = ('usuarios',) + TABELAS_LOG
+
+# --- Métricas de Desempenho ---
+
+class MetricasDesempenho:
+    """
+    Guarda em memória histogramas de duração e contadores, seguros para várias threads,
+    além de um log das instruções SQL que passaram do limite de lentidão.
+    """
+    LIMITES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self, limite_sql_lento_ms=50):
+        self.limite_sql_lento_ms = limite_sql_lento_ms
+        self._trava = threading.Lock()
+        self.histogramas = {}
+        self.contadores = defaultdict(int)
+        self.consultas_lentas = deque(maxlen=200)
+
+    def observar(self, nome, duracao_ms):
+        with self._trava:
+            histograma = self.histogramas.get(nome)
+            if histograma is None:
+                histograma = self.histogramas[nome] = {'baldes': [0] * (len(self.LIMITES_MS) + 1), 'soma': 0.0, 'contagem': 0}
+            histograma['baldes'][bisect.bisect_left(self.LIMITES_MS, duracao_ms)] += 1
+            histograma['soma'] += duracao_ms
+            histograma['contagem'] += 1
+
+    def incrementar(self, nome, quantia=1):
+        with self._trava:
+            self.contadores[nome] += quantia
+
+    def registrar_sql(self, sql, duracao_ms):
+        self.observar('sql', duracao_ms)
+        if duracao_ms >= self.limite_sql_lento_ms:
+            self.incrementar('sql_lento')
+            with self._trava:
+                self.consultas_lentas.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), duracao_ms, ' '.join(sql.split())))
+
+    def copiar(self):
+        """Retorna uma cópia consistente dos histogramas e contadores."""
+        with self._trava:
+            histogramas = {nome: dict(h, baldes=list(h['baldes'])) for nome, h in self.histogramas.items()}
+            return histogramas, dict(self.contadores), list(self.consultas_lentas)
+
+    def percentil(self, histograma, p):
+        """Estimativa do percentil pelo limite superior do balde onde ele cai."""
+        alvo, acumulado = histograma['contagem'] * p / 100, 0
+        for limite, quantidade in zip(self.LIMITES_MS + (float('inf'),), histograma['baldes']):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return limite
+        return float('inf')
+
+    def resumo(self):
+        """Retorna (nome, contagem, média, p50, p95, p99) de cada histograma, do mais caro ao mais barato."""
+        histogramas, _, _ = self.copiar()
+        linhas = [(nome, h['contagem'], h['soma'] / h['contagem'], self.percentil(h, 50), self.percentil(h, 95), self.percentil(h, 99))
+                  for nome, h in histogramas.items()]
+        return sorted(linhas, key=lambda linha: linha[1] * linha[2], reverse=True)
+
+    def exportar_prometheus(self):
+        """Gera o texto das métricas no formato de exposição do Prometheus (durações em segundos)."""
+        histogramas, contadores, _ = self.copiar()
+        linhas = ["# HELP purobet_duracao_segundos Duração das operações instrumentadas.",
+                  "# TYPE purobet_duracao_segundos histogram"]
+        for nome, h in sorted(histogramas.items()):
+            rotulo = nome.replace('\\', '\\\\').replace('"', '\\"')
+            acumulado = 0
+            for limite, quantidade in zip(self.LIMITES_MS + (float('inf'),), h['baldes']):
+                acumulado += quantidade
+                le = "+Inf" if limite == float('inf') else f"{limite / 1000:g}"
+                linhas.append(f'purobet_duracao_segundos_bucket{{operacao="{rotulo}",le="{le}"}} {acumulado}')
+            linhas.append(f'purobet_duracao_segundos_sum{{operacao="{rotulo}"}} {h["soma"] / 1000:.6f}')
+            linhas.append(f'purobet_duracao_segundos_count{{operacao="{rotulo}"}} {h["contagem"]}')
+        linhas += ["# HELP purobet_eventos_total Contadores de eventos (erros, consultas lentas, etc).",
+                   "# TYPE purobet_eventos_total counter"]
+        linhas += [f'purobet_eventos_total{{nome="{nome}"}} {valor}' for nome, valor in sorted(contadores.items())]
+        return "\n".join(linhas) + "\n"
+
+    def limpar(self):
+        with self._trava:
+            self.histogramas.clear()
+            self.contadores.clear()
+            self.consultas_lentas.clear()
+
+METRICAS = MetricasDesempenho()
+
+class _Medicao:
+    """Mede a duração de um bloco ('with medir("nome"):') ou de cada chamada de uma função decorada."""
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_erro, erro, rastreio):
+        METRICAS.observar(self.nome, (time.perf_counter() - self._inicio) * 1000)
+        if tipo_erro is not None:
+            METRICAS.incrementar(f"{self.nome}:erros")
+        return False
+
+    def __call__(self, funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with _Medicao(self.nome):
+                return funcao(*args, **kwargs)
+        return medida
+
+def medir(alvo):
+    """Use como '@medir' (o nome vem da função), '@medir("nome")' ou 'with medir("nome"):'."""
+    if callable(alvo):
+        return _Medicao(alvo.__qualname__)(alvo)
+    return _Medicao(alvo)
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mede cada instrução SQL executada (preparação e primeiro passo da consulta)."""
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            METRICAS.registrar_sql(sql, (time.perf_counter() - inicio) * 1000)
+
+    def executemany(self, sql, sequencia_parametros):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, sequencia_parametros)
+        finally:
+            METRICAS.registrar_sql(sql, (time.perf_counter() - inicio) * 1000)
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores são instrumentados; usada por todas as funções de dados."""
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia_parametros):
+        return self.cursor().executemany(sql, sequencia_parametros)
+
+class TarefaPeriodica(threading.Thread):
+    """Executa uma função a cada 'intervalo' segundos numa thread de fundo, até ser encerrada."""
+    def __init__(self, funcao, intervalo, executar_ao_encerrar=False):
+        super().__init__(daemon=True, name=getattr(funcao, '__name__', None))
+        self.funcao = funcao
+        self.intervalo = intervalo
+        self.executar_ao_encerrar = executar_ao_encerrar
+        self._encerrar = threading.Event()
+
+    def run(self):
+        while not self._encerrar.wait(self.intervalo):
+            try:
+                self.funcao()
+            except Exception as erro:
+                METRICAS.incrementar(f"{self.name}:erros")
+                print(f"ERRO na tarefa periódica {self.name}: {erro}")
+        if self.executar_ao_encerrar:
+            self.funcao()
+
+    def encerrar(self):
+        self._encerrar.set()
+        self.join()
+
+class ExportadorPrometheus(TarefaPeriodica):
+    """Grava periodicamente as métricas num arquivo texto no formato do Prometheus."""
+    def __init__(self, caminho, intervalo=15):
+        super().__init__(self.exportar, intervalo, executar_ao_encerrar=True)
+        self.caminho = caminho
+
+    def exportar(self):
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(METRICAS.exportar_prometheus())
+        os.replace(temporario, self.caminho)
+
+# --- Conexões com o Banco de Dados ---
+
+class PoolConexoes:
+    """
+    Mantém um conjunto fixo de conexões abertas com o banco, reaproveitadas entre threads.
+    Usado pelo modo servidor, onde abrir uma conexão por chamada custaria caro.
+    """
+    def __init__(self, arquivo, tamanho=8):
+        self.arquivo = arquivo
+        self._livres = queue.Queue()
+        for _ in range(tamanho):
+            conexao = sqlite3.connect(arquivo, check_same_thread=False, timeout=TIMEOUT_BD, factory=ConexaoInstrumentada)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            self._livres.put(conexao)
+        self.tamanho = tamanho
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool, desfazendo qualquer transação pendente na devolução."""
+        conexao = self._livres.get()
+        try:
+            yield conexao
+        finally:
+            if conexao.in_transaction:
+                conexao.rollback()
+            self._livres.put(conexao)
+
+    def fechar(self):
+        for _ in range(self.tamanho):
+            self._livres.get().close()
+
+# Pools por arquivo: o banco principal e, no modo com shards, um para cada shard.
+_pools_conexoes = {}
+
+def ativar_pool_conexoes(tamanho=8):
+    """Passa a servir todas as funções de dados a partir de pools de conexões."""
+    for arquivo in [ARQUIVO_BD] + [caminho_shard(indice) for indice in range(QUANTIDADE_SHARDS)]:
+        _pools_conexoes[arquivo] = PoolConexoes(arquivo, tamanho)
+    return _pools_conexoes[ARQUIVO_BD]
+
+# --- Shards por Usuário ---
+# No modo com shards, cada usuário mora num arquivo 'purobet_shardN.db', escolhido pelo hash do
+# nome, com as suas próprias tabelas de usuários, livro-razão e logs. Cada arquivo tem o seu
+# lock de escrita, então jogadores de shards diferentes gravam ao mesmo tempo. O banco principal
+# fica só com as configurações. Consultas do admin rodam em todos os shards e juntam o resultado.
+
+QUANTIDADE_SHARDS = 0
+_banco_fixado = threading.local()
+_executor_shards = None
+
+def caminho_shard(indice):
+    base, extensao = os.path.splitext(ARQUIVO_BD)
+    return f"{base}_shard{indice}{extensao}"
+
+def shard_do_usuario(nome_usuario):
+    """Índice do shard de um usuário (CRC32 do nome: estável entre processos, ao contrário do hash())."""
+    return zlib.crc32(nome_usuario.encode()) % QUANTIDADE_SHARDS
+
+def arquivo_bd_atual(nome_usuario=None):
+    """Arquivo usado pelas funções de dados: o shard do usuário, o fixado nesta thread por 'usando_banco' ou o principal."""
+    if nome_usuario is not None and QUANTIDADE_SHARDS:
+        return caminho_shard(shard_do_usuario(nome_usuario))
+    return getattr(_banco_fixado, 'arquivo', None) or ARQUIVO_BD
+
+@contextmanager
+def usando_banco(arquivo):
+    """Faz as funções de dados chamadas nesta thread usarem 'arquivo' no lugar do banco principal."""
+    anterior = getattr(_banco_fixado, 'arquivo', None)
+    _banco_fixado.arquivo = arquivo
+    try:
+        yield
+    finally:
+        _banco_fixado.arquivo = anterior
+
+def consulta_distribuida():
+    """Verdadeiro quando uma operação sobre todos os usuários precisa rodar em cada shard."""
+    return QUANTIDADE_SHARDS > 0 and getattr(_banco_fixado, 'arquivo', None) is None
+
+def nos_shards(funcao, *args, **kwargs):
+    """Roda 'funcao' uma vez em cada shard, em paralelo, e retorna os resultados na ordem dos shards."""
+    def no_shard(indice):
+        with usando_banco(caminho_shard(indice)):
+            return funcao(*args, **kwargs)
+    return list(_executor_shards.map(no_shard, range(QUANTIDADE_SHARDS)))
+
+def ativar_shards(quantidade):
+    """Liga o modo com 'quantidade' shards (0 desliga), criando as tabelas nos arquivos que faltarem."""
+    global QUANTIDADE_SHARDS, _executor_shards
+    QUANTIDADE_SHARDS = quantidade
+    if quantidade:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor_shards = ThreadPoolExecutor(max_workers=quantidade, thread_name_prefix="shards")
+        nos_shards(inicializar_banco_de_dados)
+
+@contextmanager
+def conexao_bd(nome_usuario=None, arquivo=None):
+    """
+    Entrega uma conexão com o banco: do pool, se ativado, ou uma nova que é fechada no final.
+    Com 'nome_usuario', vai para o shard do usuário; com 'arquivo', para esse arquivo.
+    """
+    arquivo = arquivo or arquivo_bd_atual(nome_usuario)
+    pool = _pools_conexoes.get(arquivo)
+    if pool:
+        with pool.conexao() as conexao:
+            yield conexao
+        return
+    conexao = sqlite3.connect(arquivo, timeout=TIMEOUT_BD, factory=ConexaoInstrumentada)
+    try:
+        yield conexao
+    finally:
+        conexao.close()
+
+# Gatilhos que numeram as alterações: (nome, evento, tipo da alteração, chave). O saldo muda pelo gatilho
+# do livro-razão, que dispara este. Os logs não têm gatilho (dobraria o custo de cada inserção em lote):
+# linhas novas aparecem no 'sqlite_sequence', que o SQLite já mantém para as tabelas AUTOINCREMENT.
+GATILHOS_ALTERACOES = (
+    ('saldo', "AFTER UPDATE OF saldo ON usuarios WHEN NEW.saldo IS NOT OLD.saldo", 'saldo', "NEW.nome_usuario"),
+    ('usuarios_insercao', "AFTER INSERT ON usuarios", 'usuarios', "NEW.nome_usuario"),
+    ('usuarios_remocao', "AFTER DELETE ON usuarios", 'usuarios', "OLD.nome_usuario"),
+    ('configuracao_insercao', "AFTER INSERT ON configuracoes_jogo", 'configuracao', "NEW.nome_configuracao"),
+    ('configuracao_atualizacao', "AFTER UPDATE ON configuracoes_jogo", 'configuracao', "NEW.nome_configuracao"),
+)
+
+# Versão do esquema gravada em 'PRAGMA user_version' ao fim da inicialização. Suba este número
+# a cada tabela, índice, gatilho ou migração nova, para os bancos existentes rodarem a inicialização.
+VERSAO_ESQUEMA = 1
+
+@medir
 def inicializar_banco_de_dados():
     """
     Inicializa o banco de dados, criando o arquivo .db e as tabelas caso não existam.
-    Esta função é chamada uma única vez quando o programa inicia.
-    """
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-
-    # Cria a tabela 'usuarios' para armazenar informações dos jogadores.
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_usuario TEXT UNIQUE NOT NULL,
-            hash_senha TEXT NOT NULL,
-            saldo REAL NOT NULL,
-            codigo_referencia TEXT UNIQUE NOT NULL
-        )
-    ''')
-
-    # Cria a tabela 'configuracoes_jogo' para armazenar configurações ajustáveis pelo admin.
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS configuracoes_jogo (
-            nome_configuracao TEXT PRIMARY KEY,
-            valor REAL NOT NULL
-        )
-    ''')
-
-    # Cria a tabela 'logs_apostas' para registrar cada aposta feita.
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS logs_apostas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_usuario TEXT NOT NULL,
-            jogo TEXT NOT NULL,
-            valor_aposta REAL NOT NULL,
-            resultado REAL NOT NULL,
-            timestamp TEXT NOT NULL
-        )
-    ''')
-
-    # Cria a tabela 'logs_transacoes' para registrar depósitos e outras transações.
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS logs_transacoes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_usuario TEXT NOT NULL,
-            tipo_transacao TEXT NOT NULL,
-            quantia REAL NOT NULL,
-            timestamp TEXT NOT NULL
-        )
-    ''')
-
-    # Insere uma configuração padrão para a roleta, caso ainda não exista.
-    cursor.execute("INSERT OR IGNORE INTO configuracoes_jogo (nome_configuracao, valor) VALUES (?, ?)", ('pagamento_roleta_numero', 35))
-
-    conexao.commit()
-    conexao.close()
+    Esta função é chamada uma única vez quando o programa inicia. Num banco já na versão
+    VERSAO_ESQUEMA, só lê o 'user_version' e retorna, sem abrir transação de escrita.
+    """
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        if cursor.execute("PRAGMA user_version").fetchone()[0] == VERSAO_ESQUEMA:
+            return
+
+        # Cria a tabela 'usuarios' para armazenar informações dos jogadores.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_usuario TEXT UNIQUE NOT NULL,
+                hash_senha TEXT NOT NULL,
+                saldo REAL NOT NULL,
+                codigo_referencia TEXT UNIQUE NOT NULL
+            )
+        ''')
+
+        # Cria a tabela 'configuracoes_jogo' para armazenar configurações ajustáveis pelo admin.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS configuracoes_jogo (
+                nome_configuracao TEXT PRIMARY KEY,
+                valor REAL NOT NULL
+            )
+        ''')
+
+        # Cria a tabela 'logs_apostas' para registrar cada aposta feita.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS logs_apostas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_usuario TEXT NOT NULL,
+                jogo TEXT NOT NULL,
+                valor_aposta REAL NOT NULL,
+                resultado REAL NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        ''')
+
+        # Cria a tabela 'logs_transacoes' para registrar depósitos e outras transações.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS logs_transacoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_usuario TEXT NOT NULL,
+                tipo_transacao TEXT NOT NULL,
+                quantia REAL NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        ''')
+
+        # Índices por usuário nos logs, usados pela reconciliação e pelos filtros do admin.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_apostas_usuario ON logs_apostas (nome_usuario, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_transacoes_usuario ON logs_transacoes (nome_usuario, id)")
+        # Índices por data: os logs do admin saem do mais recente e a retenção separa as linhas por mês.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_apostas_timestamp ON logs_apostas (timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_transacoes_timestamp ON logs_transacoes (timestamp)")
+
+        # Cria o 'livro_razao': lançamentos de saldo, somente de inserção, que são a fonte da verdade
+        # dos saldos. A coluna 'usuarios.saldo' passa a ser uma projeção mantida pelo gatilho abaixo.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS livro_razao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_usuario TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                quantia REAL NOT NULL,
+                referencia TEXT,
+                timestamp TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_livro_razao_usuario ON livro_razao (nome_usuario, id)")
+
+        # Cria a tabela 'snapshots_saldo': o saldo de cada usuário até um lançamento do livro-razão.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS snapshots_saldo (
+                nome_usuario TEXT NOT NULL,
+                ultimo_id_livro INTEGER NOT NULL,
+                saldo REAL NOT NULL,
+                timestamp TEXT NOT NULL,
+                PRIMARY KEY (nome_usuario, ultimo_id_livro)
+            )
+        ''')
+
+        # Cria a tabela 'marcas_processamento': até qual id cada rotina incremental já processou.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS marcas_processamento (
+                nome TEXT PRIMARY KEY,
+                ultimo_id INTEGER NOT NULL
+            )
+        ''')
+
+        # Cria a tabela 'indicacoes': a aresta indicador -> indicado gravada no registro, com o bônus pago.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS indicacoes (
+                indicado TEXT PRIMARY KEY,
+                indicador TEXT NOT NULL,
+                bonus REAL NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_indicacoes_indicador ON indicacoes (indicador)")
+
+        # Tabelas de agregados por período (minuto, hora, dia), mantidas incrementalmente a partir dos logs.
+        # O jogo '*' soma todos os jogos; 'agregados_usuarios_ativos' guarda quem já foi contado em cada período aberto.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS agregados_apostas (
+                granularidade TEXT NOT NULL,
+                inicio TEXT NOT NULL,
+                jogo TEXT NOT NULL,
+                apostas INTEGER NOT NULL,
+                total_apostado REAL NOT NULL,
+                total_pago REAL NOT NULL,
+                usuarios_ativos INTEGER NOT NULL,
+                PRIMARY KEY (granularidade, jogo, inicio)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS agregados_usuarios_ativos (
+                granularidade TEXT NOT NULL,
+                inicio TEXT NOT NULL,
+                jogo TEXT NOT NULL,
+                nome_usuario TEXT NOT NULL,
+                PRIMARY KEY (granularidade, inicio, jogo, nome_usuario)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS agregados_transacoes (
+                granularidade TEXT NOT NULL,
+                inicio TEXT NOT NULL,
+                transacoes INTEGER NOT NULL,
+                entradas REAL NOT NULL,
+                saidas REAL NOT NULL,
+                PRIMARY KEY (granularidade, inicio)
+            ) WITHOUT ROWID
+        ''')
+
+        # Cria a tabela 'checkpoints_reconciliacao': até onde os logs de cada usuário já foram conferidos.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints_reconciliacao (
+                nome_usuario TEXT PRIMARY KEY,
+                ultimo_id_aposta INTEGER NOT NULL,
+                ultimo_id_transacao INTEGER NOT NULL,
+                total_verificado REAL NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        ''')
+        # Cria a tabela 'totais_arquivados': quanto dos logs de cada usuário já foi para os arquivos mensais.
+        # 'total' soma tudo o que foi arquivado (base da reconciliação completa); 'pendente', só as linhas
+        # além do checkpoint, que a próxima reconciliação incremental ainda precisa contar.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS totais_arquivados (
+                nome_usuario TEXT PRIMARY KEY,
+                total REAL NOT NULL,
+                pendente REAL NOT NULL
+            )
+        ''')
+
+        # Cria a tabela 'rodadas': semente e ações de cada rodada liquidada, para refazê-la depois.
+        # Nas rodadas sorteadas por uma cadeia de resultados, 'semente' é a posição do elo na 'cadeia'.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rodadas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_usuario TEXT NOT NULL,
+                jogo TEXT NOT NULL,
+                semente INTEGER NOT NULL,
+                acoes TEXT NOT NULL,
+                valor_aposta REAL NOT NULL,
+                ganhos REAL NOT NULL,
+                timestamp TEXT NOT NULL,
+                cadeia TEXT
+            )
+        ''')
+        if 'cadeia' not in {coluna[1] for coluna in cursor.execute("PRAGMA table_info(rodadas)").fetchall()}:
+            cursor.execute("ALTER TABLE rodadas ADD COLUMN cadeia TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rodadas_timestamp ON rodadas (timestamp)")
+
+        # Cria a tabela 'sequencia_alteracoes': a última alteração de cada (tipo, chave), numerada por uma
+        # sequência do arquivo e mantida pelos gatilhos abaixo. O ObservadorAlteracoes lê só o que passou da última vista.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sequencia_alteracoes (
+                tipo TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                PRIMARY KEY (tipo, chave)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sequencia_alteracoes_seq ON sequencia_alteracoes (seq)")
+        for nome, evento, tipo, chave in GATILHOS_ALTERACOES:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS alteracoes_{nome} {evento}
+                BEGIN
+                    INSERT INTO sequencia_alteracoes (tipo, chave, seq)
+                    VALUES ('{tipo}', {chave}, (SELECT IFNULL(MAX(seq), 0) + 1 FROM sequencia_alteracoes))
+                    ON CONFLICT (tipo, chave) DO UPDATE SET seq = excluded.seq;
+                END
+            ''')
+
+        # Na primeira execução com o livro-razão, o saldo atual de cada usuário vira um lançamento de abertura.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'livro_razao_projecao'")
+        if not cursor.fetchone():
+            cursor.execute("INSERT INTO livro_razao (nome_usuario, tipo, quantia, timestamp) SELECT nome_usuario, 'abertura', saldo, ? FROM usuarios",
+                           (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS livro_razao_projecao AFTER INSERT ON livro_razao
+            BEGIN
+                UPDATE usuarios SET saldo = saldo + NEW.quantia WHERE nome_usuario = NEW.nome_usuario;
+            END
+        ''')
+        cursor.execute("CREATE TRIGGER IF NOT EXISTS livro_razao_sem_update BEFORE UPDATE ON livro_razao BEGIN SELECT RAISE(ABORT, 'O livro-razão só aceita inserções.'); END")
+        cursor.execute("CREATE TRIGGER IF NOT EXISTS livro_razao_sem_delete BEFORE DELETE ON livro_razao BEGIN SELECT RAISE(ABORT, 'O livro-razão só aceita inserções.'); END")
+
+        # Insere uma configuração padrão para a roleta, caso ainda não exista.
+        cursor.execute("INSERT OR IGNORE INTO configuracoes_jogo (nome_configuracao, valor) VALUES (?, ?)", ('pagamento_roleta_numero', 35))
+        cursor.execute("INSERT OR IGNORE INTO configuracoes_jogo (nome_configuracao, valor) VALUES (?, ?)", ('custo_senha_log2n', 14))
+        cursor.execute("INSERT OR IGNORE INTO configuracoes_jogo (nome_configuracao, valor) VALUES (?, ?)", ('retencao_logs_dias', 90))
+        cursor.execute("INSERT OR IGNORE INTO configuracoes_jogo (nome_configuracao, valor) VALUES (?, ?)", ('quantidade_shards', 0))
+
+        cursor.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        conexao.commit()
+
+# --- Notificações de Alterações ---
+# Várias janelas (ou uma janela e a linha de comando do admin) podem usar o mesmo banco. Em vez de cada
+# tela reler tudo de tempos em tempos, um único observador descobre o que mudou e avisa quem se inscreveu.
+
+INTERVALO_ALTERACOES = 0.5
+
+class ObservadorAlteracoes(TarefaPeriodica):
+    """
+    A cada 'intervalo', consulta 'PRAGMA data_version' de cada banco numa conexão própria que nunca grava:
+    o número muda a cada commit de qualquer outra conexão, deste ou de outro processo. Só então lê as linhas
+    novas de 'sequencia_alteracoes' e o último id dos logs, e entrega aos inscritos o conjunto de (tipo, chave)
+    alterados, por exemplo ('saldo', 'ana'), ('configuracao', 'pagamento_roleta_numero') ou ('logs_apostas', None).
+    Os inscritos rodam na thread do observador.
+    """
+    def __init__(self, intervalo=INTERVALO_ALTERACOES):
+        super().__init__(self.verificar, intervalo)
+        self._inscritos = []
+        self._bancos = {}
+
+    def inscrever(self, funcao):
+        self._inscritos.append(funcao)
+
+    def verificar(self):
+        alteracoes = set()
+        for arquivo in [ARQUIVO_BD] + [caminho_shard(indice) for indice in range(QUANTIDADE_SHARDS)]:
+            alteracoes |= self._verificar_banco(arquivo)
+        if alteracoes:
+            METRICAS.incrementar("alteracoes:notificadas", len(alteracoes))
+            for funcao in self._inscritos:
+                funcao(alteracoes)
+        return alteracoes
+
+    def _verificar_banco(self, arquivo):
+        """Alterações de um arquivo desde a última verificação. A primeira só guarda o ponto de partida."""
+        estado = self._bancos.get(arquivo)
+        if estado is None:
+            conexao = sqlite3.connect(arquivo, timeout=TIMEOUT_BD, check_same_thread=False)
+            versao = conexao.execute("PRAGMA data_version").fetchone()[0]
+            ultima_seq = conexao.execute("SELECT IFNULL(MAX(seq), 0) FROM sequencia_alteracoes").fetchone()[0]
+            self._bancos[arquivo] = [conexao, versao, ultima_seq, self._ultimos_logs(conexao)]
+            return set()
+        conexao, versao, ultima_seq, ultimos_logs = estado
+        versao_atual = conexao.execute("PRAGMA data_version").fetchone()[0]
+        if versao_atual == versao:
+            return set()
+        linhas = conexao.execute("SELECT tipo, chave, seq FROM sequencia_alteracoes WHERE seq > ?", (ultima_seq,)).fetchall()
+        logs_atuais = self._ultimos_logs(conexao)
+        estado[1:] = versao_atual, max([ultima_seq] + [seq for _, _, seq in linhas]), logs_atuais
+        alteracoes = {(tipo, chave) for tipo, chave, _ in linhas}
+        alteracoes.update((tabela, None) for tabela, ultimo_id in logs_atuais.items() if ultimo_id != ultimos_logs.get(tabela))
+        return alteracoes
+
+    @staticmethod
+    def _ultimos_logs(conexao):
+        consulta = f"SELECT name, seq FROM sqlite_sequence WHERE name IN ({', '.join('?' * len(TABELAS_LOG))})"
+        return dict(conexao.execute(consulta, TABELAS_LOG).fetchall())
+
+    def encerrar(self):
+        super().encerrar()
+        for conexao, *_ in self._bancos.values():
+            conexao.close()
 
 # --- Funções de Log ---
 
+@medir
 def registrar_aposta(nome_usuario, jogo, valor_aposta, ganhos):
     """Registra uma aposta no banco de dados, na tabela 'logs_apostas'."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    resultado = ganhos - valor_aposta
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("INSERT INTO logs_apostas (nome_usuario, jogo, valor_aposta, resultado, timestamp) VALUES (?, ?, ?, ?, ?)",
-                   (nome_usuario, jogo, valor_aposta, resultado, timestamp))
-    conexao.commit()
-    conexao.close()
+    with conexao_bd(nome_usuario) as conexao:
+        cursor = conexao.cursor()
+        resultado = ganhos - valor_aposta
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("INSERT INTO logs_apostas (nome_usuario, jogo, valor_aposta, resultado, timestamp) VALUES (?, ?, ?, ?, ?)",
+                       (nome_usuario, jogo, valor_aposta, resultado, timestamp))
+        conexao.commit()
 
+@medir
 def registrar_transacao(nome_usuario, tipo_transacao, quantia):
     """Registra uma transação financeira na tabela 'logs_transacoes'."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) VALUES (?, ?, ?, ?)",
-                   (nome_usuario, tipo_transacao, quantia, timestamp))
-    conexao.commit()
-    conexao.close()
+    with conexao_bd(nome_usuario) as conexao:
+        cursor = conexao.cursor()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) VALUES (?, ?, ?, ?)",
+                       (nome_usuario, tipo_transacao, quantia, timestamp))
+        conexao.commit()
 
 # --- Funções de Usuário e Autenticação ---
 
-def gerar_hash_senha(senha):
-    """Gera um hash SHA-256 para uma senha."""
-    return hashlib.sha256(senha.encode()).hexdigest()
+def _scrypt(senha, sal, n, r, p):
+    return hashlib.scrypt(senha.encode(), salt=sal, n=n, r=r, p=p, maxmem=256 * n * r * p + 2 ** 20, dklen=32)
+
+def gerar_hash_senha(senha, custo=None):
+    """Gera o hash scrypt de uma senha, com sal aleatório, no formato 'scrypt$n$r$p$sal$chave'."""
+    custo = custo or CUSTO_SENHA
+    sal = os.urandom(16)
+    chave = _scrypt(senha, sal, custo['n'], custo['r'], custo['p'])
+    return f"scrypt${custo['n']}${custo['r']}${custo['p']}${sal.hex()}${chave.hex()}"
 
 def verificar_senha(hash_armazenado, senha_fornecida):
-    """Verifica se a senha fornecida corresponde ao hash armazenado."""
-    return hash_armazenado == gerar_hash_senha(senha_fornecida)
+    """Verifica a senha contra o hash armazenado, aceitando também o SHA-256 sem sal das contas antigas."""
+    if not hash_armazenado.startswith("scrypt$"):
+        return hmac.compare_digest(hash_armazenado, hashlib.sha256(senha_fornecida.encode()).hexdigest())
+    _, n, r, p, sal, chave = hash_armazenado.split("$")
+    calculada = _scrypt(senha_fornecida, bytes.fromhex(sal), int(n), int(r), int(p))
+    return hmac.compare_digest(calculada.hex(), chave)
+
+def hash_precisa_atualizar(hash_armazenado):
+    """Hashes antigos (SHA-256) ou com custo diferente do atual são refeitos no próximo login."""
+    if not hash_armazenado.startswith("scrypt$"):
+        return True
+    n, r, p = (int(parte) for parte in hash_armazenado.split("$")[1:4])
+    return (n, r, p) != (CUSTO_SENHA['n'], CUSTO_SENHA['r'], CUSTO_SENHA['p'])
+
+class ServicoAutenticacao:
+    """
+    Verifica senhas num pool pequeno de threads (o scrypt libera o GIL), para a interface não
+    travar durante o login e para limitar quantos hashes caros rodam ao mesmo tempo na API.
+    Logins bem-sucedidos ficam num cache curto, indexado por um HMAC de usuário e senha com
+    chave aleatória do processo; repetir o login não roda o scrypt de novo enquanto o hash
+    guardado no banco for o mesmo. O registro, que também roda o scrypt, usa o mesmo pool, criado
+    só no primeiro uso.
+    """
+    def __init__(self, trabalhadores=2, duracao_cache=DURACAO_CACHE_CREDENCIAIS):
+        self.duracao_cache = duracao_cache
+        self.trabalhadores = trabalhadores
+        self._executor = None
+        self._chave_cache = os.urandom(32)
+        self._cache = {}
+        self._trava = threading.Lock()
+
+    def _chave(self, nome_usuario, senha):
+        return hmac.new(self._chave_cache, f"{nome_usuario}\0{senha}".encode(), hashlib.sha256).digest()
+
+    def verificar(self, nome_usuario, senha):
+        """Verificação síncrona; roda nas threads do pool."""
+        with conexao_bd(nome_usuario) as conexao:
+            resultado = conexao.execute("SELECT hash_senha FROM usuarios WHERE nome_usuario = ?", (nome_usuario,)).fetchone()
+        if not resultado:
+            return False
+        hash_armazenado, chave, agora = resultado[0], self._chave(nome_usuario, senha), time.time()
+        with self._trava:
+            em_cache = self._cache.get(chave)
+        if em_cache and em_cache[0] == hash_armazenado and em_cache[1] > agora:
+            METRICAS.incrementar('cache_credenciais:acertos')
+            return True
+        if not verificar_senha(hash_armazenado, senha):
+            return False
+        if hash_precisa_atualizar(hash_armazenado):
+            novo_hash = gerar_hash_senha(senha)
+            with conexao_bd(nome_usuario) as conexao:
+                atualizado = conexao.execute("UPDATE usuarios SET hash_senha = ? WHERE nome_usuario = ? AND hash_senha = ?",
+                                             (novo_hash, nome_usuario, hash_armazenado)).rowcount
+                conexao.commit()
+            if atualizado:
+                METRICAS.incrementar('hashes_senha_atualizados')
+                hash_armazenado = novo_hash
+        with self._trava:
+            if len(self._cache) > 10000:
+                self._cache = {c: v for c, v in self._cache.items() if v[1] > agora}
+            self._cache[chave] = (hash_armazenado, agora + self.duracao_cache)
+        return True
+
+    def _agendar(self, funcao, *args):
+        with self._trava:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix="autenticacao")
+        return self._executor.submit(funcao, *args)
 
+    def autenticar(self, nome_usuario, senha):
+        """Agenda a verificação no pool e retorna um Future com o resultado (bool)."""
+        return self._agendar(self.verificar, nome_usuario, senha)
+
+    def registrar(self, nome_usuario, senha, codigo_convite=None):
+        """Agenda 'registrar_usuario' no pool e retorna um Future com (registrado, indicador)."""
+        return self._agendar(registrar_usuario, nome_usuario, senha, codigo_convite)
+
+SERVICO_AUTENTICACAO = ServicoAutenticacao()
+
+def lancar_no_livro(cursor, nome_usuario, tipo, quantia, referencia=None):
+    """Insere um lançamento no livro-razão usando o cursor (e a transação) de quem chamou."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute("INSERT INTO livro_razao (nome_usuario, tipo, quantia, referencia, timestamp) VALUES (?, ?, ?, ?, ?)",
+                   (nome_usuario, tipo, quantia, referencia, timestamp))
+
+@medir
 def adicionar_usuario(nome_usuario, senha, saldo, codigo_referencia):
-    """Adiciona um novo usuário ao banco de dados."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
+    """Adiciona um novo usuário ao banco de dados, já com o depósito inicial lançado."""
     try:
-        cursor.execute("INSERT INTO usuarios (nome_usuario, hash_senha, saldo, codigo_referencia) VALUES (?, ?, ?, ?)",
-                       (nome_usuario, gerar_hash_senha(senha), saldo, codigo_referencia))
-        conexao.commit()
-        registrar_transacao(nome_usuario, 'deposito_inicial', saldo)
-        return True
+        with conexao_bd(nome_usuario) as conexao:
+            cursor = conexao.cursor()
+            cursor.execute("INSERT INTO usuarios (nome_usuario, hash_senha, saldo, codigo_referencia) VALUES (?, ?, 0, ?)",
+                           (nome_usuario, gerar_hash_senha(senha), codigo_referencia))
+            lancar_no_livro(cursor, nome_usuario, 'deposito_inicial', saldo)
+            cursor.execute("INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) VALUES (?, ?, ?, ?)",
+                           (nome_usuario, 'deposito_inicial', saldo, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            conexao.commit()
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conexao.close()
+    return True
+
+def autenticar_admin(nome_usuario, senha):
+    """Indica se as credenciais são as da conta do admin."""
+    return nome_usuario == USUARIO_ADMIN and hmac.compare_digest(senha.encode(), SENHA_ADMIN.encode())
 
+@medir
 def autenticar_usuario(nome_usuario, senha):
-    """Autentica um usuário, verificando nome e senha."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("SELECT hash_senha FROM usuarios WHERE nome_usuario = ?", (nome_usuario,))
-    resultado = cursor.fetchone()
-    conexao.close()
-    return bool(resultado and verificar_senha(resultado[0], senha))
+    """Autentica um usuário pelo pool do SERVICO_AUTENTICACAO, esperando o resultado."""
+    return SERVICO_AUTENTICACAO.autenticar(nome_usuario, senha).result()
 
+def calibrar_custo_senha(alvo_ms, expoentes=range(10, 21)):
+    """
+    Mede a verificação de senha para cada custo 2**expoente e retorna [(expoente, ms)] e o maior
+    expoente que fica dentro de 'alvo_ms' (no mínimo o primeiro testado).
+    """
+    medicoes, recomendado = [], expoentes[0]
+    for expoente in expoentes:
+        custo = dict(CUSTO_SENHA, n=2 ** expoente)
+        hash_teste = gerar_hash_senha("calibracao", custo)
+        amostras = []
+        for _ in range(3):
+            inicio = time.perf_counter()
+            verificar_senha(hash_teste, "calibracao")
+            amostras.append((time.perf_counter() - inicio) * 1000)
+        medicoes.append((expoente, sorted(amostras)[1]))
+        if medicoes[-1][1] > alvo_ms:
+            break
+        recomendado = expoente
+    return medicoes, recomendado
+
+@medir
 def obter_dados_usuario(nome_usuario):
     """Busca e retorna os dados de um usuário."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("SELECT saldo, codigo_referencia FROM usuarios WHERE nome_usuario = ?", (nome_usuario,))
-    resultado = cursor.fetchone()
-    conexao.close()
+    with conexao_bd(nome_usuario) as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("SELECT saldo, codigo_referencia FROM usuarios WHERE nome_usuario = ?", (nome_usuario,))
+        resultado = cursor.fetchone()
     return {'saldo': resultado[0], 'codigo_referencia': resultado[1]} if resultado else None
 
-def atualizar_saldo(nome_usuario, mudanca_quantia):
-    """Atualiza o saldo de um usuário."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("UPDATE usuarios SET saldo = saldo + ? WHERE nome_usuario = ?", (mudanca_quantia, nome_usuario))
-    conexao.commit()
-    conexao.close()
+@medir
+def atualizar_saldo(nome_usuario, mudanca_quantia, tipo='ajuste'):
+    """Atualiza o saldo de um usuário; como movimentar_saldo, lança no livro-razão e grava o log."""
+    movimentar_saldo(nome_usuario, mudanca_quantia, tipo)
+
+@medir
+def movimentar_saldo(nome_usuario, quantia, tipo_transacao):
+    """Lança uma transação (depósito, bônus, ajuste do admin...) e o seu log numa única transação."""
+    with conexao_bd(nome_usuario) as conexao:
+        cursor = conexao.cursor()
+        lancar_no_livro(cursor, nome_usuario, tipo_transacao, quantia)
+        cursor.execute("INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) VALUES (?, ?, ?, ?)",
+                       (nome_usuario, tipo_transacao, quantia, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        conexao.commit()
+
+@medir
+def debitar_aposta(nome_usuario, valor_aposta, jogo=None):
+    """
+    Debita o valor de uma aposta somente se houver saldo suficiente, numa única instrução.
+    Retorna False se o saldo não cobrir a aposta, mesmo com outras requisições concorrentes.
+    """
+    with conexao_bd(nome_usuario) as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("INSERT INTO livro_razao (nome_usuario, tipo, quantia, referencia, timestamp) "
+                       "SELECT ?, 'aposta', ?, ?, ? WHERE EXISTS (SELECT 1 FROM usuarios WHERE nome_usuario = ? AND saldo >= ?)",
+                       (nome_usuario, -valor_aposta, jogo, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), nome_usuario, valor_aposta))
+        conexao.commit()
+        return cursor.rowcount == 1
 
+@medir
+def liquidar_apostas_lote(jogo, liquidacoes, semente=None, cadeia=None):
+    """
+    Liquida várias apostas de uma vez, numa única transação (uma por shard, no modo com shards).
+    Cada item de 'liquidacoes' é (nome_usuario, valor_aposta, ganhos[, acoes]). O valor da aposta já
+    foi debitado quando ela foi feita, então aqui só os ganhos são creditados. Com a 'semente' da
+    rodada (e a 'cadeia', se ela veio de uma), cada liquidação também é gravada em 'rodadas'.
+    """
+    if not liquidacoes: return
+    if consulta_distribuida():
+        por_shard = defaultdict(list)
+        for liquidacao in liquidacoes:
+            por_shard[arquivo_bd_atual(liquidacao[0])].append(liquidacao)
+        for arquivo, parte in por_shard.items():
+            with usando_banco(arquivo):
+                liquidar_apostas_lote(jogo, parte, semente, cadeia)
+        return
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.executemany("INSERT INTO livro_razao (nome_usuario, tipo, quantia, referencia, timestamp) VALUES (?, 'pagamento', ?, ?, ?)",
+                           [(usuario, ganhos, jogo, timestamp) for usuario, _, ganhos, *_ in liquidacoes if ganhos > 0])
+        cursor.executemany("INSERT INTO logs_apostas (nome_usuario, jogo, valor_aposta, resultado, timestamp) VALUES (?, ?, ?, ?, ?)",
+                           [(usuario, jogo, aposta, ganhos - aposta, timestamp) for usuario, aposta, ganhos, *_ in liquidacoes])
+        if semente is not None:
+            cursor.executemany("INSERT INTO rodadas (nome_usuario, jogo, semente, acoes, valor_aposta, ganhos, timestamp, cadeia) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               [(usuario, jogo, semente, acoes[0] if acoes else "", aposta, ganhos, timestamp, cadeia)
+                                for usuario, aposta, ganhos, *acoes in liquidacoes])
+        conexao.commit()
+
+@medir
 def obter_todos_usuarios():
     """Retorna uma lista de todos os usuários e seus saldos."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("SELECT nome_usuario, saldo FROM usuarios")
-    usuarios = cursor.fetchall()
-    conexao.close()
-    return usuarios
-
+    if consulta_distribuida():
+        return [linha for parte in nos_shards(obter_todos_usuarios) for linha in parte]
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("SELECT nome_usuario, saldo FROM usuarios")
+        return cursor.fetchall()
+
+@medir
+def obter_resumo_usuarios():
+    """Retorna (quantidade de usuários, saldo total), lidos do snapshot de relatórios quando houver."""
+    if consulta_distribuida():
+        return tuple(map(sum, zip(*nos_shards(obter_resumo_usuarios))))
+    with conexao_relatorios() as conexao:
+        return conexao.execute("SELECT COUNT(*), COALESCE(SUM(saldo), 0) FROM usuarios").fetchone()
+
+@medir
 def deletar_usuario_bd(nome_usuario):
-    """Deleta um usuário do banco de dados."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("DELETE FROM usuarios WHERE nome_usuario = ?", (nome_usuario,))
-    conexao.commit()
-    conexao.close()
+    """
+    Deleta um usuário do banco de dados, zerando antes o seu saldo no livro-razão e nos logs,
+    para que um novo usuário com o mesmo nome não herde o histórico na reconciliação.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if consulta_distribuida():
+        nos_shards(_remover_indicacoes_feitas, nome_usuario)
+    with conexao_bd(nome_usuario) as conexao:
+        cursor = conexao.cursor()
+        # O log vem antes: o lançamento no livro-razão já zera o saldo projetado.
+        for tabela, colunas in (('logs_transacoes', 'nome_usuario, tipo_transacao, quantia, timestamp'),
+                                ('livro_razao', 'nome_usuario, tipo, quantia, timestamp')):
+            cursor.execute(f"INSERT INTO {tabela} ({colunas}) SELECT nome_usuario, 'encerramento', -saldo, ? "
+                           "FROM usuarios WHERE nome_usuario = ? AND saldo != 0", (timestamp, nome_usuario))
+        cursor.execute("DELETE FROM checkpoints_reconciliacao WHERE nome_usuario = ?", (nome_usuario,))
+        cursor.execute("DELETE FROM totais_arquivados WHERE nome_usuario = ?", (nome_usuario,))
+        cursor.execute("DELETE FROM indicacoes WHERE indicado = ? OR indicador = ?", (nome_usuario, nome_usuario))
+        cursor.execute("DELETE FROM usuarios WHERE nome_usuario = ?", (nome_usuario,))
+        conexao.commit()
+
+def _remover_indicacoes_feitas(indicador):
+    with conexao_bd() as conexao:
+        conexao.execute("DELETE FROM indicacoes WHERE indicador = ?", (indicador,))
+        conexao.commit()
+
+def gerar_codigo_referencia(tamanho=6):
+    """Gera um código de referência aleatório."""
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=tamanho))
 
+@medir
+def registrar_usuario(nome_usuario, senha, codigo_convite=None):
+    """
+    Registra um usuário numa única transação: a linha em 'usuarios', o depósito inicial e, se o
+    código de convite existir, o bônus do indicador e a aresta em 'indicacoes'. Se o código de
+    referência sorteado já existir, sorteia outro (até TENTATIVAS_CODIGO_REFERENCIA vezes).
+    No modo com shards, a aresta fica no shard do indicado e o bônus de um indicador de outro
+    shard é lançado logo depois, numa segunda transação no shard dele.
+    Retorna (registrado, indicador); 'registrado' é False quando o nome de usuário já existe.
+    """
+    # Com shards, o indicador é procurado antes de abrir a transação: a busca passa por todos os
+    # shards e não deve segurar a trava de escrita deste.
+    indicador_procurado = encontrar_usuario_por_referencia(codigo_convite) if codigo_convite and QUANTIDADE_SHARDS else None
+    for tentativa in range(TENTATIVAS_CODIGO_REFERENCIA):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with conexao_bd(nome_usuario) as conexao:
+                cursor = conexao.cursor()
+                cursor.execute("INSERT INTO usuarios (nome_usuario, hash_senha, saldo, codigo_referencia) VALUES (?, ?, 0, ?)",
+                               (nome_usuario, gerar_hash_senha(senha), gerar_codigo_referencia()))
+                lancamentos = [(nome_usuario, 'deposito_inicial', SALDO_INICIAL)]
+                indicador = bonus_em_outro_shard = None
+                if codigo_convite:
+                    if QUANTIDADE_SHARDS:
+                        indicador = indicador_procurado
+                    else:
+                        cursor.execute("SELECT nome_usuario FROM usuarios WHERE codigo_referencia = ?", (codigo_convite,))
+                        indicador = (cursor.fetchone() or (None,))[0]
+                    if indicador == nome_usuario:
+                        indicador = None
+                    if indicador:
+                        cursor.execute("INSERT INTO indicacoes (indicado, indicador, bonus, timestamp) VALUES (?, ?, ?, ?)",
+                                       (nome_usuario, indicador, BONUS_INDICACAO, timestamp))
+                        bonus_em_outro_shard = arquivo_bd_atual(indicador) != arquivo_bd_atual(nome_usuario)
+                        if not bonus_em_outro_shard:
+                            lancamentos.append((indicador, 'bonus_referencia', BONUS_INDICACAO))
+                for usuario, tipo, quantia in lancamentos:
+                    lancar_no_livro(cursor, usuario, tipo, quantia, nome_usuario if tipo == 'bonus_referencia' else None)
+                cursor.executemany("INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) VALUES (?, ?, ?, ?)",
+                                   [lancamento + (timestamp,) for lancamento in lancamentos])
+                conexao.commit()
+            if bonus_em_outro_shard:
+                with conexao_bd(indicador) as conexao:
+                    cursor = conexao.cursor()
+                    lancar_no_livro(cursor, indicador, 'bonus_referencia', BONUS_INDICACAO, nome_usuario)
+                    cursor.execute("INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) VALUES (?, ?, ?, ?)",
+                                   (indicador, 'bonus_referencia', BONUS_INDICACAO, timestamp))
+                    conexao.commit()
+            return True, indicador
+        except sqlite3.IntegrityError as erro:
+            if 'codigo_referencia' not in str(erro) or tentativa == TENTATIVAS_CODIGO_REFERENCIA - 1:
+                if 'nome_usuario' in str(erro):
+                    return False, None
+                raise
+            METRICAS.incrementar('colisao_codigo_referencia')
+
+@medir
 def encontrar_usuario_por_referencia(codigo_ref):
     """Encontra o nome de um usuário a partir do seu código de referência."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("SELECT nome_usuario FROM usuarios WHERE codigo_referencia = ?", (codigo_ref,))
-    resultado = cursor.fetchone()
-    conexao.close()
+    if consulta_distribuida():
+        return next(filter(None, nos_shards(encontrar_usuario_por_referencia, codigo_ref)), None)
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("SELECT nome_usuario FROM usuarios WHERE codigo_referencia = ?", (codigo_ref,))
+        resultado = cursor.fetchone()
     return resultado[0] if resultado else None
 
+# --- Árvore de Indicações ---
+
+def _ler_indicacoes():
+    with conexao_relatorios() as conexao:
+        return conexao.execute("SELECT indicado, indicador, bonus, timestamp FROM indicacoes").fetchall()
+
+@contextmanager
+def conexao_indicacoes():
+    """
+    Conexão para as consultas da árvore: a de relatórios ou, no modo com shards, uma base em
+    memória com as arestas de todos os shards, já que cada aresta fica no shard do indicado.
+    """
+    if not consulta_distribuida():
+        with conexao_relatorios() as conexao:
+            yield conexao
+        return
+    conexao = sqlite3.connect(":memory:", factory=ConexaoInstrumentada)
+    try:
+        conexao.execute("CREATE TABLE indicacoes (indicado TEXT PRIMARY KEY, indicador TEXT, bonus REAL, timestamp TEXT)")
+        conexao.execute("CREATE INDEX idx_indicacoes_indicador ON indicacoes (indicador)")
+        for arestas in nos_shards(_ler_indicacoes):
+            conexao.executemany("INSERT INTO indicacoes VALUES (?, ?, ?, ?)", arestas)
+        yield conexao
+    finally:
+        conexao.close()
+
+@medir
+def obter_arvore_indicacoes(raiz):
+    """
+    Percorre a árvore de indicações a partir de 'raiz' com uma CTE recursiva (cada passo usa o
+    índice por indicador). Retorna (usuario, nivel, indicados_diretos, bonus_recebido) em ordem de nível.
+    """
+    with conexao_indicacoes() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute('''
+            WITH RECURSIVE arvore (nome_usuario, nivel) AS (
+                SELECT ?, 0
+                UNION ALL
+                SELECT i.indicado, a.nivel + 1 FROM indicacoes i JOIN arvore a ON i.indicador = a.nome_usuario
+                WHERE a.nivel < ?
+            )
+            SELECT a.nome_usuario, a.nivel, COUNT(d.indicado), COALESCE(SUM(d.bonus), 0)
+            FROM arvore a LEFT JOIN indicacoes d ON d.indicador = a.nome_usuario
+            GROUP BY a.nome_usuario, a.nivel
+            ORDER BY a.nivel, a.nome_usuario
+        ''', (raiz, PROFUNDIDADE_MAXIMA_INDICACOES))
+        return cursor.fetchall()
+
+@medir
+def obter_resumo_indicacoes(limite=100):
+    """
+    Retorna os maiores indicadores como (usuario, indicados_diretos, total_na_arvore, bonus_recebido),
+    onde 'total_na_arvore' conta os indicados de todos os níveis abaixo do usuário.
+    """
+    with conexao_indicacoes() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute('''
+            WITH RECURSIVE descendentes (raiz, nome_usuario, nivel) AS (
+                SELECT indicador, indicado, 1 FROM indicacoes
+                UNION ALL
+                SELECT d.raiz, i.indicado, d.nivel + 1 FROM indicacoes i JOIN descendentes d ON i.indicador = d.nome_usuario
+                WHERE d.nivel < ?
+            ),
+            diretos AS (
+                SELECT indicador, COUNT(*) AS quantidade, SUM(bonus) AS bonus FROM indicacoes GROUP BY indicador
+            )
+            SELECT d.raiz, diretos.quantidade, COUNT(*) AS total, diretos.bonus
+            FROM descendentes d JOIN diretos ON diretos.indicador = d.raiz
+            GROUP BY d.raiz
+            ORDER BY total DESC, d.raiz
+            LIMIT ?
+        ''', (PROFUNDIDADE_MAXIMA_INDICACOES, limite))
+        return cursor.fetchall()
+
 # --- Funções de Configurações e Logs para Admin ---
 
+@medir
 def obter_configuracao_jogo(nome_configuracao):
-    """Busca uma configuração de jogo no banco de dados."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("SELECT valor FROM configuracoes_jogo WHERE nome_configuracao = ?", (nome_configuracao,))
-    resultado = cursor.fetchone()
-    conexao.close()
+    """Busca uma configuração de jogo no banco de dados (sempre o principal)."""
+    with conexao_bd(arquivo=ARQUIVO_BD) as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("SELECT valor FROM configuracoes_jogo WHERE nome_configuracao = ?", (nome_configuracao,))
+        resultado = cursor.fetchone()
     return resultado[0] if resultado else None
 
+@medir
 def definir_configuracao_jogo(nome_configuracao, valor):
-    """Atualiza uma configuração de jogo no banco de dados."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    cursor.execute("UPDATE configuracoes_jogo SET valor = ? WHERE nome_configuracao = ?", (valor, nome_configuracao))
-    conexao.commit()
-    conexao.close()
+    """Atualiza uma configuração de jogo no banco de dados (sempre o principal)."""
+    with conexao_bd(arquivo=ARQUIVO_BD) as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("UPDATE configuracoes_jogo SET valor = ? WHERE nome_configuracao = ?", (valor, nome_configuracao))
+        conexao.commit()
 
-def obter_logs(tipo_log='logs_apostas', filtro_usuario=None):
-    """Busca logs, com um filtro opcional por usuário."""
-    conexao = sqlite3.connect(ARQUIVO_BD)
-    cursor = conexao.cursor()
-    consulta = f"SELECT * FROM {tipo_log}"
-    parametros = []
+@medir
+def obter_logs(tipo_log='logs_apostas', filtro_usuario=None, inicio=None, fim=None, limite=100):
+    """
+    Busca os logs mais recentes, com filtros opcionais por usuário e por período ('inicio' e 'fim'
+    como 'AAAA-MM-DD HH:MM:SS'). Com período, os arquivos mensais que o cobrem também são
+    consultados, anexados um de cada vez com ATTACH, do mês mais novo para o mais velho.
+    """
+    if tipo_log not in TABELAS_LOG:
+        raise ValueError(f"Tipo de log desconhecido: {tipo_log}")
+    if consulta_distribuida():
+        partes = nos_shards(obter_logs, tipo_log, filtro_usuario, inicio, fim, limite)
+        return list(itertools.islice(heapq.merge(*partes, key=lambda linha: linha[-1], reverse=True), limite))
+    condicoes, parametros = [], []
     if filtro_usuario:
-        consulta += " WHERE nome_usuario LIKE ?"
-        parametros.append(f"%{filtro_usuario}%")
-    consulta += " ORDER BY timestamp DESC LIMIT 100"
-    cursor.execute(consulta, parametros)
-    logs = cursor.fetchall()
+        condicoes.append("nome_usuario LIKE ?"); parametros.append(f"%{filtro_usuario}%")
+    if inicio:
+        condicoes.append("timestamp >= ?"); parametros.append(inicio)
+    if fim:
+        condicoes.append("timestamp <= ?"); parametros.append(fim)
+    filtro = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    consulta = "SELECT * FROM {}." + tipo_log + filtro + f" ORDER BY timestamp DESC LIMIT {int(limite)}"
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute(consulta.format("main"), parametros)
+        logs = cursor.fetchall()
+        if not (inicio or fim):
+            return logs
+        for mes in reversed(meses_arquivados()):
+            fim_mes = f"{_proximo_mes(mes)}-01 00:00:00"
+            if fim and fim < f"{mes}-01 00:00:00":
+                continue
+            if (inicio and fim_mes <= inicio) or (len(logs) >= limite and logs[limite - 1][-1] >= fim_mes):
+                break
+            cursor.execute("ATTACH DATABASE ? AS arquivo", (caminho_arquivo_mes(mes),))
+            try:
+                cursor.execute("SELECT 1 FROM arquivo.sqlite_master WHERE type = 'table' AND name = ?", (tipo_log,))
+                if cursor.fetchone():
+                    cursor.execute(consulta.format("arquivo"), parametros)
+                    logs = sorted(logs + cursor.fetchall(), key=lambda linha: linha[-1], reverse=True)[:limite]
+            finally:
+                cursor.execute("DETACH DATABASE arquivo")
+        return logs
+
+# --- Retenção e Arquivo de Logs ---
+
+# Tabela de log: (marca d'água dos agregados, coluna do checkpoint de reconciliação, coluna somada no total arquivado).
+RETENCAO_LOGS = {
+    'logs_apostas': ('agregados_apostas', 'ultimo_id_aposta', 'resultado'),
+    'logs_transacoes': ('agregados_transacoes', 'ultimo_id_transacao', 'quantia'),
+}
+
+def pasta_arquivo_logs():
+    """Pasta dos arquivos mensais de logs, ao lado do banco principal (uma subpasta por shard)."""
+    pasta = os.path.join(os.path.dirname(os.path.abspath(ARQUIVO_BD)), "arquivo_logs")
+    if arquivo_bd_atual() != ARQUIVO_BD:
+        pasta = os.path.join(pasta, os.path.splitext(os.path.basename(arquivo_bd_atual()))[0])
+    return pasta
+
+def _proximo_mes(mes):
+    ano, numero = int(mes[:4]), int(mes[5:7])
+    return f"{ano + numero // 12:04d}-{numero % 12 + 1:02d}"
+
+def meses_arquivados():
+    """Meses ('AAAA-MM') que têm arquivo, comprimido ou não, do mais antigo ao mais novo."""
+    pasta = pasta_arquivo_logs()
+    if not os.path.isdir(pasta):
+        return []
+    return sorted({nome[5:12].replace('_', '-') for nome in os.listdir(pasta)
+                   if nome.startswith("logs_") and nome.endswith((".db", ".db.gz"))})
+
+def caminho_arquivo_mes(mes, para_escrita=False):
+    """
+    Caminho do arquivo SQLite de um mês. Se só houver a versão comprimida, ela é descomprimida:
+    no lugar do .gz quando for para escrita, ou numa cópia temporária (reaproveitada enquanto o
+    .gz não mudar) quando for só para leitura.
+    """
+    base = os.path.join(pasta_arquivo_logs(), f"logs_{mes.replace('-', '_')}.db")
+    comprimido = base + ".gz"
+    if os.path.exists(base) or not os.path.exists(comprimido):
+        return base
+    import gzip, shutil, tempfile
+    destino = base if para_escrita else os.path.join(tempfile.gettempdir(), "purobet_arquivo",
+                                                     os.path.relpath(base, os.path.dirname(os.path.abspath(ARQUIVO_BD))))
+    if not para_escrita and os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(comprimido):
+        return destino
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with gzip.open(comprimido, 'rb') as origem, open(destino + ".tmp", 'wb') as saida:
+        shutil.copyfileobj(origem, saida)
+    os.replace(destino + ".tmp", destino)
+    if para_escrita:
+        os.remove(comprimido)
+    return destino
+
+def comprimir_arquivo_mes(mes):
+    """Compacta (VACUUM) e comprime com gzip o arquivo de um mês que não recebe mais linhas."""
+    base = caminho_arquivo_mes(mes)
+    if not os.path.exists(base):
+        return
+    conexao = sqlite3.connect(base)
+    conexao.execute("VACUUM")
     conexao.close()
-    return logs
-
-# --- SEÇÃO 2: CARREGADOR DE IMAGENS E WIDGETS CUSTOMIZADOS ---
+    import gzip, shutil
+    with open(base, 'rb') as origem, gzip.open(base + ".gz.tmp", 'wb') as saida:
+        shutil.copyfileobj(origem, saida)
+    os.replace(base + ".gz.tmp", base + ".gz")
+    os.remove(base)
+
+@medir
+def arquivar_logs(dias=None, tamanho_lote=5000, compactar=False):
+    """
+    Move para arquivos mensais ('arquivo_logs/logs_AAAA_MM.db') as linhas de log mais velhas que
+    'dias' (padrão: configuração 'retencao_logs_dias'), em transações de até 'tamanho_lote' ids.
+    Só saem linhas que os agregados já processaram, porque eles só leem o banco principal. A soma
+    das linhas movidas de cada usuário vai, na mesma transação, para 'totais_arquivados', que a
+    reconciliação usa no lugar delas. Com 'compactar', cada mês já encerrado é comprimido.
+    Retorna {tabela: linhas movidas}.
+    """
+    if consulta_distribuida():
+        partes = nos_shards(arquivar_logs, dias, tamanho_lote, compactar)
+        return {tabela: sum(parte[tabela] for parte in partes) for tabela in RETENCAO_LOGS}
+    dias = obter_configuracao_jogo('retencao_logs_dias') if dias is None else dias
+    corte = (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d %H:%M:%S")
+    os.makedirs(pasta_arquivo_logs(), exist_ok=True)
+    movidas, meses_encerrados = {}, set()
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        for tabela, (nome_marca, coluna_checkpoint, coluna_valor) in RETENCAO_LOGS.items():
+            movidas[tabela] = 0
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,))
+            criar_tabela = cursor.fetchone()[0].replace(f"CREATE TABLE {tabela}", f"CREATE TABLE IF NOT EXISTS arquivo.{tabela}", 1)
+            cursor.execute("SELECT COALESCE((SELECT ultimo_id FROM marcas_processamento WHERE nome = ?), 0)", (nome_marca,))
+            marca = cursor.fetchone()[0]
+            elegiveis = "t.id BETWEEN ? AND ? AND t.timestamp >= ? AND t.timestamp < ? AND t.id <= ?"
+            checkpoint = f"COALESCE((SELECT c.{coluna_checkpoint} FROM checkpoints_reconciliacao c WHERE c.nome_usuario = t.nome_usuario), 0)"
+            cursor.execute(f"SELECT substr(MIN(timestamp), 1, 7) FROM {tabela}")
+            mes = cursor.fetchone()[0]
+            while mes and f"{mes}-01 00:00:00" < corte:
+                inicio_mes, fim = f"{mes}-01 00:00:00", min(f"{_proximo_mes(mes)}-01 00:00:00", corte)
+                cursor.execute(f"SELECT MIN(id), MAX(id) FROM {tabela} WHERE timestamp >= ? AND timestamp < ?", (inicio_mes, fim))
+                id_minimo, id_maximo = cursor.fetchone()
+                if id_minimo is not None:
+                    cursor.execute("ATTACH DATABASE ? AS arquivo", (caminho_arquivo_mes(mes, para_escrita=True),))
+                    try:
+                        cursor.execute(criar_tabela)
+                        cursor.execute(f"CREATE INDEX IF NOT EXISTS arquivo.idx_{tabela}_usuario ON {tabela} (nome_usuario, id)")
+                        cursor.execute(f"CREATE INDEX IF NOT EXISTS arquivo.idx_{tabela}_timestamp ON {tabela} (timestamp)")
+                        for id_lote in range(id_minimo, id_maximo + 1, tamanho_lote):
+                            parametros = (id_lote, id_lote + tamanho_lote - 1, inicio_mes, fim, marca)
+                            cursor.execute(f"INSERT OR IGNORE INTO arquivo.{tabela} SELECT * FROM main.{tabela} AS t WHERE {elegiveis}", parametros)
+                            cursor.execute(f'''
+                                INSERT INTO main.totais_arquivados (nome_usuario, total, pendente)
+                                SELECT t.nome_usuario, SUM(t.{coluna_valor}), SUM(CASE WHEN t.id > {checkpoint} THEN t.{coluna_valor} ELSE 0 END)
+                                FROM main.{tabela} AS t WHERE {elegiveis} GROUP BY t.nome_usuario
+                                ON CONFLICT (nome_usuario) DO UPDATE SET total = total + excluded.total, pendente = pendente + excluded.pendente
+                            ''', parametros)
+                            cursor.execute(f"DELETE FROM main.{tabela} AS t WHERE {elegiveis}", parametros)
+                            movidas[tabela] += cursor.rowcount
+                            conexao.commit()
+                    finally:
+                        conexao.rollback()
+                        cursor.execute("DETACH DATABASE arquivo")
+                if fim < corte:
+                    meses_encerrados.add(mes)
+                mes = _proximo_mes(mes)
+    if compactar:
+        for mes in sorted(meses_encerrados):
+            comprimir_arquivo_mes(mes)
+    return movidas
+
+# --- Livro-Razão: Snapshots e Reprodução ---
+
+# Intervalo, em segundos, entre as rodadas de snapshots de saldo.
+INTERVALO_SNAPSHOTS = 600
+
+@medir
+def criar_snapshots_saldo():
+    """
+    Grava um snapshot do saldo de cada usuário com lançamentos novos desde a última rodada,
+    calculado a partir do snapshot anterior mais esses lançamentos. Retorna quantos foram criados.
+    """
+    if consulta_distribuida():
+        return sum(nos_shards(criar_snapshots_saldo))
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("SELECT ultimo_id FROM marcas_processamento WHERE nome = 'snapshots_saldo'")
+        linha = cursor.fetchone()
+        marca = linha[0] if linha else 0
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM livro_razao")
+        nova_marca = cursor.fetchone()[0]
+        if nova_marca == marca:
+            return 0
+        cursor.execute('''
+            INSERT INTO snapshots_saldo (nome_usuario, ultimo_id_livro, saldo, timestamp)
+            SELECT a.nome_usuario, a.ultimo_id,
+                   COALESCE((SELECT s.saldo FROM snapshots_saldo s WHERE s.nome_usuario = a.nome_usuario
+                             ORDER BY s.ultimo_id_livro DESC LIMIT 1), 0)
+                   + (SELECT SUM(l.quantia) FROM livro_razao l WHERE l.nome_usuario = a.nome_usuario AND l.id <= a.ultimo_id
+                        AND l.id > COALESCE((SELECT MAX(s.ultimo_id_livro) FROM snapshots_saldo s WHERE s.nome_usuario = a.nome_usuario), 0)),
+                   ?
+            FROM (SELECT nome_usuario, MAX(id) AS ultimo_id FROM livro_razao WHERE id > ? AND id <= ? GROUP BY nome_usuario) a
+        ''', (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), marca, nova_marca))
+        criados = cursor.rowcount
+        cursor.execute("INSERT OR REPLACE INTO marcas_processamento (nome, ultimo_id) VALUES ('snapshots_saldo', ?)", (nova_marca,))
+        conexao.commit()
+    return criados
+
+@medir
+def recalcular_saldo(nome_usuario):
+    """Recalcula o saldo pelo livro-razão: último snapshot do usuário mais os lançamentos seguintes."""
+    with conexao_bd(nome_usuario) as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("SELECT ultimo_id_livro, saldo FROM snapshots_saldo WHERE nome_usuario = ? ORDER BY ultimo_id_livro DESC LIMIT 1",
+                       (nome_usuario,))
+        ultimo_id, saldo = cursor.fetchone() or (0, 0.0)
+        cursor.execute("SELECT COALESCE(SUM(quantia), 0) FROM livro_razao WHERE nome_usuario = ? AND id > ?", (nome_usuario, ultimo_id))
+        return saldo + cursor.fetchone()[0]
+
+@medir
+def reproduzir_livro(corrigir=False):
+    """
+    Reproduz o livro-razão inteiro, lançamento por lançamento, e compara o resultado com a
+    projeção em 'usuarios.saldo'. A leitura segue o índice (nome_usuario, id) em streaming, com
+    um usuário por vez em memória. Retorna a lista de (nome_usuario, saldo_projetado, saldo_reproduzido)
+    que divergem; com 'corrigir', a projeção desses usuários é reescrita.
+    """
+    if consulta_distribuida():
+        return [divergencia for parte in nos_shards(reproduzir_livro, corrigir) for divergencia in parte]
+    divergencias = []
+    with conexao_bd() as conexao:
+        lancamentos = conexao.cursor()
+        lancamentos.execute("SELECT nome_usuario, quantia FROM livro_razao ORDER BY nome_usuario, id")
+        projecao = conexao.cursor()
+        projecao.execute("SELECT nome_usuario, saldo FROM usuarios ORDER BY nome_usuario")
+        saldos = ((nome, sum(quantia for _, quantia in grupo)) for nome, grupo in itertools.groupby(lancamentos, key=lambda l: l[0]))
+        reproduzido = next(saldos, None)
+        for nome_usuario, saldo in projecao:
+            # Lançamentos de usuários que já foram excluídos ficam para trás.
+            while reproduzido and reproduzido[0] < nome_usuario:
+                reproduzido = next(saldos, None)
+            esperado = 0.0
+            if reproduzido and reproduzido[0] == nome_usuario:
+                esperado = reproduzido[1]
+                reproduzido = next(saldos, None)
+            if abs(esperado - saldo) > 1e-6:
+                divergencias.append((nome_usuario, saldo, esperado))
+        if corrigir and divergencias:
+            conexao.executemany("UPDATE usuarios SET saldo = ? WHERE nome_usuario = ?", [(e, n) for n, _, e in divergencias])
+            conexao.commit()
+    return divergencias
+
+# --- Agregados por Período ---
+
+INTERVALO_AGREGADOS = 60
+# Granularidade: (tamanho do prefixo do timestamp, complemento para formar o início do período, duração).
+GRANULARIDADES = {
+    'minuto': (16, ':00', timedelta(minutes=1)),
+    'hora': (13, ':00:00', timedelta(hours=1)),
+    'dia': (10, ' 00:00:00', timedelta(days=1)),
+}
+# Métrica do gráfico: (tabela, expressão SQL sobre o período).
+METRICAS_AGREGADAS = {
+    'Apostas': ('agregados_apostas', 'apostas'),
+    'Total apostado': ('agregados_apostas', 'total_apostado'),
+    'Total pago': ('agregados_apostas', 'total_pago'),
+    'Lucro da casa': ('agregados_apostas', 'total_apostado - total_pago'),
+    'Usuários ativos': ('agregados_apostas', 'usuarios_ativos'),
+    'Entradas': ('agregados_transacoes', 'entradas'),
+    'Saídas': ('agregados_transacoes', 'saidas'),
+}
+
+@medir
+def atualizar_agregados():
+    """
+    Soma aos agregados de cada granularidade só as linhas de 'logs_apostas' e 'logs_transacoes'
+    posteriores à marca d'água de cada tabela, e avança as marcas na mesma transação.
+    Retorna quantas linhas de log foram processadas.
+    """
+    if consulta_distribuida():
+        return sum(nos_shards(atualizar_agregados))
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        marcas = dict(cursor.execute("SELECT nome, ultimo_id FROM marcas_processamento WHERE nome IN ('agregados_apostas', 'agregados_transacoes')").fetchall())
+        marca_apostas, marca_transacoes = marcas.get('agregados_apostas', 0), marcas.get('agregados_transacoes', 0)
+        cursor.execute("SELECT (SELECT COALESCE(MAX(id), 0) FROM logs_apostas), (SELECT COALESCE(MAX(id), 0) FROM logs_transacoes)")
+        nova_apostas, nova_transacoes = cursor.fetchone()
+        if (nova_apostas, nova_transacoes) == (marca_apostas, marca_transacoes):
+            return 0
+        for granularidade, (prefixo, complemento, duracao) in GRANULARIDADES.items():
+            periodo = f"substr(timestamp, 1, {prefixo}) || '{complemento}'"
+            novas_apostas = (f"SELECT {periodo} AS inicio, jogo, nome_usuario, valor_aposta, resultado FROM logs_apostas WHERE id > ? AND id <= ? "
+                             f"UNION ALL SELECT {periodo}, '*', nome_usuario, valor_aposta, resultado FROM logs_apostas WHERE id > ? AND id <= ?")
+            intervalo = (marca_apostas, nova_apostas) * 2
+            cursor.execute(f'''
+                INSERT INTO agregados_apostas (granularidade, inicio, jogo, apostas, total_apostado, total_pago, usuarios_ativos)
+                SELECT ?, inicio, jogo, COUNT(*), SUM(valor_aposta), SUM(valor_aposta + resultado), 0
+                FROM ({novas_apostas}) GROUP BY inicio, jogo
+                ON CONFLICT (granularidade, jogo, inicio) DO UPDATE SET apostas = apostas + excluded.apostas, total_apostado = total_apostado + excluded.total_apostado,
+                    total_pago = total_pago + excluded.total_pago
+            ''', (granularidade,) + intervalo)
+            # Usuários ativos: conta só quem ainda não tinha aparecido no período.
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS novos_ativos (inicio TEXT, jogo TEXT, nome_usuario TEXT, "
+                           "PRIMARY KEY (inicio, jogo, nome_usuario)) WITHOUT ROWID")
+            cursor.execute("DELETE FROM novos_ativos")
+            cursor.execute(f'''
+                INSERT INTO novos_ativos SELECT DISTINCT n.inicio, n.jogo, n.nome_usuario FROM ({novas_apostas}) n
+                WHERE NOT EXISTS (SELECT 1 FROM agregados_usuarios_ativos a WHERE a.granularidade = ? AND a.inicio = n.inicio
+                                  AND a.jogo = n.jogo AND a.nome_usuario = n.nome_usuario)
+            ''', intervalo + (granularidade,))
+            cursor.execute("INSERT INTO agregados_usuarios_ativos SELECT ?, inicio, jogo, nome_usuario FROM novos_ativos", (granularidade,))
+            cursor.execute('''
+                UPDATE agregados_apostas SET usuarios_ativos = usuarios_ativos +
+                    (SELECT COUNT(*) FROM novos_ativos n WHERE n.inicio = agregados_apostas.inicio AND n.jogo = agregados_apostas.jogo)
+                WHERE granularidade = ? AND (inicio, jogo) IN (SELECT inicio, jogo FROM novos_ativos)
+            ''', (granularidade,))
+            # Períodos já fechados não recebem mais apostas: a lista de quem foi contado neles pode sair.
+            cursor.execute("SELECT MAX(inicio) FROM agregados_apostas WHERE granularidade = ?", (granularidade,))
+            ultimo_periodo = cursor.fetchone()[0]
+            if ultimo_periodo:
+                limite = (datetime.strptime(ultimo_periodo, "%Y-%m-%d %H:%M:%S") - duracao).strftime("%Y-%m-%d %H:%M:%S")
+                cursor.execute("DELETE FROM agregados_usuarios_ativos WHERE granularidade = ? AND inicio < ?", (granularidade, limite))
+
+            cursor.execute(f'''
+                INSERT INTO agregados_transacoes (granularidade, inicio, transacoes, entradas, saidas)
+                SELECT ?, {periodo}, COUNT(*), SUM(MAX(quantia, 0)), SUM(MAX(-quantia, 0))
+                FROM logs_transacoes WHERE id > ? AND id <= ? GROUP BY 2
+                ON CONFLICT (granularidade, inicio) DO UPDATE SET transacoes = transacoes + excluded.transacoes, entradas = entradas + excluded.entradas,
+                    saidas = saidas + excluded.saidas
+            ''', (granularidade, marca_transacoes, nova_transacoes))
+        cursor.executemany("INSERT OR REPLACE INTO marcas_processamento (nome, ultimo_id) VALUES (?, ?)",
+                           [('agregados_apostas', nova_apostas), ('agregados_transacoes', nova_transacoes)])
+        conexao.commit()
+    return (nova_apostas - marca_apostas) + (nova_transacoes - marca_transacoes)
 
-class CarregadorImagens:
+@medir
+def obter_serie_agregada(metrica, granularidade, inicio=None, fim=None, jogo=None):
+    """
+    Retorna [(inicio_do_periodo, valor)] de uma métrica de METRICAS_AGREGADAS entre 'inicio' e 'fim'
+    (textos 'AAAA-MM-DD HH:MM:SS'), lendo só as tabelas de agregados. Sem 'jogo', soma todos.
+    No modo com shards, soma as séries de cada shard (cada usuário está num só shard, então
+    até os usuários ativos podem ser somados).
+    """
+    if consulta_distribuida():
+        soma = defaultdict(float)
+        for parte in nos_shards(obter_serie_agregada, metrica, granularidade, inicio, fim, jogo):
+            for periodo, valor in parte:
+                soma[periodo] += valor
+        return sorted(soma.items())
+    tabela, expressao = METRICAS_AGREGADAS[metrica]
+    condicoes, parametros = ["granularidade = ?", "inicio >= ?", "inicio <= ?"], [granularidade, inicio or "", fim or "9999"]
+    if tabela == 'agregados_apostas':
+        condicoes.append("jogo = ?"); parametros.append(jogo or '*')
+    with conexao_relatorios() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute(f"SELECT inicio, {expressao} FROM {tabela} WHERE {' AND '.join(condicoes)} ORDER BY inicio", parametros)
+        return cursor.fetchall()
+
+# --- Backups e Snapshot de Leitura ---
+
+INTERVALO_SNAPSHOT_LEITURA = 60
+INTERVALO_BACKUP = 3600
+BACKUPS_MANTIDOS = 24
+PAGINAS_POR_PASSO_BACKUP = 256
+PAUSA_BACKUP = 0.005
+
+# Última atualização do snapshot de leitura e último backup feitos por este processo.
+ESTADO_BACKUP = {'snapshot_em': None, 'snapshot_ms': None, 'backup_em': None, 'backup_ms': None, 'backup_arquivo': None}
+
+class _CopiaReiniciada(Exception):
+    """A origem mudou no meio da cópia em passos e o SQLite a recomeçaria do início."""
+
+def caminho_snapshot_leitura():
+    return f"{os.path.splitext(arquivo_bd_atual())[0]}_leitura.db"
+
+def copiar_banco(destino, paginas_por_passo=PAGINAS_POR_PASSO_BACKUP, pausa=PAUSA_BACKUP, tentativas=3):
     """
-    Classe Singleton para carregar e armazenar em cache as imagens, otimizando a performance.
+    Copia o banco em uso (o principal ou o shard fixado na thread) para 'destino' pela API de backup do SQLite, 'paginas_por_passo' páginas
+    por vez, com uma pausa entre os passos para não disputar o disco com o jogo. Uma escrita de
+    outra conexão no meio faz o SQLite recomeçar a cópia; depois de 'tentativas' recomeços ela é
+    feita num passo só (no modo WAL a leitura não bloqueia quem escreve). O destino só é
+    substituído quando a cópia termina. Retorna a duração em ms.
     """
-    _instancia = None
-    def __new__(cls, *args, **kwargs):
-        if not cls._instancia:
-            cls._instancia = super(CarregadorImagens, cls).__new__(cls)
-            cls._instancia.cache_ctk = {}
-            cls._instancia.cache_photo = {}
-        return cls._instancia
+    inicio = time.perf_counter()
+    temporario = f"{destino}.tmp"
+    for tentativa in range(tentativas + 1):
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        origem, copia = sqlite3.connect(arquivo_bd_atual(), timeout=TIMEOUT_BD), sqlite3.connect(temporario)
+        restante_anterior = None
+        def progresso(status, restante, total):
+            nonlocal restante_anterior
+            if restante_anterior is not None and restante > restante_anterior:
+                raise _CopiaReiniciada()
+            restante_anterior = restante
+            time.sleep(pausa)
+        try:
+            if tentativa < tentativas:
+                origem.backup(copia, pages=paginas_por_passo, progress=progresso)
+            else:
+                origem.backup(copia)
+            # A cópia herda o modo WAL; sem isso ela não abriria em modo somente leitura.
+            copia.execute("PRAGMA journal_mode = DELETE")
+            break
+        except _CopiaReiniciada:
+            METRICAS.incrementar('copiar_banco:reinicios')
+        finally:
+            origem.close()
+            copia.close()
+    os.replace(temporario, destino)
+    return (time.perf_counter() - inicio) * 1000
+
+@medir
+def atualizar_snapshot_leitura():
+    """Renova a cópia somente leitura usada pelos relatórios do admin (uma por shard, em paralelo)."""
+    if consulta_distribuida():
+        ESTADO_BACKUP['snapshot_ms'] = max(nos_shards(lambda: copiar_banco(caminho_snapshot_leitura())))
+    else:
+        ESTADO_BACKUP['snapshot_ms'] = copiar_banco(caminho_snapshot_leitura())
+    ESTADO_BACKUP['snapshot_em'] = time.time()
+
+@medir
+def fazer_backup(pasta=None, manter=BACKUPS_MANTIDOS):
+    """
+    Grava um backup datado em 'pasta' (padrão: 'backups' ao lado do banco) e apaga os mais antigos
+    que 'manter'. No modo com shards, cada shard ganha o seu backup antes do banco principal.
+    """
+    if consulta_distribuida():
+        nos_shards(fazer_backup, pasta, manter)
+    pasta = pasta or os.path.join(os.path.dirname(os.path.abspath(ARQUIVO_BD)), "backups")
+    os.makedirs(pasta, exist_ok=True)
+    prefixo = os.path.splitext(os.path.basename(arquivo_bd_atual()))[0]
+    destino = os.path.join(pasta, f"{prefixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+    ESTADO_BACKUP['backup_ms'] = copiar_banco(destino)
+    ESTADO_BACKUP['backup_em'], ESTADO_BACKUP['backup_arquivo'] = time.time(), destino
+    antigos = sorted(nome for nome in os.listdir(pasta) if nome.startswith(f"{prefixo}_") and nome.endswith(".db"))
+    for nome in antigos[:-manter] if manter else []:
+        os.remove(os.path.join(pasta, nome))
+    return destino
+
+@contextmanager
+def conexao_relatorios():
+    """
+    Conexão para os relatórios pesados do admin: o snapshot de leitura, se este processo o está
+    mantendo, para não disputar o banco com o jogo; senão, o próprio banco principal.
+    """
+    if ESTADO_BACKUP['snapshot_em'] is None:
+        with conexao_bd() as conexao:
+            yield conexao
+        return
+    conexao = conectar_somente_leitura(caminho_snapshot_leitura())
+    try:
+        yield conexao
+    finally:
+        conexao.close()
 
-    def obter_imagem_ctk(self, nome_carta="back"):
-        """Retorna uma imagem no formato CTkImage."""
-        if nome_carta in self.cache_ctk:
-            return self.cache_ctk[nome_carta]
+def descrever_estado_backup():
+    """Texto curto com a idade do snapshot de leitura e a duração do último backup."""
+    agora, partes = time.time(), []
+    if ESTADO_BACKUP['snapshot_em'] is None:
+        partes.append("Relatórios lidos do banco principal (snapshot ainda não criado)")
+    else:
+        partes.append(f"Snapshot dos relatórios: há {agora - ESTADO_BACKUP['snapshot_em']:.0f}s (cópia em {ESTADO_BACKUP['snapshot_ms']:.0f} ms)")
+    if ESTADO_BACKUP['backup_em'] is not None:
+        partes.append(f"último backup há {(agora - ESTADO_BACKUP['backup_em']) / 60:.0f} min (em {ESTADO_BACKUP['backup_ms']:.0f} ms)")
+    return " · ".join(partes)
 
-        mapa_ranks = {'A': 'ace', 'K': 'king', 'Q': 'queen', 'J': 'jack', 'T': '10'}
+# --- Reconciliação de Saldos ---
 
-        if nome_carta == "back":
-            caminho_arquivo = os.path.join("cards", "back.png")
-        else:
-            naipe, rank = nome_carta.split('_')
-            rank_str = mapa_ranks.get(rank, rank)
-            nome_arquivo = f"{rank_str}_of_{naipe}.png"
-            caminho_arquivo = os.path.join("cards", nome_arquivo)
+def conectar_somente_leitura(arquivo):
+    """Abre o banco em modo somente leitura, sem risco de travar escritas de quem está jogando."""
+    return sqlite3.connect(f"file:{arquivo}?mode=ro", uri=True, timeout=TIMEOUT_BD, factory=ConexaoInstrumentada)
 
-        try:
-            imagem = Image.open(caminho_arquivo)
-            imagem = imagem.resize((70, 100), Image.LANCZOS)
-            imagem_ctk = ctk.CTkImage(light_image=imagem, dark_image=imagem, size=(70, 100))
-            self.cache_ctk[nome_carta] = imagem_ctk
-            return imagem_ctk
-        except FileNotFoundError:
-            print(f"ERRO: Imagem não encontrada em {caminho_arquivo}.")
-            return None
-
-    def obter_imagem_photo(self, nome, tamanho=(80, 50)):
-        """Retorna uma imagem no formato PhotoImage, para uso no Canvas."""
-        if nome in self.cache_photo:
-            return self.cache_photo[nome]
-
-        caminho_arquivo = os.path.join("cards", f"{nome}.png")
-        try:
-            imagem = Image.open(caminho_arquivo).resize(tamanho, Image.LANCZOS)
-            imagem_photo = ImageTk.PhotoImage(imagem)
-            self.cache_photo[nome] = imagem_photo
-            return imagem_photo
-        except FileNotFoundError:
-            print(f"ERRO: Imagem '{nome}.png' não encontrada.")
-            return None
-
-class CaixaMensagem(ctk.CTkToplevel):
-    """Janela de mensagem customizada."""
-    def __init__(self, parent, titulo="Mensagem", mensagem=""):
-        super().__init__(parent)
-        self.title(titulo)
-        self.geometry("350x150")
-        self.transient(parent)
-        self.grab_set()
-        self.resizable(False, False)
-        ctk.CTkLabel(self, text=mensagem, wraplength=320, font=ctk.CTkFont(size=14)).pack(pady=20, padx=15, expand=True, fill="both")
-        ctk.CTkButton(self, text="OK", command=self.destroy, width=100).pack(pady=10)
-        self.after(100, self.lift)
-
-class CaixaDialogo(ctk.CTkToplevel):
-    """Janela de entrada de dados customizada."""
-    def __init__(self, parent, titulo="Entrada", texto="Insira um valor:"):
-        super().__init__(parent)
-        self.title(titulo)
-        self.geometry("300x150")
-        self.transient(parent)
-        self.grab_set()
-        self._resultado = None
-        ctk.CTkLabel(self, text=texto).pack(pady=10, padx=10)
-        self.entrada = ctk.CTkEntry(self, width=250)
-        self.entrada.pack(pady=5, padx=10)
-        self.entrada.focus()
-        frame_botoes = ctk.CTkFrame(self, fg_color="transparent")
-        frame_botoes.pack(pady=10)
-        ctk.CTkButton(frame_botoes, text="OK", command=self._evento_ok).pack(side="left", padx=10)
-        ctk.CTkButton(frame_botoes, text="Cancelar", command=self._evento_cancelar, fg_color="#D32F2F", hover_color="#B71C1C").pack(side="left", padx=10)
-        self.protocol("WM_DELETE_WINDOW", self._evento_cancelar)
-        self.entrada.bind("<Return>", self._evento_ok)
-        self.after(100, self.lift)
-
-    def _evento_ok(self, event=None):
-        self._resultado = self.entrada.get()
-        self.destroy()
-
-    def _evento_cancelar(self):
-        self._resultado = None
-        self.destroy()
-
-    def obter_entrada(self):
-        self.wait_window()
-        try:
-            return int(self._resultado) if self._resultado else None
-        except (ValueError, TypeError):
-            return self._resultado
-
-# --- SEÇÃO 3: CONTROLADOR PRINCIPAL DA APLICAÇÃO ---
-
-class AppPurobet(ctk.CTk):
-    """
-    Classe principal da aplicação, que gerencia a janela e a transição entre telas.
-    """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.title("PUROBET Cassino")
-        self.geometry("450x800")
-        self.minsize(420, 750)
-        self.usuario_atual = None
-        self.carregador_imagens = CarregadorImagens()
-
-        container = ctk.CTkFrame(self)
-        container.pack(side="top", fill="both", expand=True)
-        container.grid_rowconfigure(0, weight=1)
-        container.grid_columnconfigure(0, weight=1)
-
-        self.telas = {}
-        for Tela in (TelaInicial, TelaLogin, TelaRegistro, TelaPrincipal, TelaAdmin, JogoBlackjack, JogoRoleta, JogoCrash):
-            tela = Tela(container, self)
-            self.telas[Tela] = tela
-            tela.grid(row=0, column=0, sticky="nsew")
-
-        self.mostrar_tela(TelaInicial)
-
-    def mostrar_tela(self, classe_tela, dados=None):
-        """Traz uma tela para a frente, tornando-a visível."""
-        for tela in self.telas.values():
-            if tela.winfo_ismapped() and hasattr(tela, 'ao_esconder'):
-                tela.ao_esconder()
-
-        tela = self.telas[classe_tela]
-        if hasattr(tela, 'ao_mostrar'):
-            tela.ao_mostrar(dados)
-        tela.tkraise()
-
-    def logout(self):
-        """Faz o logout do usuário e volta para a tela inicial."""
-        self.usuario_atual = None
-        self.mostrar_tela(TelaInicial)
-
-    def obter_saldo_usuario(self):
-        """Busca o saldo do usuário atual no banco de dados."""
-        if not self.usuario_atual: return 0
-        dados = obter_dados_usuario(self.usuario_atual)
-        return dados['saldo'] if dados else 0
-
-    def atualizar_saldo_usuario_bd(self, mudanca_quantia, nome_jogo=None, valor_aposta=None):
-        """
-        Atualiza o saldo no banco de dados e, opcionalmente, registra um log de aposta.
-        """
-        if self.usuario_atual:
-            atualizar_saldo(self.usuario_atual, mudanca_quantia)
-            if nome_jogo and valor_aposta is not None:
-                ganhos = mudanca_quantia + valor_aposta
-                registrar_aposta(self.usuario_atual, nome_jogo, valor_aposta, ganhos)
-
-    def exibir_mensagem(self, titulo, mensagem):
-        """Mostra uma janela de mensagem customizada."""
-        CaixaMensagem(self, titulo=titulo, mensagem=mensagem)
-
-# --- SEÇÃO 4: TELAS PRINCIPAIS (HUB, LOGIN, ADMIN, ETC) ---
-
-class TelaInicial(ctk.CTkFrame):
-    """Tela de boas-vindas com opções de Login e Registro."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent)
-        frame_central = ctk.CTkFrame(self, fg_color="transparent")
-        frame_central.place(relx=0.5, rely=0.5, anchor="center")
-        ctk.CTkLabel(frame_central, text="PUROBET", font=ctk.CTkFont(size=50, weight="bold")).pack(pady=(0, 10))
-        ctk.CTkLabel(frame_central, text="O Cassino Fictício Mais Confiável", font=ctk.CTkFont(size=14)).pack(pady=(0, 40))
-        ctk.CTkButton(frame_central, text="Login", font=ctk.CTkFont(size=16, weight="bold"), height=40, command=lambda: controlador.mostrar_tela(TelaLogin)).pack(pady=10, fill="x")
-        ctk.CTkButton(frame_central, text="Registrar", font=ctk.CTkFont(size=16, weight="bold"), height=40, fg_color="#10a37f", hover_color="#0e8e6f", command=lambda: controlador.mostrar_tela(TelaRegistro)).pack(pady=10, fill="x")
-
-class TelaLogin(ctk.CTkFrame):
-    """Tela de Login para usuários e administrador."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent)
-        self.controlador = controlador
-        frame_central = ctk.CTkFrame(self, width=300)
-        frame_central.place(relx=0.5, rely=0.5, anchor="center")
-        ctk.CTkLabel(frame_central, text="Login", font=ctk.CTkFont(size=28, weight="bold")).pack(pady=20)
-        self.entrada_usuario = ctk.CTkEntry(frame_central, placeholder_text="Usuário", width=250, height=35)
-        self.entrada_usuario.pack(pady=10, padx=20)
-        self.entrada_senha = ctk.CTkEntry(frame_central, placeholder_text="Senha", show="*", width=250, height=35)
-        self.entrada_senha.pack(pady=10, padx=20)
-        ctk.CTkButton(frame_central, text="Entrar", height=40, command=self.login).pack(pady=20, padx=20, fill="x")
-        ctk.CTkButton(frame_central, text="Voltar", height=30, fg_color="transparent", border_width=1, command=lambda: controlador.mostrar_tela(TelaInicial)).pack(pady=(0,20), padx=20, fill="x")
-
-    def login(self):
-        """Verifica as credenciais e direciona o usuário."""
-        usuario, senha = self.entrada_usuario.get(), self.entrada_senha.get()
-        if usuario == "puroadmin" and senha == "123456":
-            self.controlador.usuario_atual = "puroadmin"
-            self.controlador.mostrar_tela(TelaAdmin)
-        elif autenticar_usuario(usuario, senha):
-            self.controlador.usuario_atual = usuario
-            self.controlador.mostrar_tela(TelaPrincipal)
-        else:
-            self.controlador.exibir_mensagem("Erro", "Usuário ou senha inválidos.")
-
-class TelaRegistro(ctk.CTkFrame):
-    """Tela de Registro de novos usuários."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent)
-        self.controlador = controlador
-        frame_central = ctk.CTkFrame(self, width=300)
-        frame_central.place(relx=0.5, rely=0.5, anchor="center")
-        ctk.CTkLabel(frame_central, text="Criar Conta", font=ctk.CTkFont(size=28, weight="bold")).pack(pady=20)
-        self.entrada_usuario = ctk.CTkEntry(frame_central, placeholder_text="Usuário", width=250, height=35)
-        self.entrada_usuario.pack(pady=10, padx=20)
-        self.entrada_senha = ctk.CTkEntry(frame_central, placeholder_text="Senha", show="*", width=250, height=35)
-        self.entrada_senha.pack(pady=10, padx=20)
-        self.entrada_ref = ctk.CTkEntry(frame_central, placeholder_text="Código de Convite (Opcional)", width=250, height=35)
-        self.entrada_ref.pack(pady=10, padx=20)
-        ctk.CTkButton(frame_central, text="Registrar", height=40, fg_color="#10a37f", hover_color="#0e8e6f", command=self.registrar).pack(pady=20, padx=20, fill="x")
-        ctk.CTkButton(frame_central, text="Voltar", height=30, fg_color="transparent", border_width=1, command=lambda: controlador.mostrar_tela(TelaInicial)).pack(pady=(0, 20), padx=20, fill="x")
-
-    def gerar_codigo_referencia(self):
-        """Gera um código de referência aleatório."""
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-
-    def registrar(self):
-        """Processa o registro de um novo usuário."""
-        usuario, senha, codigo_ref = self.entrada_usuario.get(), self.entrada_senha.get(), self.entrada_ref.get()
-        if not usuario or not senha:
-            self.controlador.exibir_mensagem("Erro", "Preencha usuário e senha."); return
-
-        if not adicionar_usuario(usuario, senha, 1000, self.gerar_codigo_referencia()):
-            self.controlador.exibir_mensagem("Erro", "Este nome de usuário já existe."); return
-
-        if codigo_ref:
-            indicador = encontrar_usuario_por_referencia(codigo_ref)
-            if indicador:
-                atualizar_saldo(indicador, 200)
-                registrar_transacao(indicador, 'bonus_referencia', 200)
-                self.controlador.exibir_mensagem("Bônus!", f"O usuário {indicador} recebeu $200 por sua indicação!")
+def reconciliar_faixa(arquivo, id_inicio, id_fim, completo=False, tolerancia=0.005):
+    """
+    Confere os usuários com id entre 'id_inicio' e 'id_fim': o saldo deve ser igual ao total já
+    verificado no checkpoint mais os logs novos (transações e resultados de apostas) e os que foram
+    arquivados depois do checkpoint; com 'completo', a todos os logs mais todo o total arquivado.
+    Roda num processo à parte, com uma única transação de leitura para ver um retrato consistente
+    do banco. Retorna (conferidos, divergencias), onde 'conferidos' são os novos checkpoints, cada
+    um com o 'pendente' arquivado que ele passa a cobrir.
+    """
+    conexao = conectar_somente_leitura(arquivo)
+    try:
+        cursor = conexao.cursor()
+        cursor.execute("BEGIN")
+        cursor.execute("SELECT (SELECT COALESCE(MAX(id), 0) FROM logs_apostas), (SELECT COALESCE(MAX(id), 0) FROM logs_transacoes)")
+        limite_aposta, limite_transacao = cursor.fetchone()
+        cursor.execute('''
+            SELECT u.nome_usuario, u.saldo, COALESCE(c.total_verificado, 0), COALESCE(ta.pendente, 0),
+                   CASE WHEN ? THEN COALESCE(ta.total, 0) ELSE COALESCE(ta.pendente, 0) END,
+                   (SELECT COALESCE(SUM(a.resultado), 0) FROM logs_apostas a
+                     WHERE a.nome_usuario = u.nome_usuario AND a.id > COALESCE(c.ultimo_id_aposta, 0) AND a.id <= ?),
+                   (SELECT COALESCE(SUM(t.quantia), 0) FROM logs_transacoes t
+                     WHERE t.nome_usuario = u.nome_usuario AND t.id > COALESCE(c.ultimo_id_transacao, 0) AND t.id <= ?)
+            FROM usuarios u
+            LEFT JOIN checkpoints_reconciliacao c ON c.nome_usuario = u.nome_usuario AND NOT ?
+            LEFT JOIN totais_arquivados ta ON ta.nome_usuario = u.nome_usuario
+            WHERE u.id BETWEEN ? AND ?
+        ''', (completo, limite_aposta, limite_transacao, completo, id_inicio, id_fim))
+        conferidos, divergencias = [], []
+        for nome_usuario, saldo, total_verificado, pendente, arquivado, soma_apostas, soma_transacoes in cursor:
+            esperado = total_verificado + arquivado + soma_apostas + soma_transacoes
+            if abs(saldo - esperado) <= tolerancia:
+                conferidos.append((nome_usuario, limite_aposta, limite_transacao, esperado, pendente))
             else:
-                self.controlador.exibir_mensagem("Aviso", "Código de convite inválido.")
-
-        self.controlador.exibir_mensagem("Sucesso", f"Usuário {usuario} registrado!"); self.controlador.mostrar_tela(TelaLogin)
-
-class TelaPrincipal(ctk.CTkFrame):
-    """O menu principal do usuário, onde ele escolhe o jogo."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent, fg_color="#242424")
-        self.controlador = controlador
-        frame_superior = ctk.CTkFrame(self, corner_radius=0)
-        frame_superior.pack(fill="x")
-        self.label_boas_vindas = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=20, weight="bold"))
-        self.label_boas_vindas.pack(pady=(20, 5), padx=20, anchor="w")
-        self.label_saldo = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=16))
-        self.label_saldo.pack(pady=(0, 10), padx=20, anchor="w")
-        self.label_codigo_ref = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=12, slant="italic"), text_color="gray")
-        self.label_codigo_ref.pack(pady=(0, 20), padx=20, anchor="w")
-        frame_jogos = ctk.CTkScrollableFrame(self, fg_color="transparent")
-        frame_jogos.pack(pady=10, padx=15, fill="both", expand=True)
-        ctk.CTkLabel(frame_jogos, text="Escolha um Jogo", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=10)
-        botoes_jogo = [("🃏 Blackjack", JogoBlackjack, "#c0392b"), ("🌀 Roleta", JogoRoleta, "#8e44ad"), ("✈️ Aviãozinho (Crash)", JogoCrash, "#f39c12")]
-        for nome, tela, cor in botoes_jogo:
-            ctk.CTkButton(frame_jogos, text=nome, font=ctk.CTkFont(size=16), height=60, fg_color=cor, hover_color=self.escurecer_cor(cor), command=lambda t=tela: controlador.mostrar_tela(t)).pack(pady=10, fill="x")
-        frame_acoes = ctk.CTkFrame(self, fg_color="transparent")
-        frame_acoes.pack(pady=10, padx=20, fill="x")
-        ctk.CTkButton(frame_acoes, text="💰 Adicionar Saldo", fg_color="#1abc9c", hover_color="#16a085", command=self.adicionar_saldo).pack(side="left", expand=True, padx=5)
-        ctk.CTkButton(frame_acoes, text="Sair", fg_color="#e67e22", hover_color="#d35400", command=controlador.logout).pack(side="right", expand=True, padx=5)
-
-    def ao_mostrar(self, dados=None): self.atualizar_info()
-    def escurecer_cor(self, cor_hex):
-        r,g,b = int(cor_hex[1:3],16), int(cor_hex[3:5],16), int(cor_hex[5:7],16)
-        return f"#{max(0,r-20):02x}{max(0,g-20):02x}{max(0,b-20):02x}"
-    def atualizar_info(self):
-        """Busca os dados do usuário e atualiza os textos na tela."""
-        dados_usuario = obter_dados_usuario(self.controlador.usuario_atual)
-        if dados_usuario:
-            self.label_boas_vindas.configure(text=f"Olá, {self.controlador.usuario_atual}!")
-            self.label_saldo.configure(text=f"Saldo: ${dados_usuario['saldo']:,.2f}", text_color="#4CAF50")
-            self.label_codigo_ref.configure(text=f"Seu código: {dados_usuario['codigo_referencia']}")
-
-    def adicionar_saldo(self):
-        """Adiciona saldo fictício à conta do usuário."""
-        quantia = CaixaDialogo(self, titulo="Adicionar Saldo", texto="Quanto saldo fictício deseja adicionar?").obter_entrada()
-        if quantia and quantia > 0:
-            self.controlador.atualizar_saldo_usuario_bd(quantia)
-            registrar_transacao(self.controlador.usuario_atual, 'deposito', quantia)
-            self.controlador.exibir_mensagem("Sucesso", f"${quantia} adicionados!")
-            self.atualizar_info()
-
-class TelaAdmin(ctk.CTkFrame):
-    """Painel de controle do administrador."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent)
-        self.controlador = controlador
-        ctk.CTkLabel(self, text="PUROBET ADMIN", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
-        self.abas = ctk.CTkTabview(self)
-        self.abas.pack(fill="both", expand=True, padx=10, pady=10)
-        self.aba_usuarios = self.abas.add("Usuários")
-        self.aba_odds = self.abas.add("Odds")
-        self.aba_estatisticas = self.abas.add("Estatísticas")
-        self.aba_logs = self.abas.add("📊 Logs")
-
-        self.frame_scroll_usuarios = ctk.CTkScrollableFrame(self.aba_usuarios, label_text="Lista de Usuários")
-        self.frame_scroll_usuarios.pack(fill="both", expand=True, padx=5, pady=5)
-
-        ctk.CTkLabel(self.aba_odds, text="Pagamento Roleta (Número):").pack(pady=(10,0), padx=10)
-        self.slider_pagamento_roleta = ctk.CTkSlider(self.aba_odds, from_=10, to=50, number_of_steps=40)
-        self.slider_pagamento_roleta.pack(fill="x", padx=10)
-        self.label_pagamento_roleta = ctk.CTkLabel(self.aba_odds, text="")
-        self.slider_pagamento_roleta.bind("<ButtonRelease-1>", self.atualizar_label_slider)
-        self.label_pagamento_roleta.pack()
-        ctk.CTkButton(self.aba_odds, text="Salvar Odds", command=self.salvar_odds).pack(pady=20)
-
-        self.frame_estatisticas = ctk.CTkFrame(self.aba_estatisticas, fg_color="transparent")
-        self.frame_estatisticas.place(relx=0.5, rely=0.5, anchor="center")
-        self.label_total_usuarios = ctk.CTkLabel(self.frame_estatisticas, font=ctk.CTkFont(size=16))
-        self.label_total_usuarios.pack(anchor="w", padx=10, pady=5)
-        self.label_saldo_total = ctk.CTkLabel(self.frame_estatisticas, font=ctk.CTkFont(size=16))
-        self.label_saldo_total.pack(anchor="w", padx=10, pady=5)
-
-        frame_filtro_log = ctk.CTkFrame(self.aba_logs)
-        frame_filtro_log.pack(fill="x", padx=5, pady=5)
-        self.entrada_busca_log = ctk.CTkEntry(frame_filtro_log, placeholder_text="Filtrar por usuário...")
-        self.entrada_busca_log.pack(side="left", fill="x", expand=True, padx=(0,5))
-        self.entrada_busca_log.bind("<Return>", self.atualizar_logs)
-        ctk.CTkButton(frame_filtro_log, text="Buscar", command=self.atualizar_logs).pack(side="left")
-        self.abas_logs = ctk.CTkTabview(self.aba_logs)
-        self.abas_logs.pack(fill="both", expand=True, padx=5, pady=5)
-        self.aba_logs_apostas = self.abas_logs.add("Apostas")
-        self.aba_logs_transacoes = self.abas_logs.add("Transações")
-        self.scroll_logs_apostas = ctk.CTkScrollableFrame(self.aba_logs_apostas)
-        self.scroll_logs_apostas.pack(fill="both", expand=True)
-        self.scroll_logs_transacoes = ctk.CTkScrollableFrame(self.aba_logs_transacoes)
-        self.scroll_logs_transacoes.pack(fill="both", expand=True)
-
-        ctk.CTkButton(self, text="Logout", fg_color="#e67e22", hover_color="#d35400", command=controlador.logout).pack(pady=10)
-
-    def ao_mostrar(self, data=None): self.atualizar_todas_abas()
-    def atualizar_todas_abas(self):
-        self.atualizar_usuarios()
-        self.atualizar_estatisticas()
-        self.atualizar_odds()
-        self.atualizar_logs()
-
-    def atualizar_usuarios(self):
-        for widget in self.frame_scroll_usuarios.winfo_children(): widget.destroy()
-        for usuario, saldo in obter_todos_usuarios():
-            frame_usuario = ctk.CTkFrame(self.frame_scroll_usuarios)
-            frame_usuario.pack(fill="x", pady=5, padx=5)
-            ctk.CTkLabel(frame_usuario, text=f"{usuario} - Saldo: ${saldo:.2f}").pack(side="left", padx=10)
-            frame_botoes = ctk.CTkFrame(frame_usuario, fg_color="transparent")
-            frame_botoes.pack(side="right")
-            ctk.CTkButton(frame_botoes, text="+", width=30, fg_color="#27ae60", command=lambda u=usuario: self.adicionar_saldo_admin(u)).pack(side="left", padx=2)
-            ctk.CTkButton(frame_botoes, text="-", width=30, fg_color="#c0392b", command=lambda u=usuario: self.remover_saldo_admin(u)).pack(side="left", padx=2)
-            ctk.CTkButton(frame_botoes, text="🗑️", width=30, fg_color="#7f8c8d", command=lambda u=usuario: self.deletar_usuario(u)).pack(side="left", padx=2)
-
-    def atualizar_estatisticas(self):
-        todos_usuarios = obter_todos_usuarios()
-        self.label_total_usuarios.configure(text=f"Total de usuários: {len(todos_usuarios)}")
-        self.label_saldo_total.configure(text=f"Saldo total em jogo: ${sum(b for u,b in todos_usuarios):,.2f}")
-
-    def atualizar_odds(self):
-        self.slider_pagamento_roleta.set(obter_configuracao_jogo('pagamento_roleta_numero'))
-        self.atualizar_label_slider()
-
-    def atualizar_logs(self, event=None):
-        filtro_usuario = self.entrada_busca_log.get() or None
-        for widget in self.scroll_logs_apostas.winfo_children(): widget.destroy()
-        for log in obter_logs('logs_apostas', filtro_usuario):
-            _, usuario, jogo, aposta, resultado, ts = log
-            cor = "#4CAF50" if resultado >= 0 else "#D32F2F"
-            texto_log = f"[{ts}] {usuario} | {jogo}: apostou ${aposta:.2f}, resultado ${resultado:+.2f}"
-            ctk.CTkLabel(self.scroll_logs_apostas, text=texto_log, text_color=cor, anchor="w").pack(fill="x")
-
-        for widget in self.scroll_logs_transacoes.winfo_children(): widget.destroy()
-        for log in obter_logs('logs_transacoes', filtro_usuario):
-            _, usuario, tipo, quantia, ts = log
-            texto_log = f"[{ts}] {usuario} | {tipo.replace('_', ' ').capitalize()}: ${quantia:,.2f}"
-            ctk.CTkLabel(self.scroll_logs_transacoes, text=texto_log, anchor="w").pack(fill="x")
-
-    def adicionar_saldo_admin(self, usuario):
-        quantia = CaixaDialogo(self, titulo="Adicionar Saldo", texto=f"Adicionar para {usuario}:").obter_entrada()
-        if quantia and quantia > 0:
-            atualizar_saldo(usuario, quantia)
-            registrar_transacao(usuario, 'deposito_admin', quantia)
-            self.atualizar_usuarios()
-            self.atualizar_estatisticas()
-
-    def remover_saldo_admin(self, usuario):
-        quantia = CaixaDialogo(self, titulo="Remover Saldo", texto=f"Remover de {usuario}:").obter_entrada()
-        if quantia and quantia > 0:
-            atualizar_saldo(usuario, -quantia)
-            registrar_transacao(usuario, 'saque_admin', -quantia)
-            self.atualizar_usuarios()
-            self.atualizar_estatisticas()
-
-    def deletar_usuario(self, usuario):
-        from tkinter import messagebox
-        if messagebox.askyesno("Confirmar", f"Excluir {usuario}?"):
-            deletar_usuario_bd(usuario)
-            self.atualizar_usuarios()
-            self.atualizar_estatisticas()
-
-    def atualizar_label_slider(self, event=None):
-        self.label_pagamento_roleta.configure(text=f"{int(self.slider_pagamento_roleta.get())}x")
-
-    def salvar_odds(self):
-        definir_configuracao_jogo('pagamento_roleta_numero', int(self.slider_pagamento_roleta.get()))
-        self.controlador.exibir_mensagem("Sucesso", "Odds atualizadas!")
-
-# --- SEÇÃO 5: TELAS DOS JOGOS ---
-
-class TelaJogoBase(ctk.CTkFrame):
-    """Classe base para as telas de jogos."""
-    def __init__(self, parent, controlador, titulo_jogo):
-        super().__init__(parent)
-        self.controlador = controlador
-        self._id_after = None
-        self.grid_rowconfigure(1, weight=1)
-        self.grid_columnconfigure(0, weight=1)
-        frame_superior = ctk.CTkFrame(self, fg_color="transparent")
-        frame_superior.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
-        frame_superior.grid_columnconfigure(1, weight=1)
-        ctk.CTkButton(frame_superior, text="← Voltar ao Hub", width=120, command=lambda: controlador.mostrar_tela(TelaPrincipal)).grid(row=0, column=0, sticky="w")
-        ctk.CTkLabel(frame_superior, text=titulo_jogo, font=ctk.CTkFont(size=22, weight="bold")).grid(row=0, column=1, sticky="ew")
-        self.label_saldo = ctk.CTkLabel(frame_superior, text="", font=ctk.CTkFont(size=14))
-        self.label_saldo.grid(row=0, column=2, sticky="e", padx=10)
-        self.frame_jogo = ctk.CTkFrame(self)
-        self.frame_jogo.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
-
-    def ao_mostrar(self, dados=None):
-        self.atualizar_exibicao_saldo()
-
-    def ao_esconder(self):
-        if self._id_after:
-            self.after_cancel(self._id_after)
-            self._id_after = None
-
-    def atualizar_exibicao_saldo(self, mudanca=0):
-        saldo = self.controlador.obter_saldo_usuario()
-        self.label_saldo.configure(text=f"Saldo: ${saldo:,.2f}")
-        if mudanca != 0:
-            cor = "#4CAF50" if mudanca > 0 else "#D32F2F"
-            self.label_saldo.configure(text_color=cor)
-            self.after(1000, lambda: self.label_saldo.configure(text_color="white"))
-
-class JogoBlackjack(TelaJogoBase):
-    """Tela e lógica do jogo Blackjack (21)."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent, controlador, "🃏 Blackjack")
-        self.baralho = []
-        self.mao_jogador, self.mao_dealer = [], []
-        self.valor_aposta = 0
-        self.frame_jogo.grid_rowconfigure([0, 1], weight=1)
-        self.frame_jogo.grid_columnconfigure(0, weight=1)
-        self.frame_dealer = ctk.CTkFrame(self.frame_jogo)
-        self.frame_dealer.grid(row=0, column=0, sticky="nsew", pady=5)
-        self.frame_jogador = ctk.CTkFrame(self.frame_jogo)
-        self.frame_jogador.grid(row=1, column=0, sticky="nsew", pady=5)
-        self.label_pontos_dealer = ctk.CTkLabel(self.frame_dealer, text="Dealer: 0", font=ctk.CTkFont(size=16))
-        self.label_pontos_dealer.place(relx=0.02, rely=0.05)
-        self.label_pontos_jogador = ctk.CTkLabel(self.frame_jogador, text="Você: 0", font=ctk.CTkFont(size=16))
-        self.label_pontos_jogador.place(relx=0.02, rely=0.05)
-        self.label_status = ctk.CTkLabel(self, text="Faça sua aposta para começar", font=ctk.CTkFont(size=14))
-        self.label_status.grid(row=2, column=0, pady=5)
-        container_controles = ctk.CTkFrame(self)
-        container_controles.grid(row=3, column=0, sticky="ew", padx=10, pady=10)
-        container_controles.grid_columnconfigure(0, weight=1)
-        frame_aposta = ctk.CTkFrame(container_controles, fg_color="transparent")
-        frame_aposta.grid(row=0, column=0, pady=5)
-        self.entrada_aposta = ctk.CTkEntry(frame_aposta, placeholder_text="Aposta", width=100)
-        self.entrada_aposta.pack(side="left", padx=5)
-        self.botao_apostar = ctk.CTkButton(frame_aposta, text="Apostar", command=self.distribuir_cartas)
-        self.botao_apostar.pack(side="left", padx=5)
-        frame_acoes_jogo = ctk.CTkFrame(container_controles, fg_color="transparent")
-        frame_acoes_jogo.grid(row=1, column=0, pady=5)
-        self.botao_pedir = ctk.CTkButton(frame_acoes_jogo, text="Pedir", command=self.pedir_carta, state="disabled")
-        self.botao_pedir.pack(side="left", padx=10)
-        self.botao_parar = ctk.CTkButton(frame_acoes_jogo, text="Parar", command=self.parar, state="disabled", fg_color="#c0392b", hover_color="#a52a1a")
-        self.botao_parar.pack(side="left", padx=10)
-
-    def ao_mostrar(self, data=None):
-        super().ao_mostrar(data)
-        self.reiniciar_jogo()
-
-    def obter_valor_carta(self, carta):
-        rank = carta.split('_')[1]
-        if rank in ['J', 'Q', 'K', 'T']: return 10
-        if rank == 'A': return 11
-        return int(rank)
-
-    def obter_valor_mao(self, mao):
-        valor = sum(self.obter_valor_carta(c) for c in mao)
-        num_ases = sum(1 for c in mao if c.endswith('_A'))
-        while valor > 21 and num_ases:
-            valor -= 10
-            num_ases -= 1
-        return valor
-
-    def criar_baralho(self):
-        naipes = ['hearts', 'diamonds', 'clubs', 'spades']
-        ranks = [str(i) for i in range(2, 10)] + ['T', 'J', 'Q', 'K', 'A']
-        self.baralho = [f"{n}_{r}" for n in naipes for r in ranks]
-        random.shuffle(self.baralho)
-
-    def distribuir_cartas(self):
+                divergencias.append({'usuario': nome_usuario, 'saldo': saldo, 'esperado': esperado, 'diferenca': saldo - esperado})
+        conexao.rollback()
+        return conferidos, divergencias
+    finally:
+        conexao.close()
+
+def _reconciliar_faixa(parametros):
+    return reconciliar_faixa(*parametros)
+
+@medir
+def reconciliar_saldos(processos=None, tamanho_faixa=50000, completo=False, tolerancia=0.005):
+    """
+    Divide os usuários em faixas de id e confere cada faixa num pool de processos. Os
+    checkpoints dos usuários que bateram são gravados ao fim de cada faixa, então a próxima
+    execução só lê os logs novos; com 'completo', os checkpoints são ignorados. Se um arquivamento
+    mexeu no 'pendente' de um usuário durante a conferência, o checkpoint dele fica para a próxima.
+    Retorna um relatório com o resumo e a lista de divergências. No modo com shards, os shards são
+    conferidos um depois do outro e os relatórios são somados.
+    """
+    if consulta_distribuida():
+        relatorios = []
+        for indice in range(QUANTIDADE_SHARDS):
+            with usando_banco(caminho_shard(indice)):
+                relatorios.append(reconciliar_saldos(processos, tamanho_faixa, completo, tolerancia))
+        return dict(relatorios[-1], **{chave: sum(r[chave] for r in relatorios)
+                                        for chave in ('faixas', 'usuarios_conferidos', 'usuarios_divergentes')},
+                    duracao_s=round(sum(r['duracao_s'] for r in relatorios), 3),
+                    divergencias=sorted((d for r in relatorios for d in r['divergencias']), key=lambda d: -abs(d['diferenca'])))
+    inicio = time.perf_counter()
+    with conexao_bd() as conexao:
+        id_minimo, id_maximo = conexao.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), -1) FROM usuarios").fetchone()
+    faixas = [(arquivo_bd_atual(), i, min(i + tamanho_faixa - 1, id_maximo), completo, tolerancia)
+              for i in range(id_minimo, id_maximo + 1, tamanho_faixa)]
+    total_conferidos, divergencias = 0, []
+    import multiprocessing
+    with multiprocessing.Pool(processos) as pool:
+        for conferidos, divergencias_faixa in pool.imap_unordered(_reconciliar_faixa, faixas):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            with conexao_bd() as conexao:
+                conexao.execute("BEGIN IMMEDIATE")
+                conexao.executemany('''
+                    INSERT INTO checkpoints_reconciliacao (nome_usuario, ultimo_id_aposta, ultimo_id_transacao, total_verificado, timestamp)
+                    SELECT ?, ?, ?, ?, ? WHERE COALESCE((SELECT pendente FROM totais_arquivados WHERE nome_usuario = ?1), 0) = ?6
+                    ON CONFLICT (nome_usuario) DO UPDATE SET ultimo_id_aposta = excluded.ultimo_id_aposta,
+                        ultimo_id_transacao = excluded.ultimo_id_transacao, total_verificado = excluded.total_verificado,
+                        timestamp = excluded.timestamp
+                ''', [(usuario, id_aposta, id_transacao, esperado, timestamp, pendente)
+                      for usuario, id_aposta, id_transacao, esperado, pendente in conferidos])
+                conexao.executemany("UPDATE totais_arquivados SET pendente = 0 WHERE nome_usuario = ? AND pendente = ? AND pendente != 0",
+                                    [(usuario, pendente) for usuario, *_, pendente in conferidos])
+                conexao.commit()
+            total_conferidos += len(conferidos)
+            divergencias.extend(divergencias_faixa)
+    return {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'faixas': len(faixas),
+        'usuarios_conferidos': total_conferidos,
+        'usuarios_divergentes': len(divergencias),
+        'duracao_s': round(time.perf_counter() - inicio, 3),
+        'divergencias': sorted(divergencias, key=lambda d: -abs(d['diferenca'])),
+    }
+
+# --- Importação e Exportação em Lote ---
+
+def ler_registros(caminho, formato=None):
+    """Lê um arquivo CSV (com cabeçalho) ou JSONL linha a linha, gerando um dicionário por registro."""
+    formato = formato or ('jsonl' if caminho.endswith(('.jsonl', '.json')) else 'csv')
+    with open(caminho, newline='', encoding='utf-8') as arquivo:
+        if formato == 'csv':
+            import csv
+            yield from csv.DictReader(arquivo)
+        else:
+            for linha in arquivo:
+                if linha.strip():
+                    yield json.loads(linha)
+
+@medir
+def importar_usuarios(registros, tamanho_lote=50000, senha_padrao=None):
+    """
+    Importa usuários em massa a partir de dicionários com 'nome_usuario', 'saldo' e, opcionalmente,
+    'hash_senha' (ou 'senha', que custa um scrypt por linha) e 'codigo_referencia'. Cada lote vai
+    por executemany para uma tabela temporária e dali para 'usuarios', 'livro_razao' e
+    'logs_transacoes' com INSERT ... SELECT, numa transação por lote. Os índices secundários do
+    livro e dos logs são removidos durante a carga e recriados no fim. Nomes ou códigos que já
+    existem são ignorados. No modo com shards, os registros são separados por shard em arquivos
+    JSONL temporários e cada shard importa o seu em paralelo. Retorna (importados, ignorados).
+    """
+    if consulta_distribuida():
+        import tempfile
+        with tempfile.TemporaryDirectory(prefix="purobet_importacao_") as pasta:
+            partes = {caminho_shard(indice): open(os.path.join(pasta, f"shard{indice}.jsonl"), 'w', encoding='utf-8')
+                      for indice in range(QUANTIDADE_SHARDS)}
+            try:
+                for registro in registros:
+                    partes[arquivo_bd_atual(registro['nome_usuario'])].write(json.dumps(registro, ensure_ascii=False) + "\n")
+            finally:
+                for parte in partes.values():
+                    parte.close()
+            resultados = nos_shards(lambda: importar_usuarios(ler_registros(partes[arquivo_bd_atual()].name, 'jsonl'),
+                                                              tamanho_lote, senha_padrao))
+        return tuple(map(sum, zip(*resultados)))
+    hash_padrao = gerar_hash_senha(senha_padrao) if senha_padrao else None
+    def preparar(registro):
+        hash_senha = registro.get('hash_senha') or (gerar_hash_senha(registro['senha']) if registro.get('senha') else hash_padrao)
+        if not hash_senha:
+            raise ValueError(f"Usuário '{registro['nome_usuario']}' sem senha; use 'senha_padrao'.")
+        return (registro['nome_usuario'], hash_senha, float(registro.get('saldo', SALDO_INICIAL) or 0),
+                registro.get('codigo_referencia') or gerar_codigo_referencia(10))
+
+    importados = ignorados = 0
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ('livro_razao', 'logs_transacoes')")
+        indices = cursor.fetchall()
+        for nome, _ in indices:
+            cursor.execute(f"DROP INDEX {nome}")
+        conexao.commit()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS importacao (nome_usuario TEXT, hash_senha TEXT, saldo REAL, codigo_referencia TEXT)")
         try:
-            aposta = int(self.entrada_aposta.get())
-        except (ValueError, TypeError):
-            self.controlador.exibir_mensagem("Erro", "Aposta inválida.")
-            return
-        if not (0 < aposta <= self.controlador.obter_saldo_usuario()):
-            self.controlador.exibir_mensagem("Erro", "Saldo insuficiente.")
-            return
-        self.valor_aposta = aposta
-        self.controlador.atualizar_saldo_usuario_bd(-aposta)
-        self.atualizar_exibicao_saldo(-aposta)
-        self.criar_baralho()
-        self.mao_jogador = [self.baralho.pop(), self.baralho.pop()]
-        self.mao_dealer = [self.baralho.pop(), self.baralho.pop()]
-        self.atualizar_interface()
-        self.label_status.configure(text=f"Aposta: ${self.valor_aposta}. Sua vez.")
-        self.botao_apostar.configure(state="disabled")
-        self.botao_pedir.configure(state="normal")
-        self.botao_parar.configure(state="normal")
-        if self.obter_valor_mao(self.mao_jogador) == 21:
-            self.parar()
-
-    def pedir_carta(self):
-        self.mao_jogador.append(self.baralho.pop())
-        self.atualizar_interface()
-        if self.obter_valor_mao(self.mao_jogador) > 21:
-            self.finalizar_jogo("Você estourou! Perdeu.")
-
-    def parar(self):
-        self.botao_pedir.configure(state="disabled")
-        self.botao_parar.configure(state="disabled")
-        while self.obter_valor_mao(self.mao_dealer) < 17:
-            self.mao_dealer.append(self.baralho.pop())
-        pontos_jogador, pontos_dealer = self.obter_valor_mao(self.mao_jogador), self.obter_valor_mao(self.mao_dealer)
-        self.atualizar_interface(mostrar_dealer_completo=True)
-        if pontos_dealer > 21 or pontos_jogador > pontos_dealer:
-            self.finalizar_jogo("Você ganhou!", self.valor_aposta * 2)
-        elif pontos_jogador < pontos_dealer:
-            self.finalizar_jogo("Você perdeu.")
+            registros = iter(registros)
+            while lote := list(itertools.islice(registros, tamanho_lote)):
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                cursor.execute("DELETE FROM importacao")
+                cursor.executemany("INSERT INTO importacao VALUES (?, ?, ?, ?)", map(preparar, lote))
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM usuarios")
+                ultimo_id = cursor.fetchone()[0]
+                cursor.execute("INSERT OR IGNORE INTO usuarios (nome_usuario, hash_senha, saldo, codigo_referencia) "
+                               "SELECT nome_usuario, hash_senha, 0, codigo_referencia FROM importacao")
+                inseridos = cursor.rowcount
+                for tabela, colunas in (('livro_razao', 'nome_usuario, tipo, quantia, timestamp'),
+                                        ('logs_transacoes', 'nome_usuario, tipo_transacao, quantia, timestamp')):
+                    cursor.execute(f"INSERT INTO {tabela} ({colunas}) SELECT i.nome_usuario, 'importacao', i.saldo, ? "
+                                   "FROM importacao i JOIN usuarios u ON u.nome_usuario = i.nome_usuario "
+                                   "WHERE u.id > ? AND i.saldo != 0", (timestamp, ultimo_id))
+                conexao.commit()
+                importados += inseridos
+                ignorados += len(lote) - inseridos
+        finally:
+            conexao.rollback()
+            cursor.execute("DROP TABLE IF EXISTS temp.importacao")
+            for _, sql in indices:
+                cursor.execute(sql)
+            conexao.commit()
+    return importados, ignorados
+
+@medir
+def exportar_tabela(tabela, arquivo, formato='csv', cabecalho=True):
+    """
+    Escreve uma tabela inteira em CSV ou JSONL, percorrendo o cursor linha a linha: a memória
+    usada não depende do tamanho da tabela. No modo com shards, os shards saem um depois do
+    outro, com um só cabeçalho (os ids se repetem entre shards). Retorna o número de linhas escritas.
+    """
+    if tabela not in TABELAS_EXPORTACAO:
+        raise ValueError(f"Tabela deve ser uma de {', '.join(TABELAS_EXPORTACAO)}.")
+    if consulta_distribuida():
+        total = 0
+        for indice in range(QUANTIDADE_SHARDS):
+            with usando_banco(caminho_shard(indice)):
+                total += exportar_tabela(tabela, arquivo, formato, cabecalho=indice == 0)
+        return total
+    total = 0
+    with conexao_bd() as conexao:
+        cursor = conexao.execute(f"SELECT * FROM {tabela} ORDER BY id")
+        colunas = [descricao[0] for descricao in cursor.description]
+        def linhas():
+            nonlocal total
+            for linha in cursor:
+                total += 1
+                yield linha
+        if formato == 'csv':
+            import csv
+            escritor = csv.writer(arquivo)
+            if cabecalho:
+                escritor.writerow(colunas)
+            escritor.writerows(linhas())
         else:
-            self.finalizar_jogo("Empate!", self.valor_aposta)
+            arquivo.writelines(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + "\n" for linha in linhas())
+    return total
+
+# --- Ajustes de Saldo em Lote ---
 
-    def finalizar_jogo(self, mensagem, ganhos=0):
-        self.label_status.configure(text=mensagem)
-        self.controlador.atualizar_saldo_usuario_bd(ganhos, nome_jogo="Blackjack", valor_aposta=self.valor_aposta)
-        if ganhos > 0:
-            self.atualizar_exibicao_saldo(ganhos - self.valor_aposta)
+@medir
+def ajustar_saldos_lote(quantia=None, saldo_minimo=None, saldo_maximo=None, padrao_nome=None, codigo_referencia=None,
+                        ajustes=None, tipo_transacao='ajuste_admin_lote', simular=False, indicador=None):
+    """
+    Credita (quantia > 0) ou debita (quantia < 0) todos os usuários que passam nos filtros: faixa
+    de saldo, padrão de nome (LIKE, ex.: 'bot%') e indicados pelo dono de um código de referência
+    (ou pelo 'indicador', pelo nome). Com 'ajustes' (pares (usuario, quantia), ex.: de um CSV),
+    aplica cada ajuste ao seu usuário. Débitos param no saldo disponível (e não mexem em saldo
+    negativo); créditos entram inteiros. Tudo numa transação: um INSERT ... SELECT grava os logs
+    de transação e outro copia esses logs para o livro-razão, que atualiza os saldos. No modo com shards, é uma transação por shard, em paralelo.
+    Com 'simular', só calcula. Retorna (usuarios_afetados, total_movimentado).
+    """
+    if consulta_distribuida():
+        if codigo_referencia:
+            indicador, codigo_referencia = encontrar_usuario_por_referencia(codigo_referencia), None
+            if not indicador:
+                return 0, 0.0
+        ajustes_por_shard = defaultdict(list)
+        for usuario, valor in ajustes or ():
+            ajustes_por_shard[arquivo_bd_atual(usuario)].append((usuario, valor))
+        partes = nos_shards(lambda: ajustar_saldos_lote(quantia, saldo_minimo, saldo_maximo, padrao_nome, None,
+                                                        None if ajustes is None else ajustes_por_shard[arquivo_bd_atual()],
+                                                        tipo_transacao, simular, indicador))
+        return tuple(map(sum, zip(*partes)))
+    with conexao_bd() as conexao:
+        cursor = conexao.cursor()
+        if ajustes is not None:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ajustes_lote (nome_usuario TEXT, quantia REAL)")
+            cursor.execute("DELETE FROM ajustes_lote")
+            cursor.executemany("INSERT INTO ajustes_lote VALUES (?, ?)", ((usuario, float(valor)) for usuario, valor in ajustes))
+            conexao.commit()
+            origem = ("SELECT u.nome_usuario, CASE WHEN a.quantia < 0 THEN MIN(0, MAX(-u.saldo, a.quantia)) ELSE a.quantia END AS quantia "
+                      "FROM usuarios u "
+                      "JOIN (SELECT nome_usuario, SUM(quantia) AS quantia FROM ajustes_lote GROUP BY nome_usuario) a "
+                      "ON a.nome_usuario = u.nome_usuario")
+            parametros = []
         else:
-            self.atualizar_exibicao_saldo(0)
-        self.botao_apostar.configure(state="normal")
-        self.botao_pedir.configure(state="disabled")
-        self.botao_parar.configure(state="disabled")
-
-    def atualizar_interface(self, mostrar_dealer_completo=False):
-        for widget in self.frame_jogador.winfo_children():
-            if isinstance(widget, ctk.CTkLabel) and hasattr(widget, "eh_carta"): widget.destroy()
-        for widget in self.frame_dealer.winfo_children():
-            if isinstance(widget, ctk.CTkLabel) and hasattr(widget, "eh_carta"): widget.destroy()
-
-        for i, nome_carta in enumerate(self.mao_jogador):
-            imagem_carta = self.controlador.carregador_imagens.obter_imagem_ctk(nome_carta)
-            if imagem_carta:
-                label_carta = ctk.CTkLabel(self.frame_jogador, image=imagem_carta, text="")
-                label_carta.eh_carta = True
-                label_carta.place(relx=0.25 + i*0.1, rely=0.5, anchor="center")
-
-        if self.mao_dealer:
-            mao_dealer_para_mostrar = self.mao_dealer if mostrar_dealer_completo else [self.mao_dealer[0], 'back']
-            for i, nome_carta in enumerate(mao_dealer_para_mostrar):
-                imagem_carta = self.controlador.carregador_imagens.obter_imagem_ctk(nome_carta)
-                if imagem_carta:
-                    label_carta = ctk.CTkLabel(self.frame_dealer, image=imagem_carta, text="")
-                    label_carta.eh_carta = True
-                    label_carta.place(relx=0.25 + i*0.1, rely=0.5, anchor="center")
-
-        self.label_pontos_jogador.configure(text=f"Você: {self.obter_valor_mao(self.mao_jogador)}")
-        if self.mao_dealer:
-            pontos_dealer = self.obter_valor_mao(self.mao_dealer) if mostrar_dealer_completo else self.obter_valor_carta(self.mao_dealer[0])
-            self.label_pontos_dealer.configure(text=f"Dealer: {pontos_dealer}{'' if mostrar_dealer_completo else ' + ?'}")
+            condicoes, parametros = [], [quantia] * 3
+            if saldo_minimo is not None:
+                condicoes.append("saldo >= ?"); parametros.append(saldo_minimo)
+            if saldo_maximo is not None:
+                condicoes.append("saldo <= ?"); parametros.append(saldo_maximo)
+            if padrao_nome:
+                condicoes.append("nome_usuario LIKE ?"); parametros.append(padrao_nome)
+            if codigo_referencia:
+                condicoes.append("nome_usuario IN (SELECT indicado FROM indicacoes WHERE indicador = "
+                                 "(SELECT nome_usuario FROM usuarios WHERE codigo_referencia = ?))")
+                parametros.append(codigo_referencia)
+            if indicador:
+                condicoes.append("nome_usuario IN (SELECT indicado FROM indicacoes WHERE indicador = ?)"); parametros.append(indicador)
+            origem = ("SELECT nome_usuario, CASE WHEN ? < 0 THEN MIN(0, MAX(-saldo, ?)) ELSE ? END AS quantia FROM usuarios WHERE "
+                      + (" AND ".join(condicoes) or "1"))
+
+        if simular:
+            cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(quantia), 0) FROM ({origem}) WHERE quantia != 0", parametros)
+            resultado = cursor.fetchone()
+            conexao.rollback()
+            return resultado
+
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM logs_transacoes")
+        ultimo_id = cursor.fetchone()[0]
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute(f"INSERT INTO logs_transacoes (nome_usuario, tipo_transacao, quantia, timestamp) "
+                       f"SELECT nome_usuario, ?, quantia, ? FROM ({origem}) WHERE quantia != 0",
+                       [tipo_transacao, timestamp] + parametros)
+        cursor.execute("INSERT INTO livro_razao (nome_usuario, tipo, quantia, referencia, timestamp) "
+                       "SELECT nome_usuario, tipo_transacao, quantia, ?, timestamp FROM logs_transacoes WHERE id > ?",
+                       (f"lote:{ultimo_id}", ultimo_id))
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(quantia), 0) FROM logs_transacoes WHERE id > ?", (ultimo_id,))
+        resultado = cursor.fetchone()
+        conexao.commit()
+        return resultado
+
+# --- Regras dos Jogos ---
+# Funções puras, sem interface, usadas tanto pelas telas quanto pelo modo servidor.
+
+CORES_ROLETA = {n: c for n, c in zip(range(37), (['green'] + ['red', 'black'] * 18))}
+
+def criar_baralho(gerador=random):
+    """Retorna um baralho completo de 52 cartas, embaralhado por 'gerador'."""
+    naipes = ['hearts', 'diamonds', 'clubs', 'spades']
+    ranks = [str(i) for i in range(2, 10)] + ['T', 'J', 'Q', 'K', 'A']
+    baralho = [f"{n}_{r}" for n in naipes for r in ranks]
+    gerador.shuffle(baralho)
+    return baralho
+
+def valor_carta(carta):
+    rank = carta.split('_')[1]
+    if rank in ['J', 'Q', 'K', 'T']: return 10
+    if rank == 'A': return 11
+    return int(rank)
+
+def valor_mao(mao):
+    """Soma os pontos de uma mão de Blackjack, contando Ases como 1 quando necessário."""
+    valor = sum(valor_carta(c) for c in mao)
+    num_ases = sum(1 for c in mao if c.endswith('_A'))
+    while valor > 21 and num_ases:
+        valor -= 10
+        num_ases -= 1
+    return valor
+
+def jogar_dealer(mao_dealer, baralho):
+    """O dealer compra cartas até ter pelo menos 17 pontos."""
+    while valor_mao(mao_dealer) < 17:
+        mao_dealer.append(baralho.pop())
+
+def resultado_blackjack(mao_jogador, mao_dealer, valor_aposta):
+    """Compara as mãos já finalizadas e retorna (mensagem, ganhos)."""
+    pontos_jogador, pontos_dealer = valor_mao(mao_jogador), valor_mao(mao_dealer)
+    if pontos_jogador > 21:
+        return "Você estourou! Perdeu.", 0
+    if pontos_dealer > 21 or pontos_jogador > pontos_dealer:
+        return "Você ganhou!", valor_aposta * 2
+    if pontos_jogador < pontos_dealer:
+        return "Você perdeu.", 0
+    return "Empate!", valor_aposta
+
+def jogar_mao_blackjack(gerador, pedir, valor_aposta):
+    """
+    Joga uma mão inteira sem interface, na mesma ordem de cartas das telas: 'pedir(mao_jogador,
+    carta_dealer)' decide cada carta extra. Retorna (ganhos, acoes), com um 'P' por carta pedida.
+    """
+    baralho = criar_baralho(gerador)
+    mao_jogador = [baralho.pop(), baralho.pop()]
+    mao_dealer = [baralho.pop(), baralho.pop()]
+    acoes = ""
+    while valor_mao(mao_jogador) <= 21 and pedir(mao_jogador, mao_dealer[0]):
+        mao_jogador.append(baralho.pop())
+        acoes += "P"
+    if valor_mao(mao_jogador) <= 21:
+        jogar_dealer(mao_dealer, baralho)
+    return resultado_blackjack(mao_jogador, mao_dealer, valor_aposta)[1], acoes
+
+def calcular_ganhos_roleta(apostas, num_vencedor, pagamento_numero):
+    """Soma os ganhos de uma lista de apostas da roleta para o número sorteado."""
+    ganhos_totais = 0
+    cor_vencedora = CORES_ROLETA[num_vencedor]
+    eh_par = (num_vencedor % 2 == 0 and num_vencedor != 0)
+    eh_baixo = (1 <= num_vencedor <= 18)
+    for aposta in apostas:
+        pagamento = 0
+        if aposta['tipo'] == 'number' and aposta['valor'] == num_vencedor:
+            pagamento = pagamento_numero
+        elif aposta['tipo'] == 'color' and aposta['valor'] == cor_vencedora:
+            pagamento = 2
+        elif aposta['tipo'] == 'parity' and ((aposta['valor'] == 'even' and eh_par) or (aposta['valor'] == 'odd' and not eh_par)):
+            pagamento = 2
+        elif aposta['tipo'] == 'range' and ((aposta['valor'] == 'low' and eh_baixo) or (aposta['valor'] == 'high' and not eh_baixo)):
+            pagamento = 2
+        if pagamento > 0:
+            ganhos_totais += aposta['quantia'] * pagamento
+    return ganhos_totais
+
+def sortear_numero_roleta(gerador=random):
+    return gerador.randint(0, 36)
+
+def sortear_ponto_crash(gerador=random):
+    """Sorteia o multiplicador em que o avião cai."""
+    return max(1.01, gerador.gammavariate(2, 2))
+
+# --- Motor de Saque Automático do Crash ---
+
+class MotorSaqueAutomatico:
+    """
+    Guarda as apostas de uma rodada do Crash. As apostas com saque automático ficam num
+    min-heap ordenado pelo multiplicador alvo, então cada tick só retira as que já foram atingidas.
+    """
+    def __init__(self):
+        self.heap_alvos = []
+        self.apostas_pendentes = {}
+        self.apostas_por_usuario = defaultdict(set)
+        self._proximo_id = 0
+
+    def adicionar_aposta(self, nome_usuario, valor_aposta, alvo=None):
+        """Registra uma aposta na rodada e retorna o seu identificador."""
+        id_aposta = self._proximo_id
+        self._proximo_id += 1
+        self.apostas_pendentes[id_aposta] = (nome_usuario, valor_aposta)
+        self.apostas_por_usuario[nome_usuario].add(id_aposta)
+        if alvo is not None:
+            heapq.heappush(self.heap_alvos, (alvo, id_aposta))
+        return id_aposta
+
+    def _retirar(self, id_aposta, multiplicador):
+        nome_usuario, valor_aposta = self.apostas_pendentes.pop(id_aposta)
+        self.apostas_por_usuario[nome_usuario].discard(id_aposta)
+        return (nome_usuario, valor_aposta, valor_aposta * multiplicador)
+
+    def retirar_alvos_atingidos(self, multiplicador, estrito=False):
+        """
+        Remove e retorna, como (nome_usuario, valor_aposta, ganhos), as apostas cujo alvo é menor
+        ou igual ao multiplicador (estritamente menor se 'estrito'). Cada uma é paga no seu alvo.
+        """
+        atingidas = []
+        while self.heap_alvos:
+            alvo, id_aposta = self.heap_alvos[0]
+            if alvo > multiplicador or (estrito and alvo == multiplicador):
+                break
+            heapq.heappop(self.heap_alvos)
+            # Apostas sacadas manualmente continuam no heap e são descartadas aqui.
+            if id_aposta in self.apostas_pendentes:
+                atingidas.append(self._retirar(id_aposta, alvo))
+        return atingidas
+
+    def sacar_usuario(self, nome_usuario, multiplicador):
+        """Saque manual: retira todas as apostas pendentes do usuário no multiplicador atual."""
+        return [self._retirar(id_aposta, multiplicador) for id_aposta in list(self.apostas_por_usuario.get(nome_usuario, ()))]
+
+    def encerrar_rodada(self):
+        """Retira as apostas que sobraram quando o avião caiu, todas com ganhos zero."""
+        perdidas = [(nome_usuario, valor_aposta, 0) for nome_usuario, valor_aposta in self.apostas_pendentes.values()]
+        self.__init__()
+        return perdidas
+
+    def total_pendente(self, nome_usuario):
+        """Soma das apostas do usuário que ainda estão em jogo."""
+        return sum(self.apostas_pendentes[i][1] for i in self.apostas_por_usuario.get(nome_usuario, ()))
+
+# --- Cadeia de Resultados Verificáveis ---
+# Os resultados do Crash e da Roleta podem vir de uma cadeia reversa de SHA-256 gerada de antemão:
+# a partir de um segredo x0, x(k+1) = sha256(xk), e as rodadas usam os elos de trás para frente. O
+# hash final, publicado antes da primeira rodada, compromete a cadeia inteira: cada elo revelado
+# tem como hash o elo da rodada anterior, e nenhum elo futuro pode ser calculado pelos passados.
+
+# Cabeçalho do arquivo: mágica, versão, quantidade de elos e hash final; depois, 32 bytes por elo, na ordem das rodadas.
+CABECALHO_CADEIA = struct.Struct("<8sIQ32s")
+MAGICA_CADEIA = b"PBCADEIA"
+TAMANHO_ELO = 32
+# Posições reservadas de uma vez por processo, para não gravar no banco a cada rodada.
+BLOCO_POSICOES_CADEIA = 64
+JOGOS_CADEIA = ('Crash', 'Roleta')
+
+def pasta_cadeias():
+    return os.path.join(os.path.dirname(os.path.abspath(ARQUIVO_BD)), "cadeias")
+
+def ponto_crash_do_elo(elo):
+    """
+    Ponto de crash de um elo, com a mesma distribuição e o mesmo piso de 1.01 de sortear_ponto_crash,
+    sem arredondar: Gamma(2, 2) é a soma de duas exponenciais de média 2, uma de cada uniforme de
+    52 bits tirado dos primeiros 16 bytes.
+    """
+    u1, u2 = (int.from_bytes(elo[i:i + 8], 'big') >> 12 for i in (0, 8))
+    return max(1.01, -2 * (math.log1p(-u1 / 2 ** 52) + math.log1p(-u2 / 2 ** 52)))
+
+def numero_roleta_do_elo(elo):
+    """Número da roleta de um elo: os primeiros 8 bytes módulo 37."""
+    return int.from_bytes(elo[:8], 'big') % 37
+
+DERIVACOES_CADEIA = {'Crash': ponto_crash_do_elo, 'Roleta': numero_roleta_do_elo}
+
+class CadeiaResultados:
+    """
+    Um arquivo de cadeia mapeado em memória. 'elo(posicao)' é uma leitura direta no mapa, e
+    'proxima_posicao' só vai ao banco uma vez a cada BLOCO_POSICOES_CADEIA rodadas.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magica, _, self.quantidade, self.hash_final = CABECALHO_CADEIA.unpack_from(self._mapa)
+        if magica != MAGICA_CADEIA or len(self._mapa) != CABECALHO_CADEIA.size + self.quantidade * TAMANHO_ELO:
+            raise ValueError(f"{caminho} não é um arquivo de cadeia válido.")
+        self.identificador = self.hash_final.hex()[:16]
+        self._trava = threading.Lock()
+        # Posições já reservadas no banco por este processo e ainda não usadas, em ordem.
+        self._livres, self._fim_bloco = deque(), 0
+
+    def elo(self, posicao):
+        inicio = CABECALHO_CADEIA.size + posicao * TAMANHO_ELO
+        return self._mapa[inicio:inicio + TAMANHO_ELO]
+
+    def posicoes_usadas(self):
+        with conexao_bd(arquivo=ARQUIVO_BD) as conexao:
+            linha = conexao.execute("SELECT ultimo_id FROM marcas_processamento WHERE nome = ?", (f"cadeia_{self.identificador}",)).fetchone()
+        return linha[0] if linha else 0
+
+    def _reservar_bloco(self, tamanho=BLOCO_POSICOES_CADEIA):
+        # A marca é compartilhada por todos os processos que usam o banco; cada um reserva o seu bloco.
+        nome = f"cadeia_{self.identificador}"
+        with conexao_bd(arquivo=ARQUIVO_BD) as conexao:
+            conexao.execute("INSERT OR IGNORE INTO marcas_processamento (nome, ultimo_id) VALUES (?, 0)", (nome,))
+            conexao.execute("UPDATE marcas_processamento SET ultimo_id = ultimo_id + ? WHERE nome = ?", (tamanho, nome))
+            fim = conexao.execute("SELECT ultimo_id FROM marcas_processamento WHERE nome = ?", (nome,)).fetchone()[0]
+            conexao.commit()
+        self._fim_bloco = min(fim, self.quantidade)
+        self._livres.extend(range(fim - tamanho, self._fim_bloco))
+
+    def proxima_posicao(self):
+        """Posição do próximo elo ainda não usado, ou None se a cadeia acabou."""
+        with self._trava:
+            if not self._livres and self._fim_bloco < self.quantidade:
+                self._reservar_bloco()
+            return self._livres.popleft() if self._livres else None
+
+    def reservar_posicoes(self, quantidade):
+        """
+        Tira até 'quantidade' posições para um chamador só, indo ao banco uma vez se o bloco deste
+        processo não bastar. Menos posições que o pedido significa que a cadeia acabou. As que o
+        chamador não usar voltam com 'devolver_posicoes', para não deixar buracos na sequência.
+        """
+        with self._trava:
+            if len(self._livres) < quantidade and self._fim_bloco < self.quantidade:
+                self._reservar_bloco(max(quantidade - len(self._livres), BLOCO_POSICOES_CADEIA))
+            return [self._livres.popleft() for _ in range(min(quantidade, len(self._livres)))]
+
+    def devolver_posicoes(self, posicoes):
+        """Devolve posições não usadas de 'reservar_posicoes'; elas saem antes das demais."""
+        with self._trava:
+            self._livres.extendleft(reversed(posicoes))
+
+# Cadeias abertas, por identificador, e a cadeia em uso de cada jogo (carregadas por carregar_cadeias).
+CADEIAS = {}
+CADEIAS_ATIVAS = {}
+
+def obter_cadeia(identificador):
+    """Abre (uma vez) a cadeia de um identificador, procurando o arquivo '<jogo>_<identificador>.bin'."""
+    if identificador not in CADEIAS:
+        for nome in os.listdir(pasta_cadeias()):
+            if nome.endswith(f"_{identificador}.bin"):
+                CADEIAS[identificador] = CadeiaResultados(os.path.join(pasta_cadeias(), nome))
+                break
         else:
-            self.label_pontos_dealer.configure(text="Dealer: 0")
-
-    def reiniciar_jogo(self):
-        self.mao_jogador, self.mao_dealer = [], []
-        self.atualizar_interface()
-        self.label_status.configure(text="Faça sua aposta para começar")
-        self.botao_apostar.configure(state="normal")
-        self.botao_pedir.configure(state="disabled")
-        self.botao_parar.configure(state="disabled")
-        self.entrada_aposta.delete(0, 'end')
-        self.label_pontos_jogador.configure(text="Você: 0")
-        self.label_pontos_dealer.configure(text="Dealer: 0")
-
-class JogoRoleta(TelaJogoBase):
-    """Tela e lógica do jogo da Roleta."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent, controlador, "🌀 Roleta")
-        self.numeros = {n: c for n, c in zip(range(37), (['green'] + ['red', 'black'] * 18))}
-        self.mapa_cores = {"red": "#C0392B", "black": "#2C3E50", "green": "#27AE60"}
-        self.historico = []
-        self.apostas = []
-        self.mapa_traducao = {'red':'Vermelho','black':'Preto','even':'Par','odd':'Ímpar','low':'1-18 (Menores)','high':'19-36 (Maiores)'}
-        self.frame_jogo.grid_columnconfigure(0, weight=2)
-        self.frame_jogo.grid_columnconfigure(1, weight=1)
-        self.frame_jogo.grid_rowconfigure(0, weight=1)
-        painel_tabuleiro = ctk.CTkFrame(self.frame_jogo, fg_color="transparent")
-        painel_tabuleiro.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
-        painel_tabuleiro.grid_rowconfigure(1, weight=1)
-        painel_tabuleiro.grid_columnconfigure(0, weight=1)
-        frame_apostas_externas = ctk.CTkFrame(painel_tabuleiro)
-        frame_apostas_externas.grid(row=0, column=0, sticky="ew", pady=(0, 10))
-        frame_apostas_externas.grid_columnconfigure(tuple(range(6)), weight=1)
-        ctk.CTkButton(frame_apostas_externas, text="1-18", command=lambda: self.adicionar_aposta('range', 'low')).grid(row=0, column=0, sticky="ew", padx=2, pady=2)
-        ctk.CTkButton(frame_apostas_externas, text="Par", command=lambda: self.adicionar_aposta('parity', 'even')).grid(row=0, column=1, sticky="ew", padx=2, pady=2)
-        ctk.CTkButton(frame_apostas_externas, text="Vermelho", fg_color=self.mapa_cores['red'], command=lambda: self.adicionar_aposta('color', 'red')).grid(row=0, column=2, sticky="ew", padx=2, pady=2)
-        ctk.CTkButton(frame_apostas_externas, text="Preto", fg_color=self.mapa_cores['black'], text_color="white", command=lambda: self.adicionar_aposta('color', 'black')).grid(row=0, column=3, sticky="ew", padx=2, pady=2)
-        ctk.CTkButton(frame_apostas_externas, text="Ímpar", command=lambda: self.adicionar_aposta('parity', 'odd')).grid(row=0, column=4, sticky="ew", padx=2, pady=2)
-        ctk.CTkButton(frame_apostas_externas, text="19-36", command=lambda: self.adicionar_aposta('range', 'high')).grid(row=0, column=5, sticky="ew", padx=2, pady=2)
-        frame_grid_numeros = ctk.CTkScrollableFrame(painel_tabuleiro, label_text="Apostar em Números")
-        frame_grid_numeros.grid(row=1, column=0, sticky="nsew")
-        for i in range(37):
-            btn = ctk.CTkButton(frame_grid_numeros, text=str(i), fg_color=self.mapa_cores[self.numeros[i]], width=40, command=lambda n=i: self.adicionar_aposta('number', n))
-            btn.grid(row=(i//6), column=i%6, padx=2, pady=2)
-        painel_controle = ctk.CTkFrame(self.frame_jogo)
-        painel_controle.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
-        painel_controle.grid_columnconfigure(0, weight=1)
-        painel_controle.grid_rowconfigure(2, weight=1)
-        self.label_resultado = ctk.CTkLabel(painel_controle, text="?", font=ctk.CTkFont(size=60, weight="bold"), fg_color="grey", height=120, corner_radius=10)
-        self.label_resultado.grid(row=0, column=0, sticky="ew", pady=10, padx=10)
-        self.frame_historico = ctk.CTkFrame(painel_controle, fg_color="transparent")
-        self.frame_historico.grid(row=1, column=0, pady=5, padx=10)
-        self.frame_scroll_apostas = ctk.CTkScrollableFrame(painel_controle, label_text="Suas Apostas")
-        self.frame_scroll_apostas.grid(row=2, column=0, sticky="nsew", pady=5, padx=10)
-        self.label_aposta_total = ctk.CTkLabel(painel_controle, text="Aposta Total: $0")
-        self.label_aposta_total.grid(row=3, column=0, pady=5, padx=10)
-        self.botao_girar = ctk.CTkButton(painel_controle, text="Girar!", command=self.girar, state="disabled", height=40)
-        self.botao_girar.grid(row=4, column=0, sticky="ew", pady=(5,2), padx=10)
-        self.botao_limpar_apostas = ctk.CTkButton(painel_controle, text="Limpar Apostas", fg_color="grey", command=self.limpar_apostas)
-        self.botao_limpar_apostas.grid(row=5, column=0, sticky="ew", pady=(2,10), padx=10)
-
-    def ao_mostrar(self, data=None):
-        super().ao_mostrar(data)
-        self.limpar_apostas()
-
-    def adicionar_aposta(self, tipo_aposta, valor):
-        valor_exibicao = self.mapa_traducao.get(valor, str(valor))
-        quantia = CaixaDialogo(self, titulo="Valor da Aposta", texto=f"Apostar em {valor_exibicao}:").obter_entrada()
-        if quantia and quantia > 0:
-            saldo_disponivel = self.controlador.obter_saldo_usuario() - sum(b['quantia'] for b in self.apostas)
-            if quantia > saldo_disponivel:
-                self.controlador.exibir_mensagem("Erro", "Saldo insuficiente.")
-                return
-            self.apostas.append({'tipo': tipo_aposta, 'valor': valor, 'quantia': quantia})
-            self.atualizar_exibicao_apostas()
-
-    def atualizar_exibicao_apostas(self):
-        for widget in self.frame_scroll_apostas.winfo_children(): widget.destroy()
-        total = sum(b['quantia'] for b in self.apostas)
-        for aposta in self.apostas:
-            valor_exibicao = self.mapa_traducao.get(aposta['valor'], str(aposta['valor']))
-            ctk.CTkLabel(self.frame_scroll_apostas, text=f"{valor_exibicao}: ${aposta['quantia']}").pack(anchor="w", padx=5)
-        self.label_aposta_total.configure(text=f"Aposta Total: ${total}")
-        self.botao_girar.configure(state="normal" if total > 0 else "disabled")
-
-    def limpar_apostas(self):
-        self.apostas.clear()
-        self.atualizar_exibicao_apostas()
-
-    def girar(self):
-        aposta_total = sum(b['quantia'] for b in self.apostas)
-        if aposta_total <= 0: return
-        self.controlador.atualizar_saldo_usuario_bd(-aposta_total)
-        self.atualizar_exibicao_saldo(-aposta_total)
-        self.botao_girar.configure(state="disabled")
-        self.botao_limpar_apostas.configure(state="disabled")
-        self.animar_giro(random.randint(0, 36), 20, 50)
-
-    def animar_giro(self, numero_vencedor, passos, delay):
-        if passos > 0:
-            num = random.randint(0, 36)
-            self.label_resultado.configure(text=str(num), fg_color=self.mapa_cores[self.numeros[num]])
-            self._id_after = self.after(delay, lambda: self.animar_giro(numero_vencedor, passos - 1, int(delay * 1.15)))
+            raise FileNotFoundError(f"Cadeia {identificador} não encontrada em {pasta_cadeias()}.")
+    return CADEIAS[identificador]
+
+def carregar_cadeias():
+    """Mapeia, para cada jogo, o arquivo de cadeia mais recente da pasta 'cadeias/', se houver."""
+    if not os.path.isdir(pasta_cadeias()):
+        return
+    for jogo in JOGOS_CADEIA:
+        arquivos = [os.path.join(pasta_cadeias(), nome) for nome in os.listdir(pasta_cadeias())
+                    if nome.startswith(f"{jogo.lower()}_") and nome.endswith(".bin")]
+        if arquivos:
+            cadeia = CadeiaResultados(max(arquivos, key=os.path.getmtime))
+            CADEIAS.setdefault(cadeia.identificador, cadeia)
+            CADEIAS_ATIVAS[jogo] = CADEIAS[cadeia.identificador]
+
+def gerar_cadeia(jogo, quantidade, segredo=None):
+    """
+    Gera a cadeia de 'quantidade' elos de um jogo direto no arquivo mapeado, do último elo para o
+    primeiro, sem guardar a cadeia na memória. Retorna o caminho e o hash final, que deve ser publicado.
+    """
+    os.makedirs(pasta_cadeias(), exist_ok=True)
+    temporario = os.path.join(pasta_cadeias(), f".{jogo.lower()}_gerando.bin")
+    sha256 = hashlib.sha256
+    with open(temporario, 'wb+') as arquivo:
+        arquivo.truncate(CABECALHO_CADEIA.size + quantidade * TAMANHO_ELO)
+        with mmap.mmap(arquivo.fileno(), 0) as mapa:
+            elo = segredo or os.urandom(TAMANHO_ELO)
+            for inicio in range(CABECALHO_CADEIA.size + (quantidade - 1) * TAMANHO_ELO, CABECALHO_CADEIA.size - 1, -TAMANHO_ELO):
+                mapa[inicio:inicio + TAMANHO_ELO] = elo
+                elo = sha256(elo).digest()
+            CABECALHO_CADEIA.pack_into(mapa, 0, MAGICA_CADEIA, 1, quantidade, elo)
+            mapa.flush()
+    caminho = os.path.join(pasta_cadeias(), f"{jogo.lower()}_{elo.hex()[:16]}.bin")
+    os.replace(temporario, caminho)
+    return caminho, elo.hex()
+
+def verificar_cadeia(caminho, tamanho_bloco=1 << 20):
+    """
+    Confere um arquivo de cadeia numa passada só, em blocos de 'tamanho_bloco' bytes: o hash de cada
+    elo deve ser o elo anterior, e o do primeiro, o hash final do cabeçalho. Retorna
+    (elos conferidos, posição do primeiro elo inválido ou None).
+    """
+    sha256 = hashlib.sha256
+    with open(caminho, 'rb') as arquivo:
+        magica, _, quantidade, anterior = CABECALHO_CADEIA.unpack(arquivo.read(CABECALHO_CADEIA.size))
+        if magica != MAGICA_CADEIA:
+            raise ValueError(f"{caminho} não é um arquivo de cadeia válido.")
+        posicao = 0
+        tamanho_bloco -= tamanho_bloco % TAMANHO_ELO
+        while bloco := arquivo.read(tamanho_bloco):
+            for inicio in range(0, len(bloco), TAMANHO_ELO):
+                elo = bloco[inicio:inicio + TAMANHO_ELO]
+                if sha256(elo).digest() != anterior:
+                    return posicao, posicao
+                anterior = elo
+                posicao += 1
+    return posicao, (posicao if posicao != quantidade else None)
+
+def conferir_elo(elo, hash_final, maximo_passos=10_000_000):
+    """
+    Verificação independente de uma rodada publicada, sem o arquivo: aplica o SHA-256 ao elo até
+    chegar ao hash final. Retorna a posição da rodada na cadeia, ou None se não chegar.
+    """
+    for passos in range(maximo_passos):
+        elo = hashlib.sha256(elo).digest()
+        if elo == hash_final:
+            return passos
+    return None
+
+# --- Sorteio por Rodada e Reprodução ---
+# Cada rodada sorteia com o seu próprio random.Random. A semente e as ações do jogador vão para a
+# tabela 'rodadas', na mesma transação da liquidação, e bastam para refazer a rodada sem interface.
+
+class ServicoSorteio:
+    """
+    Entrega um gerador novo por rodada. Sem semente fixa, cada semente vem do 'secrets'; com
+    'fixar_semente', a sequência de sementes das rodadas se repete (testes e teste de carga).
+    """
+    def __init__(self):
+        self._gerador_sementes = None
+        self._trava = threading.Lock()
+
+    def fixar_semente(self, semente):
+        self._gerador_sementes = random.Random(semente)
+
+    def nova_rodada(self):
+        """Retorna (semente, gerador) da próxima rodada. A semente cabe num INTEGER do SQLite."""
+        if self._gerador_sementes is None:
+            semente = secrets.randbits(63)
         else:
-            self.label_resultado.configure(text=str(numero_vencedor), fg_color=self.mapa_cores[self.numeros[numero_vencedor]])
-            ganhos_totais = self.calcular_ganhos(numero_vencedor)
-            aposta_total = sum(b['quantia'] for b in self.apostas)
-            self.controlador.atualizar_saldo_usuario_bd(ganhos_totais, nome_jogo="Roleta", valor_aposta=aposta_total)
-            if ganhos_totais > 0:
-                self.atualizar_exibicao_saldo(ganhos_totais - aposta_total)
-                self.controlador.exibir_mensagem("Você Ganhou!", f"Parabéns! Você ganhou ${ganhos_totais:,.2f}!")
-            else:
-                self.controlador.exibir_mensagem("Não foi desta vez", "Mais sorte na próxima rodada!")
-            self.historico.append(numero_vencedor)
-            self.atualizar_historico()
-            self.limpar_apostas()
-            self.botao_limpar_apostas.configure(state="normal")
-
-    def calcular_ganhos(self, num_vencedor):
-        ganhos_totais = 0
-        cor_vencedora = self.numeros[num_vencedor]
-        eh_par = (num_vencedor % 2 == 0 and num_vencedor != 0)
-        eh_baixo = (1 <= num_vencedor <= 18)
-        for aposta in self.apostas:
-            pagamento = 0
-            if aposta['tipo'] == 'number' and aposta['valor'] == num_vencedor:
-                pagamento = obter_configuracao_jogo('pagamento_roleta_numero')
-            elif aposta['tipo'] == 'color' and aposta['valor'] == cor_vencedora:
-                pagamento = 2
-            elif aposta['tipo'] == 'parity' and ((aposta['valor'] == 'even' and eh_par) or (aposta['valor'] == 'odd' and not eh_par)):
-                pagamento = 2
-            elif aposta['tipo'] == 'range' and ((aposta['valor'] == 'low' and eh_baixo) or (aposta['valor'] == 'high' and not eh_baixo)):
-                pagamento = 2
-            if pagamento > 0:
-                ganhos_totais += aposta['quantia'] * pagamento
-        return ganhos_totais
-
-    def atualizar_historico(self):
-        for widget in self.frame_historico.winfo_children(): widget.destroy()
-        linha_historico = ctk.CTkFrame(self.frame_historico, fg_color="transparent")
-        linha_historico.pack()
-        for num in self.historico[-10:]:
-            ctk.CTkLabel(linha_historico, text=str(num), fg_color=self.mapa_cores[self.numeros[num]], corner_radius=5, width=28, height=28).pack(side="left", padx=2)
-
-class JogoCrash(TelaJogoBase):
-    """Tela e lógica do jogo Crash (Aviãozinho)."""
-    def __init__(self, parent, controlador):
-        super().__init__(parent, controlador, "✈️ Aviãozinho")
-        self.estado_jogo = "aguardando"
-        self.multiplicador = 1.0
-        self.ponto_crash = 1.0
-        self.valor_aposta = 0
-        self.saque_efetuado = False
-        self.tempo_inicio = 0
-        self.pontos_grafico = []
-        self.historico = []
-        self.imagem_aviao_photo = None
-
-        self.frame_jogo.grid_columnconfigure(0, weight=3)
-        self.frame_jogo.grid_columnconfigure(1, weight=1)
-        self.frame_jogo.grid_rowconfigure(0, weight=1)
-
-        self.canvas = Canvas(self.frame_jogo, bg="#2B2B2B", bd=0, highlightthickness=0, relief='ridge')
-        self.canvas.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
-        self.canvas.bind("<Configure>", self.desenhar_grafico)
-
-        painel_controle = ctk.CTkFrame(self.frame_jogo)
-        painel_controle.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
-        painel_controle.grid_columnconfigure(0, weight=1)
-        painel_controle.grid_rowconfigure(3, weight=1)
-
-        frame_aposta = ctk.CTkFrame(painel_controle, fg_color="transparent")
-        frame_aposta.grid(row=0, column=0, pady=10, padx=10, sticky="ew")
-        self.entrada_aposta = ctk.CTkEntry(frame_aposta, placeholder_text="Aposta")
-        self.entrada_aposta.pack(side="left", fill="x", expand=True, padx=(0,5))
-        self.botao_apostar = ctk.CTkButton(frame_aposta, text="Apostar", command=self.fazer_aposta, width=100)
-        self.botao_apostar.pack(side="left")
-
-        self.botao_saque = ctk.CTkButton(painel_controle, text="Sacar!", font=ctk.CTkFont(size=18, weight="bold"), height=50, state="disabled", fg_color="#10a37f", hover_color="#0e8e6f", command=self.fazer_saque)
-        self.botao_saque.grid(row=1, column=0, sticky="ew", pady=10, padx=10)
-
-        self.label_status = ctk.CTkLabel(painel_controle, text="", font=ctk.CTkFont(size=16))
-        self.label_status.grid(row=2, column=0, pady=10, padx=10)
-
-        self.frame_historico = ctk.CTkScrollableFrame(painel_controle, label_text="Histórico")
-        self.frame_historico.grid(row=3, column=0, sticky="nsew", pady=10, padx=10)
-
-    def ao_mostrar(self, data=None):
-        super().ao_mostrar(data)
-        self.reiniciar_rodada()
-
-    def fazer_aposta(self):
-        if self.estado_jogo != "aguardando":
-            self.controlador.exibir_mensagem("Aviso", "Aguarde a próxima rodada.")
-            return
+            with self._trava:
+                semente = self._gerador_sementes.getrandbits(63)
+        return semente, random.Random(semente)
+
+SORTEIO = ServicoSorteio()
+SORTEADORES = {'Crash': sortear_ponto_crash, 'Roleta': sortear_numero_roleta}
+
+def sortear_rodada(jogo):
+    """
+    Resultado de uma rodada de Crash ou Roleta: do próximo elo da cadeia do jogo, se houver uma
+    carregada, ou de um gerador com semente nova. Retorna (resultado, semente, cadeia); numa
+    rodada da cadeia, 'semente' é a posição do elo e 'cadeia', o identificador da cadeia.
+    """
+    cadeia = CADEIAS_ATIVAS.get(jogo)
+    posicao = cadeia.proxima_posicao() if cadeia else None
+    if posicao is not None:
+        return DERIVACOES_CADEIA[jogo](cadeia.elo(posicao)), posicao, cadeia.identificador
+    if cadeia:
+        CADEIAS_ATIVAS.pop(jogo, None)
+        print(f"Aviso: a cadeia {cadeia.identificador} do {jogo} acabou; as rodadas voltam a usar sementes. "
+              f"Gere outra com 'cadeia gerar {jogo.lower()}'.", file=sys.stderr)
+    semente, gerador = SORTEIO.nova_rodada()
+    return SORTEADORES[jogo](gerador), semente, None
+
+TIPOS_APOSTA_ROLETA = {'n': 'number', 'c': 'color', 'p': 'parity', 'r': 'range'}
+VALORES_APOSTA_ROLETA = {'number': range(37), 'color': ('red', 'black'), 'parity': ('even', 'odd'), 'range': ('low', 'high')}
+
+def codificar_apostas_roleta(apostas, pagamento_numero):
+    """Mesa da roleta em texto compacto: '35|n7:10,cred:20' (pagamento do número | tipo, valor e quantia)."""
+    fichas = (f"{a['tipo'][0]}{int(a['valor']) if a['tipo'] == 'number' else a['valor']}:{a['quantia']:.15g}" for a in apostas)
+    return f"{pagamento_numero:g}|" + ",".join(fichas)
+
+def decodificar_fichas_roleta(fichas):
+    """Apostas da roleta a partir das fichas em texto compacto, ex.: 'n7:10,cred:20'."""
+    apostas = []
+    for ficha in fichas.split(','):
+        valor, quantia = ficha[1:].split(':')
+        tipo = TIPOS_APOSTA_ROLETA[ficha[0]]
+        apostas.append({'tipo': tipo, 'valor': int(valor) if tipo == 'number' else valor, 'quantia': float(quantia)})
+    return apostas
+
+def decodificar_apostas_roleta(acoes):
+    """Inverso de codificar_apostas_roleta: retorna (apostas, pagamento_numero)."""
+    pagamento, fichas = acoes.split('|')
+    return decodificar_fichas_roleta(fichas), float(pagamento)
+
+def acoes_crash(liquidacoes):
+    """Acrescenta a cada liquidação do Crash o multiplicador do saque (vazio se o avião caiu antes)."""
+    return [(usuario, aposta, ganhos, f"{ganhos / aposta:.15g}" if ganhos else "") for usuario, aposta, ganhos in liquidacoes]
+
+def _reproduzir_blackjack(gerador, acoes, valor_aposta, elo=None):
+    pedidas = iter(range(acoes.count('P')))
+    return jogar_mao_blackjack(gerador, lambda mao, carta_dealer: next(pedidas, None) is not None, valor_aposta)[0]
+
+def _reproduzir_roleta(gerador, acoes, valor_aposta, elo=None):
+    apostas, pagamento_numero = decodificar_apostas_roleta(acoes)
+    numero = numero_roleta_do_elo(elo) if elo else sortear_numero_roleta(gerador)
+    return calcular_ganhos_roleta(apostas, numero, pagamento_numero)
+
+def _reproduzir_crash(gerador, acoes, valor_aposta, elo=None):
+    ponto_crash = ponto_crash_do_elo(elo) if elo else sortear_ponto_crash(gerador)
+    return valor_aposta * float(acoes) if acoes and float(acoes) < ponto_crash else 0
+
+REPRODUTORES = {'Blackjack': _reproduzir_blackjack, 'Roleta': _reproduzir_roleta, 'Crash': _reproduzir_crash}
+
+def reproduzir_rodada(jogo, semente, acoes, valor_aposta, cadeia=None):
+    """
+    Refaz uma rodada gravada só com as regras dos jogos e retorna os ganhos que ela deveria pagar.
+    Nas rodadas de uma 'cadeia', o resultado vem do elo na posição 'semente'.
+    """
+    if cadeia:
+        return REPRODUTORES[jogo](None, acoes, valor_aposta, obter_cadeia(cadeia).elo(semente))
+    return REPRODUTORES[jogo](random.Random(semente), acoes, valor_aposta)
+
+def _conferir_rodadas(inicio, fim, jogo, nome_usuario, tolerancia, limite_divergencias):
+    filtros, parametros = [], []
+    for condicao, valor in (("timestamp >= ?", inicio), ("timestamp <= ?", fim), ("jogo = ?", jogo), ("nome_usuario = ?", nome_usuario)):
+        if valor:
+            filtros.append(condicao)
+            parametros.append(valor)
+    where = f" WHERE {' AND '.join(filtros)}" if filtros else ""
+    conferidas, divergentes, divergencias = 0, 0, []
+    with conexao_bd() as conexao:
+        cursor = conexao.execute(f"SELECT id, nome_usuario, jogo, semente, acoes, valor_aposta, ganhos, timestamp, cadeia "
+                                 f"FROM rodadas{where} ORDER BY id", parametros)
+        for id_rodada, usuario, jogo_rodada, semente, acoes, valor_aposta, ganhos, timestamp, cadeia in cursor:
+            conferidas += 1
+            try:
+                esperado = reproduzir_rodada(jogo_rodada, semente, acoes, valor_aposta, cadeia)
+            except (KeyError, ValueError, IndexError, OSError):
+                esperado = None
+            if esperado is None or abs(esperado - ganhos) > tolerancia:
+                divergentes += 1
+                if len(divergencias) < limite_divergencias:
+                    divergencias.append({'id': id_rodada, 'usuario': usuario, 'jogo': jogo_rodada, 'timestamp': timestamp,
+                                         'semente': semente, 'cadeia': cadeia, 'acoes': acoes, 'ganhos': ganhos, 'esperado': esperado})
+    return conferidas, divergentes, divergencias
+
+@medir
+def reproduzir_rodadas(inicio=None, fim=None, jogo=None, nome_usuario=None, tolerancia=0.005, limite_divergencias=100):
+    """
+    Refaz as rodadas gravadas no período (todas, sem período), sem interface nem animações, e compara
+    os ganhos recalculados com os pagos. Depois de uma mudança nas regras, mostra quais rodadas de
+    um dia de jogo passariam a pagar diferente. Retorna um relatório com até 'limite_divergencias'.
+    """
+    inicio_medicao = time.perf_counter()
+    argumentos = (inicio, fim, jogo, nome_usuario, tolerancia, limite_divergencias)
+    partes = nos_shards(_conferir_rodadas, *argumentos) if consulta_distribuida() else [_conferir_rodadas(*argumentos)]
+    duracao = time.perf_counter() - inicio_medicao
+    conferidas = sum(p[0] for p in partes)
+    return {
+        'rodadas': conferidas,
+        'divergentes': sum(p[1] for p in partes),
+        'duracao_s': round(duracao, 3),
+        'rodadas_por_s': round(conferidas / duracao) if duracao else 0,
+        'divergencias': [d for p in partes for d in p[2]][:limite_divergencias],
+    }
+
+# --- Jogo Automático ---
+
+# Rodadas máximas de uma sessão automática e rodadas liquidadas por transação.
+MAXIMO_RODADAS_AUTOMATICO = 100_000
+LOTE_AUTOMATICO = 200
+
+def _pedir_estrategia_basica(mao, carta_dealer):
+    """Estratégia básica simplificada, só com pedir e parar."""
+    valor, dealer = valor_mao(mao), valor_carta(carta_dealer)
+    if any(c.endswith('_A') for c in mao) and sum(1 if c.endswith('_A') else valor_carta(c) for c in mao) + 10 == valor:
+        return valor <= 17 or (valor == 18 and dealer >= 9)
+    if valor <= 11:
+        return True
+    if valor == 12:
+        return dealer in (2, 3) or dealer >= 7
+    return valor <= 16 and dealer >= 7
+
+ESTRATEGIAS_BLACKJACK = {
+    'basica': _pedir_estrategia_basica,
+    'dealer': lambda mao, carta_dealer: valor_mao(mao) < 17,
+    'conservadora': lambda mao, carta_dealer: valor_mao(mao) <= 11,
+}
+MOTIVOS_PARADA = {'rodadas': "rodadas concluídas", 'limite_perda': "limite de perda", 'meta_ganho': "meta de ganho atingida",
+                  'saldo_minimo': "saldo mínimo"}
+
+@medir
+def jogar_automatico(nome_usuario, jogo, rodadas, valor_aposta=None, apostas=None, estrategia='basica',
+                     limite_perda=None, meta_ganho=None, saldo_minimo=0, tamanho_lote=LOTE_AUTOMATICO):
+    """
+    Joga até 'rodadas' rodadas seguidas, sem interface: mãos de Blackjack de 'valor_aposta' com a
+    'estrategia', ou a mesa 'apostas' da Roleta repetida. Antes de cada rodada, para se perder a
+    aposta inteira passaria do 'limite_perda' ou deixaria o saldo abaixo do 'saldo_minimo'; depois,
+    para se o resultado da sessão chegar à 'meta_ganho'. Cada lote de até 'tamanho_lote' rodadas é
+    uma transação só, com os débitos, pagamentos, logs e 'rodadas' de cada uma. Retorna o resumo.
+    """
+    if jogo == 'Blackjack':
+        pedir, aposta_rodada = ESTRATEGIAS_BLACKJACK[estrategia], valor_aposta or 0
+    else:
+        pagamento_numero = obter_configuracao_jogo('pagamento_roleta_numero')
+        aposta_rodada = sum(a['quantia'] for a in apostas or ())
+        acoes_roleta = codificar_apostas_roleta(apostas, pagamento_numero) if apostas else ""
+    if aposta_rodada <= 0:
+        raise ValueError("A aposta de cada rodada deve ser maior que zero.")
+    rodadas = min(rodadas, MAXIMO_RODADAS_AUTOMATICO)
+    inicio = time.perf_counter()
+    resumo = {'jogo': jogo, 'rodadas': 0, 'vitorias': 0, 'total_apostado': 0, 'total_pago': 0, 'resultado': 0,
+              'maior_ganho': 0, 'saldo_final': None, 'lotes': 0, 'parada': 'rodadas'}
+    cadeia_roleta = CADEIAS_ATIVAS.get('Roleta') if jogo == 'Roleta' else None
+    while resumo['rodadas'] < rodadas and resumo['parada'] == 'rodadas':
+        quantidade = min(tamanho_lote, rodadas - resumo['rodadas'])
+        # As posições da cadeia são reservadas antes da transação, porque a reserva grava no banco;
+        # cada rodada só usa a sua ao ser jogada, e as que não ficarem gravadas voltam para a cadeia.
+        posicoes = cadeia_roleta.reservar_posicoes(quantidade) if cadeia_roleta else []
+        usadas = gravadas = 0
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        livro, logs, registros = [], [], []
         try:
-            aposta = int(self.entrada_aposta.get())
-        except (ValueError, TypeError):
-            self.controlador.exibir_mensagem("Erro", "Aposta inválida.")
-            return
-        if not (0 < aposta <= self.controlador.obter_saldo_usuario()):
-            self.controlador.exibir_mensagem("Erro", "Saldo insuficiente.")
+            with conexao_bd(nome_usuario) as conexao:
+                cursor = conexao.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                linha = cursor.execute("SELECT saldo FROM usuarios WHERE nome_usuario = ?", (nome_usuario,)).fetchone()
+                if linha is None:
+                    conexao.rollback()
+                    raise ValueError("Usuário não encontrado.")
+                saldo = linha[0]
+                for _ in range(quantidade):
+                    if limite_perda is not None and resumo['resultado'] - aposta_rodada < -limite_perda:
+                        resumo['parada'] = 'limite_perda'
+                        break
+                    if saldo - aposta_rodada < max(saldo_minimo or 0, 0):
+                        resumo['parada'] = 'saldo_minimo'
+                        break
+                    if jogo == 'Blackjack':
+                        (semente, gerador), cadeia = SORTEIO.nova_rodada(), None
+                        ganhos, acoes = jogar_mao_blackjack(gerador, pedir, aposta_rodada)
+                    else:
+                        if usadas < len(posicoes):
+                            semente, cadeia = posicoes[usadas], cadeia_roleta.identificador
+                            usadas += 1
+                            numero = DERIVACOES_CADEIA['Roleta'](cadeia_roleta.elo(semente))
+                        else:
+                            # Sem cadeia, ou a cadeia acabou: sortear_rodada não vai ao banco.
+                            numero, semente, cadeia = sortear_rodada('Roleta')
+                        ganhos, acoes = calcular_ganhos_roleta(apostas, numero, pagamento_numero), acoes_roleta
+                    saldo += ganhos - aposta_rodada
+                    livro.append((nome_usuario, 'aposta', -aposta_rodada, jogo, timestamp))
+                    if ganhos > 0:
+                        livro.append((nome_usuario, 'pagamento', ganhos, jogo, timestamp))
+                    logs.append((nome_usuario, jogo, aposta_rodada, ganhos - aposta_rodada, timestamp))
+                    registros.append((nome_usuario, jogo, semente, acoes, aposta_rodada, ganhos, timestamp, cadeia))
+                    resumo['rodadas'] += 1
+                    resumo['vitorias'] += ganhos > aposta_rodada
+                    resumo['total_apostado'] += aposta_rodada
+                    resumo['total_pago'] += ganhos
+                    resumo['resultado'] += ganhos - aposta_rodada
+                    resumo['maior_ganho'] = max(resumo['maior_ganho'], ganhos - aposta_rodada)
+                    if meta_ganho is not None and resumo['resultado'] >= meta_ganho:
+                        resumo['parada'] = 'meta_ganho'
+                        break
+                if registros:
+                    cursor.executemany("INSERT INTO livro_razao (nome_usuario, tipo, quantia, referencia, timestamp) VALUES (?, ?, ?, ?, ?)", livro)
+                    cursor.executemany("INSERT INTO logs_apostas (nome_usuario, jogo, valor_aposta, resultado, timestamp) VALUES (?, ?, ?, ?, ?)", logs)
+                    cursor.executemany("INSERT INTO rodadas (nome_usuario, jogo, semente, acoes, valor_aposta, ganhos, timestamp, cadeia) "
+                                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", registros)
+                    resumo['lotes'] += 1
+                conexao.commit()
+                gravadas = usadas
+        finally:
+            if gravadas < len(posicoes):
+                cadeia_roleta.devolver_posicoes(posicoes[gravadas:])
+        resumo['saldo_final'] = saldo
+    resumo['duracao_s'] = round(time.perf_counter() - inicio, 3)
+    return resumo
+
+def descrever_resumo_automatico(resumo):
+    """Texto curto do resumo de uma sessão automática, para as telas e a linha de comando."""
+    return (f"{resumo['rodadas']} rodada(s) de {resumo['jogo']}, {resumo['vitorias']} vitória(s). "
+            f"Apostado: ${resumo['total_apostado']:,.2f} | Pago: ${resumo['total_pago']:,.2f} | "
+            f"Resultado: ${resumo['resultado']:+,.2f}\nParada: {MOTIVOS_PARADA[resumo['parada']]}. "
+            f"Saldo final: ${resumo['saldo_final'] or 0:,.2f}")
+
+# --- SEÇÃO 7: EXECUÇÃO DA APLICAÇÃO ---
+
+def executar_comando_livro(args):
+    if args.acao == 'snapshot':
+        print(f"{criar_snapshots_saldo()} snapshot(s) criado(s).")
+    elif args.acao == 'saldo':
+        if not args.usuario:
+            sys.exit("Informe o usuário.")
+        dados = obter_dados_usuario(args.usuario)
+        print(f"Livro-razão: ${recalcular_saldo(args.usuario):,.2f} | Projeção: ${dados['saldo'] if dados else 0:,.2f}")
+    else:
+        divergencias = reproduzir_livro(args.corrigir)
+        for nome_usuario, saldo, esperado in divergencias:
+            print(f"{nome_usuario}: projeção ${saldo:,.2f}, livro-razão ${esperado:,.2f}")
+        print(f"{len(divergencias)} divergência(s){' corrigida(s)' if args.corrigir and divergencias else ''}.")
+
+def executar_comando_reconciliar(args):
+    relatorio = reconciliar_saldos(args.processos, args.faixa, args.completo)
+    caminho = args.relatorio or f"reconciliacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"{relatorio['usuarios_conferidos']} usuário(s) conferido(s), {relatorio['usuarios_divergentes']} divergente(s) "
+          f"em {relatorio['duracao_s']}s. Relatório: {caminho}")
+    for d in relatorio['divergencias'][:10]:
+        print(f"  {d['usuario']}: saldo ${d['saldo']:,.2f}, esperado ${d['esperado']:,.2f} ({d['diferenca']:+,.2f})")
+
+def executar_comando_reproduzir(args):
+    relatorio = reproduzir_rodadas(args.de, args.ate, args.jogo, args.usuario)
+    if args.relatorio:
+        with open(args.relatorio, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"{relatorio['rodadas']} rodada(s) refeita(s) em {relatorio['duracao_s']}s ({relatorio['rodadas_por_s']:,}/s), "
+          f"{relatorio['divergentes']} com pagamento divergente.")
+    for d in relatorio['divergencias'][:10]:
+        esperado = "erro ao refazer" if d['esperado'] is None else f"${d['esperado']:,.2f}"
+        origem = f"cadeia {d['cadeia']}, elo {d['semente']}" if d['cadeia'] else f"semente {d['semente']}"
+        print(f"  #{d['id']} {d['jogo']} {d['usuario']} {d['timestamp']}: pago ${d['ganhos']:,.2f}, esperado {esperado} "
+              f"({origem}, ações '{d['acoes']}')")
+    if relatorio['divergentes']:
+        sys.exit(1)
+
+def executar_comando_cadeia(args):
+    if args.acao == 'gerar':
+        inicio = time.perf_counter()
+        caminho, hash_final = gerar_cadeia(args.jogo.capitalize(), args.rodadas)
+        print(f"{args.rodadas:,} elos gerados em {time.perf_counter() - inicio:.1f}s: {caminho}")
+        print(f"Hash final (publique antes da primeira rodada): {hash_final}")
+    elif args.acao == 'verificar':
+        caminhos = args.arquivos or sorted(os.path.join(pasta_cadeias(), nome) for nome in os.listdir(pasta_cadeias())
+                                          if nome.endswith(".bin") and not nome.startswith(".")) if os.path.isdir(pasta_cadeias()) else []
+        invalidas = 0
+        for caminho in caminhos:
+            inicio = time.perf_counter()
+            conferidos, invalido = verificar_cadeia(caminho)
+            duracao = time.perf_counter() - inicio
+            situacao = "ok" if invalido is None else f"ELO INVÁLIDO na posição {invalido}"
+            print(f"{caminho}: {conferidos:,} elos em {duracao:.1f}s ({conferidos / duracao * 60 if duracao else 0:,.0f}/min), {situacao}")
+            invalidas += invalido is not None
+        if invalidas:
+            sys.exit(1)
+    elif args.acao == 'conferir':
+        posicao = conferir_elo(bytes.fromhex(args.elo), bytes.fromhex(args.hash_final), args.maximo)
+        if posicao is None:
+            sys.exit(f"O elo não leva ao hash final em até {args.maximo:,} passos.")
+        resultado = DERIVACOES_CADEIA[args.jogo.capitalize()](bytes.fromhex(args.elo))
+        print(f"Rodada {posicao} da cadeia. Resultado do {args.jogo.capitalize()}: {resultado}")
+    else:
+        carregar_cadeias()
+        for jogo in JOGOS_CADEIA:
+            cadeia = CADEIAS_ATIVAS.get(jogo)
+            if not cadeia:
+                print(f"{jogo}: sem cadeia (rodadas por semente).")
+                continue
+            usadas = min(cadeia.posicoes_usadas(), cadeia.quantidade)
+            print(f"{jogo}: cadeia {cadeia.identificador}, {usadas:,} de {cadeia.quantidade:,} elos usados. "
+                  f"Hash final: {cadeia.hash_final.hex()}")
+
+def executar_comando_automatico(args):
+    apostas = None
+    if args.jogo == 'roleta':
+        try:
+            apostas = decodificar_fichas_roleta(args.mesa or "")
+        except (KeyError, ValueError):
+            apostas = None
+        if not apostas or any(a['valor'] not in VALORES_APOSTA_ROLETA[a['tipo']] for a in apostas):
+            sys.exit("Informe a mesa da roleta com --mesa, ex.: 'cred:10,n7:5,peven:5,rlow:5'.")
+    try:
+        resumo = jogar_automatico(args.usuario, args.jogo.capitalize(), args.rodadas, args.aposta, apostas, args.estrategia,
+                                  args.limite_perda, args.meta_ganho, args.saldo_minimo)
+    except ValueError as erro:
+        sys.exit(str(erro))
+    print(descrever_resumo_automatico(resumo))
+    print(f"{resumo['lotes']} transação(ões) em {resumo['duracao_s']}s. Cada rodada está nos logs de apostas e em 'rodadas'.")
+
+def executar_comando_senha(args):
+    medicoes, recomendado = calibrar_custo_senha(args.alvo_ms)
+    for expoente, duracao_ms in medicoes:
+        marca = "  <- recomendado" if expoente == recomendado else ""
+        print(f"n = 2**{expoente:<3}{duracao_ms:>9.1f} ms{marca}")
+    print(f"Custo atual: n = 2**{CUSTO_SENHA['n'].bit_length() - 1}. Alvo: {args.alvo_ms:g} ms.")
+    if args.salvar:
+        definir_configuracao_jogo('custo_senha_log2n', recomendado)
+        print(f"Custo salvo: n = 2**{recomendado}. As senhas são refeitas com ele no próximo login de cada usuário.")
+
+def executar_comando_lote(args):
+    inicio = time.perf_counter()
+    if args.comando == 'importar':
+        importados, ignorados = importar_usuarios(ler_registros(args.arquivo, args.formato), args.lote, args.senha_padrao)
+        print(f"{importados} usuário(s) importado(s), {ignorados} ignorado(s) (nome ou código já existente) "
+              f"em {time.perf_counter() - inicio:.1f}s.")
+        return
+    if args.saida == '-':
+        try:
+            total = exportar_tabela(args.tabela, sys.stdout, args.formato)
+        except BrokenPipeError:
+            # Quem lia a saída (ex.: 'head') fechou o pipe; não há mais para onde escrever.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
             return
-        self.valor_aposta = aposta
-        self.controlador.atualizar_saldo_usuario_bd(-aposta)
-        self.atualizar_exibicao_saldo(-aposta)
-        self.label_status.configure(text=f"Aposta de ${self.valor_aposta:,.2f} feita!")
-        self.botao_apostar.configure(state="disabled")
-
-    def fazer_saque(self):
-        if self.estado_jogo == "correndo" and not self.saque_efetuado:
-            self.saque_efetuado = True
-            ganhos = self.valor_aposta * self.multiplicador
-            self.controlador.atualizar_saldo_usuario_bd(ganhos, nome_jogo="Crash", valor_aposta=self.valor_aposta)
-            self.atualizar_exibicao_saldo(ganhos - self.valor_aposta) # A aposta já foi subtraída
-            self.label_status.configure(text=f"Você sacou com {self.multiplicador:.2f}x!")
-            self.botao_saque.configure(state="disabled", text=f"GANHOU R$ {ganhos:,.2f}")
-
-    def loop_jogo(self):
-        if self.estado_jogo == "correndo":
-            tempo_decorrido = time.time() - self.tempo_inicio
-            self.multiplicador = math.pow(1.05, tempo_decorrido)
-
-            if self.valor_aposta > 0 and not self.saque_efetuado:
-                ganhos_potenciais = self.valor_aposta * self.multiplicador
-                self.botao_saque.configure(text=f"Sacar R$ {ganhos_potenciais:,.2f}")
-
-            if self.multiplicador >= self.ponto_crash:
-                self.estado_jogo = "crashou"
-                self.historico.append(self.ponto_crash)
-                self.atualizar_historico()
-                if self.valor_aposta > 0 and not self.saque_efetuado:
-                    self.label_status.configure(text=f"CRASH! Você perdeu.")
-                    registrar_aposta(self.controlador.usuario_atual, "Crash", self.valor_aposta, 0)
-                else:
-                    self.label_status.configure(text=f"CRASH em {self.ponto_crash:.2f}x")
-                self.botao_saque.configure(state="disabled")
-                self.desenhar_grafico(crashou=True)
-                self._id_after = self.after(3000, self.reiniciar_rodada)
-            else:
-                self.desenhar_grafico()
-                self._id_after = self.after(30, self.loop_jogo)
-
-    def iniciar_corrida(self):
-        self.estado_jogo = "correndo"
-        self.tempo_inicio = time.time()
-        self.ponto_crash = max(1.01, random.gammavariate(2, 2))
-        if self.valor_aposta > 0: self.botao_saque.configure(state="normal")
-        self.loop_jogo()
-
-    def reiniciar_rodada(self):
-        self.estado_jogo = "aguardando"
-        self.multiplicador = 1.0
-        self.valor_aposta = 0
-        self.saque_efetuado = False
-        self.pontos_grafico = []
-        self.botao_apostar.configure(state="normal")
-        self.botao_saque.configure(state="disabled", text="Sacar!")
-        self.entrada_aposta.delete(0, 'end')
-        self.desenhar_grafico()
-        self.contagem_regressiva(5)
-
-    def contagem_regressiva(self, contador):
-        if self._id_after: self.after_cancel(self._id_after)
-        if contador > 0:
-            self.label_status.configure(text=f"Próxima rodada em {contador}...")
-            self.desenhar_grafico()
-            self._id_after = self.after(1000, lambda: self.contagem_regressiva(contador - 1))
+    else:
+        with open(args.saida, 'w', newline='', encoding='utf-8') as arquivo:
+            total = exportar_tabela(args.tabela, arquivo, args.formato)
+    print(f"{total} linha(s) de {args.tabela} exportada(s) em {time.perf_counter() - inicio:.1f}s.", file=sys.stderr)
+
+def executar_comando_arquivar(args):
+    inicio = time.perf_counter()
+    # Os agregados só andam com a janela ou a API abertas; sem isto, uma instalação só de linha de comando não arquivaria nada.
+    atualizar_agregados()
+    movidas = arquivar_logs(args.dias, args.lote, args.compactar)
+    print(", ".join(f"{tabela}: {quantidade} linha(s) arquivada(s)" for tabela, quantidade in movidas.items())
+          + f" em {time.perf_counter() - inicio:.1f}s.")
+    if args.vacuum:
+        def compactar():
+            with conexao_bd() as conexao:
+                conexao.execute("VACUUM")
+            return os.path.getsize(arquivo_bd_atual())
+        tamanho = sum(nos_shards(compactar)) if QUANTIDADE_SHARDS else compactar()
+        print(f"Banco{'s' if QUANTIDADE_SHARDS else ''} compactado{'s' if QUANTIDADE_SHARDS else ''}: {tamanho / 2**20:.1f} MB.")
+
+def imprimir_tabela(colunas, linhas, como_json=False):
+    """Mostra linhas como tabela alinhada ou, com 'como_json', como um objeto JSON por linha."""
+    if como_json:
+        for linha in linhas:
+            print(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False))
+        return
+    textos = [[f"{v:,.2f}" if isinstance(v, float) else str(v) for v in linha] for linha in linhas]
+    larguras = [max([len(c)] + [len(t[i]) for t in textos]) for i, c in enumerate(colunas)]
+    def alinhar(textos_linha, valores):
+        return "  ".join(t.rjust(l) if isinstance(v, (int, float)) else t.ljust(l) for t, v, l in zip(textos_linha, valores, larguras))
+    print(alinhar(colunas, linhas[0] if linhas else colunas).rstrip())
+    for linha, texto in zip(linhas, textos):
+        print(alinhar(texto, linha).rstrip())
+
+def executar_comando_admin(args):
+    """Tarefas do admin pela linha de comando, sem abrir a janela."""
+    if args.acao == 'usuarios':
+        busca = (args.busca or "").lower()
+        usuarios = sorted((u for u in obter_todos_usuarios() if busca in u[0].lower()), key=lambda u: u[0])
+        imprimir_tabela(('usuario', 'saldo'), usuarios[:args.limite], args.json)
+        if not args.json:
+            print(f"{len(usuarios)} usuário(s), saldo total ${sum(s for _, s in usuarios):,.2f}.")
+    elif args.acao == 'saldos':
+        if args.depositar:
+            movimentar_saldo(args.usuario, args.depositar, 'deposito_admin')
+        if args.sacar:
+            movimentar_saldo(args.usuario, -args.sacar, 'saque_admin')
+        dados = obter_dados_usuario(args.usuario)
+        if not dados:
+            sys.exit(f"Usuário '{args.usuario}' não encontrado.")
+        imprimir_tabela(('usuario', 'saldo', 'livro_razao', 'codigo_referencia'),
+                        [(args.usuario, dados['saldo'], recalcular_saldo(args.usuario), dados['codigo_referencia'])], args.json)
+    elif args.acao == 'odds':
+        if args.pagamento_numero is not None:
+            definir_configuracao_jogo('pagamento_roleta_numero', args.pagamento_numero)
+        imprimir_tabela(('configuracao', 'valor'), [('pagamento_roleta_numero', int(obter_configuracao_jogo('pagamento_roleta_numero')))], args.json)
+    elif args.acao == 'logs':
+        tipo_log = f"logs_{args.tipo}"
+        colunas = ('id', 'usuario', 'jogo', 'aposta', 'resultado', 'timestamp') if args.tipo == 'apostas' else \
+                  ('id', 'usuario', 'tipo', 'quantia', 'timestamp')
+        imprimir_tabela(colunas, obter_logs(tipo_log, args.usuario, args.de, args.ate, args.limite), args.json)
+    else:
+        atualizar_agregados()
+        total_usuarios, saldo_total = obter_resumo_usuarios()
+        if not args.json:
+            print(f"Usuários: {total_usuarios} | Saldo total em jogo: ${saldo_total:,.2f}")
+            print(f"{args.metrica} por {args.granularidade}:")
+        inicio = args.de or (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+        imprimir_tabela(('inicio', 'valor'), obter_serie_agregada(args.metrica, args.granularidade, inicio, args.ate, args.jogo), args.json)
+
+def principal(argumentos=None):
+    """Ponto de entrada: sem subcomando abre a interface gráfica."""
+    parser = argparse.ArgumentParser(description="PUROBET Cassino")
+    parser.add_argument('--metricas', metavar="ARQUIVO", help="Exporta as métricas de desempenho periodicamente neste arquivo (formato Prometheus).")
+    parser.add_argument('--intervalo-metricas', type=float, default=15, help="Intervalo da exportação, em segundos.")
+    parser.add_argument('--intervalo-backup', type=float, default=INTERVALO_BACKUP, help="Segundos entre backups automáticos (0 desliga).")
+    parser.add_argument('--limite-sql-lento', type=float, default=50, help="Instruções SQL acima deste tempo (ms) vão para o log de lentidão.")
+    parser.add_argument('--shards', type=int, help="Separa os usuários em N arquivos de banco (só num banco ainda sem usuários; depois fica salvo).")
+    parser.add_argument('--semente', type=int, help="Fixa a sequência de sementes das rodadas (para testes).")
+    subcomandos = parser.add_subparsers(dest='comando')
+    parser_servir = subcomandos.add_parser('servir', help="Sobe a API JSON local, sem interface gráfica.")
+    parser_servir.add_argument('--porta', type=int, default=8765)
+    parser_servir.add_argument('--pool', type=int, default=8, help="Tamanho do pool de conexões com o banco.")
+    parser_reconciliar = subcomandos.add_parser('reconciliar', help="Confere os saldos contra os logs de apostas e transações.")
+    parser_reconciliar.add_argument('--processos', type=int, help="Processos em paralelo (padrão: um por CPU).")
+    parser_reconciliar.add_argument('--faixa', type=int, default=50000, help="Usuários por faixa de trabalho.")
+    parser_reconciliar.add_argument('--completo', action='store_true', help="Ignora os checkpoints e confere todo o histórico, com os logs arquivados pelos totais de 'totais_arquivados'.")
+    parser_reconciliar.add_argument('--relatorio', help="Arquivo JSON do relatório (padrão: reconciliacao_<data>.json).")
+    parser_senha = subcomandos.add_parser('senha', help="Mede o custo do hash de senha contra um alvo de latência do login.")
+    parser_senha.add_argument('--alvo-ms', type=float, default=250, help="Tempo máximo aceitável para verificar uma senha.")
+    parser_senha.add_argument('--salvar', action='store_true', help="Grava o custo recomendado na configuração 'custo_senha_log2n'.")
+    parser_importar = subcomandos.add_parser('importar', help="Importa usuários e saldos em massa de um CSV ou JSONL.")
+    parser_importar.add_argument('arquivo')
+    parser_importar.add_argument('--formato', choices=['csv', 'jsonl'], help="Padrão: pela extensão do arquivo.")
+    parser_importar.add_argument('--lote', type=int, default=50000, help="Registros por transação.")
+    parser_importar.add_argument('--senha-padrao', help="Senha dos registros sem 'hash_senha' nem 'senha' (um único hash para todos).")
+    parser_exportar = subcomandos.add_parser('exportar', help="Exporta uma tabela inteira em CSV ou JSONL.")
+    parser_exportar.add_argument('tabela', choices=TABELAS_EXPORTACAO)
+    parser_exportar.add_argument('--saida', default='-', help="Arquivo de saída ('-' para a saída padrão).")
+    parser_exportar.add_argument('--formato', choices=['csv', 'jsonl'], default='csv')
+    parser_arquivar = subcomandos.add_parser('arquivar', help="Move os logs antigos para arquivos mensais em arquivo_logs/.")
+    parser_arquivar.add_argument('--dias', type=int, help="Idade mínima das linhas arquivadas (padrão: configuração 'retencao_logs_dias').")
+    parser_arquivar.add_argument('--lote', type=int, default=5000, help="Ids por transação.")
+    parser_arquivar.add_argument('--compactar', action='store_true', help="Comprime com gzip os meses encerrados.")
+    parser_arquivar.add_argument('--vacuum', action='store_true', help="Roda VACUUM no banco principal ao final.")
+    parser_backup = subcomandos.add_parser('backup', help="Faz um backup do banco, seguro mesmo com o jogo rodando.")
+    parser_backup.add_argument('--destino', help="Arquivo de destino (padrão: backups/<banco>_<data>.db).")
+    parser_admin = subcomandos.add_parser('admin', help="Consultas e ajustes do admin, sem interface gráfica.")
+    parser_admin.add_argument('--json', action='store_true', help="Um objeto JSON por linha, para scripts.")
+    acoes_admin = parser_admin.add_subparsers(dest='acao', required=True)
+    parser_usuarios = acoes_admin.add_parser('usuarios', help="Lista os usuários e seus saldos.")
+    parser_usuarios.add_argument('busca', nargs='?', help="Parte do nome de usuário.")
+    parser_usuarios.add_argument('--limite', type=int, default=50)
+    parser_saldos = acoes_admin.add_parser('saldos', help="Mostra (e ajusta) o saldo de um usuário.")
+    parser_saldos.add_argument('usuario')
+    parser_saldos.add_argument('--depositar', type=float, metavar="QUANTIA")
+    parser_saldos.add_argument('--sacar', type=float, metavar="QUANTIA")
+    parser_odds = acoes_admin.add_parser('odds', help="Mostra (e altera) o pagamento da roleta.")
+    parser_odds.add_argument('--pagamento-numero', type=int, choices=range(10, 51), metavar="10-50",
+                             help="Quanto paga uma aposta num número (x a aposta).")
+    parser_logs = acoes_admin.add_parser('logs', help="Mostra os logs mais recentes.")
+    parser_logs.add_argument('tipo', nargs='?', choices=['apostas', 'transacoes'], default='apostas')
+    parser_logs.add_argument('--usuario')
+    parser_logs.add_argument('--de', help="Início do período ('AAAA-MM-DD HH:MM:SS'); inclui os logs arquivados.")
+    parser_logs.add_argument('--ate', help="Fim do período.")
+    parser_logs.add_argument('--limite', type=int, default=20)
+    parser_estatisticas = acoes_admin.add_parser('estatisticas', help="Resumo dos usuários e série de uma métrica agregada.")
+    parser_estatisticas.add_argument('--metrica', choices=METRICAS_AGREGADAS, default='Total apostado')
+    parser_estatisticas.add_argument('--granularidade', choices=GRANULARIDADES, default='hora')
+    parser_estatisticas.add_argument('--de', help="Início da série (padrão: últimas 24 horas).")
+    parser_estatisticas.add_argument('--ate')
+    parser_estatisticas.add_argument('--jogo')
+    parser_reproduzir = subcomandos.add_parser('reproduzir', help="Refaz as rodadas gravadas e confere os pagamentos.")
+    parser_reproduzir.add_argument('--de', help="Início do período ('AAAA-MM-DD HH:MM:SS').")
+    parser_reproduzir.add_argument('--ate', help="Fim do período.")
+    parser_reproduzir.add_argument('--jogo', choices=list(REPRODUTORES))
+    parser_reproduzir.add_argument('--usuario')
+    parser_reproduzir.add_argument('--relatorio', help="Grava o relatório completo neste arquivo JSON.")
+    parser_automatico = subcomandos.add_parser('automatico', help="Joga uma sessão automática de Blackjack ou Roleta, sem interface.")
+    parser_automatico.add_argument('usuario')
+    parser_automatico.add_argument('jogo', choices=['blackjack', 'roleta'])
+    parser_automatico.add_argument('--rodadas', type=int, default=100)
+    parser_automatico.add_argument('--aposta', type=float, help="Aposta de cada mão do Blackjack.")
+    parser_automatico.add_argument('--mesa', help="Fichas da roleta, ex.: 'cred:10,n7:5' (n número, c cor, p par/ímpar, r faixa).")
+    parser_automatico.add_argument('--estrategia', choices=list(ESTRATEGIAS_BLACKJACK), default='basica')
+    parser_automatico.add_argument('--limite-perda', type=float, help="Para antes de uma rodada que poderia passar desta perda.")
+    parser_automatico.add_argument('--meta-ganho', type=float, help="Para quando o resultado da sessão chegar a este ganho.")
+    parser_automatico.add_argument('--saldo-minimo', type=float, default=0, help="Nunca deixa o saldo abaixo deste valor.")
+    parser_cadeia = subcomandos.add_parser('cadeia', help="Cadeias de resultados verificáveis do Crash e da Roleta.")
+    acoes_cadeia = parser_cadeia.add_subparsers(dest='acao', required=True)
+    parser_gerar = acoes_cadeia.add_parser('gerar', help="Gera uma cadeia nova, que passa a ser a usada pelo jogo.")
+    parser_gerar.add_argument('jogo', choices=[j.lower() for j in JOGOS_CADEIA])
+    parser_gerar.add_argument('--rodadas', type=int, default=1_000_000, help="Quantidade de elos (32 bytes cada).")
+    parser_verificar = acoes_cadeia.add_parser('verificar', help="Confere os arquivos de cadeia elo a elo.")
+    parser_verificar.add_argument('arquivos', nargs='*', help="Padrão: todos os arquivos de cadeias/.")
+    parser_conferir = acoes_cadeia.add_parser('conferir', help="Confere uma rodada publicada, sem o arquivo da cadeia.")
+    parser_conferir.add_argument('jogo', choices=[j.lower() for j in JOGOS_CADEIA])
+    parser_conferir.add_argument('elo', help="Elo revelado da rodada, em hexadecimal.")
+    parser_conferir.add_argument('--hash-final', required=True, help="Hash final publicado da cadeia.")
+    parser_conferir.add_argument('--maximo', type=int, default=10_000_000, help="Máximo de passos até o hash final.")
+    acoes_cadeia.add_parser('estado', help="Mostra a cadeia em uso de cada jogo e quanto dela já foi usado.")
+    parser_livro = subcomandos.add_parser('livro', help="Snapshots e reprodução do livro-razão de saldos.")
+    parser_livro.add_argument('acao', choices=['snapshot', 'reproduzir', 'saldo'])
+    parser_livro.add_argument('usuario', nargs='?', help="Usuário, para a ação 'saldo'.")
+    parser_livro.add_argument('--corrigir', action='store_true', help="Reescreve os saldos divergentes ao reproduzir.")
+    args = parser.parse_args(argumentos)
+
+    METRICAS.limite_sql_lento_ms = args.limite_sql_lento
+    if args.semente is not None:
+        SORTEIO.fixar_semente(args.semente)
+    exportador = None
+    if args.metricas:
+        exportador = ExportadorPrometheus(args.metricas, args.intervalo_metricas)
+        exportador.start()
+
+    inicializar_banco_de_dados()
+    CUSTO_SENHA['n'] = 2 ** int(obter_configuracao_jogo('custo_senha_log2n'))
+    shards = int(obter_configuracao_jogo('quantidade_shards'))
+    if args.shards is not None and args.shards != shards:
+        with conexao_bd() as conexao:
+            tem_usuarios = conexao.execute("SELECT EXISTS (SELECT 1 FROM usuarios)").fetchone()[0]
+        if shards or tem_usuarios:
+            sys.exit(f"O banco já está com {shards} shard(s) e não é redistribuído. "
+                     "Exporte os usuários e importe-os num banco novo com o --shards desejado.")
+        definir_configuracao_jogo('quantidade_shards', args.shards)
+        shards = args.shards
+    ativar_shards(shards)
+    if args.comando == 'cadeia':
+        executar_comando_cadeia(args)
+        return
+    carregar_cadeias()
+    if args.comando == 'senha':
+        executar_comando_senha(args)
+        return
+    if args.comando == 'admin':
+        executar_comando_admin(args)
+        return
+    if args.comando == 'livro':
+        executar_comando_livro(args)
+        return
+    if args.comando == 'backup':
+        if args.destino:
+            print(f"Backup em {args.destino} ({copiar_banco(args.destino):.0f} ms).")
         else:
-            self.label_status.configure(text="")
-            self.iniciar_corrida()
-
-    def atualizar_historico(self):
-        for widget in self.frame_historico.winfo_children(): widget.destroy()
-        for m in reversed(self.historico[-10:]):
-            ctk.CTkLabel(self.frame_historico, text=f"{m:.2f}x", text_color="#4CAF50" if m >= 2.0 else "#D32F2F", anchor="w").pack(fill="x")
-
-    def desenhar_grafico(self, event=None, crashou=False):
-        self.canvas.delete("all")
-        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
-        if w < 20 or h < 20: return
-
-        tempo_decorrido = (time.time() - self.tempo_inicio) if self.estado_jogo == "correndo" else 0
-        max_mult = max(2.0, self.multiplicador * 1.2, self.ponto_crash * 1.1)
-        max_tempo = max(5.0, tempo_decorrido * 1.2)
-
-        self.pontos_grafico = [(0, h)]
-        for t_ms in range(int(tempo_decorrido * 100) + 1):
-            t = t_ms / 100.0
-            mult_atual = math.pow(1.05, t)
-            x = (t / max_tempo) * w
-            y = h - ((mult_atual - 1) / (max_mult - 1)) * h
-            x = max(0, min(w, x))
-            y = max(0, min(h, y))
-            self.pontos_grafico.append((x, y))
-
-        cor_linha = "#D32F2F" if crashou else "#E74C3C"
-
-        if len(self.pontos_grafico) > 1:
-            self.canvas.create_line(self.pontos_grafico, fill=cor_linha, width=4, smooth=True)
-
-        texto_mult = f"{self.ponto_crash:.2f}x" if crashou else f"{self.multiplicador:.2f}x"
-        tamanho_fonte = min(max(int(h / 5), 30), 100)
-        self.canvas.create_text(w/2, h/2, text=texto_mult, font=("Roboto", tamanho_fonte, "bold"), fill="white", anchor="center")
-
-        if self.estado_jogo == "correndo" or crashou:
-            self.imagem_aviao_photo = self.controlador.carregador_imagens.obter_imagem_photo("plane", tamanho=(80, 50))
-            if self.imagem_aviao_photo and self.pontos_grafico:
-                aviao_x, aviao_y = self.pontos_grafico[-1]
-                self.canvas.create_image(aviao_x, aviao_y, image=self.imagem_aviao_photo, anchor="center")
-
-# --- SEÇÃO 6: EXECUÇÃO DA APLICAÇÃO ---
+            print(f"Backup em {fazer_backup()} ({ESTADO_BACKUP['backup_ms']:.0f} ms).")
+        return
+    if args.comando == 'arquivar':
+        executar_comando_arquivar(args)
+        return
+    if args.comando in ('importar', 'exportar'):
+        executar_comando_lote(args)
+        return
+    if args.comando == 'reconciliar':
+        executar_comando_reconciliar(args)
+        return
+    if args.comando == 'reproduzir':
+        executar_comando_reproduzir(args)
+        return
+    if args.comando == 'automatico':
+        executar_comando_automatico(args)
+        return
+    snapshots = TarefaPeriodica(criar_snapshots_saldo, INTERVALO_SNAPSHOTS)
+    snapshots.start()
+    agregados = TarefaPeriodica(atualizar_agregados, INTERVALO_AGREGADOS)
+    agregados.start()
+    tarefas_backup = [TarefaPeriodica(atualizar_snapshot_leitura, INTERVALO_SNAPSHOT_LEITURA)]
+    if args.intervalo_backup > 0:
+        tarefas_backup.append(TarefaPeriodica(fazer_backup, args.intervalo_backup))
+    for tarefa in tarefas_backup:
+        tarefa.start()
+    try:
+        if args.comando == 'servir':
+            from api import iniciar_servidor_api
+            servidor = iniciar_servidor_api(args.porta, args.pool)
+            print(f"API PUROBET ouvindo em http://127.0.0.1:{args.porta}")
+            try:
+                servidor.serve_forever()
+            except KeyboardInterrupt:
+                servidor.server_close()
+            return
+        from interface import AppPurobet
+        app = AppPurobet()
+        app.mainloop()
+    finally:
+        snapshots.encerrar()
+        agregados.encerrar()
+        for tarefa in tarefas_backup:
+            tarefa.encerrar()
+        if exportador:
+            exportador.encerrar()
 
 if __name__ == "__main__":
-    inicializar_banco_de_dados()
-    app = AppPurobet()
-    app.mainloop()
\ No newline at end of file
+    # O interface.py importa este arquivo como 'main'; sem isso ele seria executado uma segunda vez.
+    sys.modules.setdefault("main", sys.modules[__name__])
+    principal()
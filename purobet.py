@@ -0,0 +1,15 @@
+# ===================================================================================
+# PUROBET - PONTO DE ENTRADA DA LINHA DE COMANDO
+# Só repassa os argumentos para main.principal(). Importado daqui, o main.py vem do cache
+# de bytecode (__pycache__); rodado como script ('python main.py'), o Python o compila de
+# novo a cada execução, o que custa ~40 ms na partida.
+#
+# Uso:
+#    python -m purobet                   # abre a interface gráfica
+#    python -m purobet admin odds        # qualquer subcomando do main.py
+# ===================================================================================
+
+from main import principal
+
+if __name__ == "__main__":
+    principal()